@@ -1,11 +1,10 @@
+from app.startup import startup_timer
+from app.logs import configure_logging
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import pandas as pd
 import numpy as np
 import joblib
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 import logging
 import os
 import time
@@ -14,52 +13,154 @@ import psutil
 import socket
 from datetime import datetime
 from collections import defaultdict, deque
+from concurrent.futures import Future
+from queue import SimpleQueue, Empty
+from importlib.util import find_spec
 import json
+import hmac
 
 # Pour la capture de paquets (nécessite d'installer scapy: pip install scapy)
-try:
-    from scapy.all import sniff, IP, TCP, UDP, ICMP
-    SCAPY_AVAILABLE = True
-except ImportError:
-    SCAPY_AVAILABLE = False
+# L'import de scapy.all (plusieurs secondes) est différé au premier démarrage de la capture
+SCAPY_AVAILABLE = find_spec('scapy') is not None
+sniff = IP = TCP = UDP = None
+if not SCAPY_AVAILABLE:
     logging.warning("Scapy n'est pas installé. Utilisation des métriques système à la place.")
 
-# Configuration des logs
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+# Configuration des logs: écriture asynchrone (file bornée), format text | json,
+# limitation à LOG_RATE_LIMIT occurrences d'un même message par LOG_RATE_PERIOD secondes
+configure_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    fmt=os.getenv('LOG_FORMAT', 'text'),
+    async_logging=os.getenv('LOG_ASYNC', '1') == '1',
+    log_file=os.getenv('LOG_FILE'),
+    rate_limit=int(os.getenv('LOG_RATE_LIMIT', 20)),
+    rate_period=float(os.getenv('LOG_RATE_PERIOD', 10)),
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+    text_format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                    logger=os.getenv('SOCKETIO_LOGGER', '0') == '1',
+                    engineio_logger=os.getenv('ENGINEIO_LOGGER', '0') == '1')
+
+# Composants partagés avec le package app
+from app.models.engine import load_engine, model_dir
+from app.models.schema import FeatureSchema
+from app.services.inference_queue import InferenceQueue
+from app.services.prediction_cache import PredictionCache
+from app.capture.flow_table import FlowTable, bidirectional_key, FLOW, FWD, BWD
+from app.capture.flow_expiry import FlowExpiry
+from app.capture.replay import PcapReplay
+from app.capture.decoder import decode_frame, format_ip, LINKTYPE_ETHERNET
+from app.capture.sources import read_raw_socket, RAW_SOCKET_AVAILABLE
+from app.capture.sharding import ShardDispatcher, run_shard_worker
+from app.services.result_store import ResultStore
+from app.services.emitter import PredictionEmitter
+from app.services.history_store import HistoryStore, parse_time, parse_cursor
+from app.services.subscriptions import Subscription
+from app import metrics
+from app.services.profiler import SamplingProfiler, ProfilerBusy
+
+startup_timer.mark('imports')
 
 # Chargement du modèle et prétraitements
-try:
-    model = load_model("model/model/traffic_classifier_model.h5")
-    scaler = joblib.load("model/model/scaler.pkl")
-    label_encoder = joblib.load("model/model/label_encoder.pkl")
-    logging.info("Modèle chargé avec succès")
-except Exception as e:
-    logging.error(f"Erreur lors du chargement du modèle: {e}")
-    model, scaler, label_encoder = None, None, None
+# INFERENCE_ENGINE: auto | numpy | onnx | keras (poids exportés par export_model.py)
+INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'auto')
+# LAZY_MODEL_LOAD: charger en arrière-plan (classification par règles en attendant)
+LAZY_MODEL_LOAD = os.getenv('LAZY_MODEL_LOAD', '1') == '1'
+# Répertoire des modèles de stage.py (MODEL_DIR, défaut: model/model, comme create_app)
+MODEL_DIR = model_dir()
+
+model, scaler, label_encoder = None, None, None
+feature_schema = None  # normalisation MinMax fusionnée (X * scale + min)
+# File de micro-batching partagée devant model.predict (flows temps réel, passe par le cache)
+inference_queue = None
+# Prédiction directe d'un lot, sans file ni cache (scoring de fichiers: résultats exacts)
+batch_predict = None
+# Cache LRU/TTL des prédictions (features normalisées quantifiées) devant la file d'inférence:
+# flows temps réel uniquement, /predict passe par batch_predict (non caché); PREDICTION_CACHE_SIZE=0 le désactive
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        PREDICTION_CACHE_SIZE,
+        ttl=float(os.getenv('PREDICTION_CACHE_TTL', 300)),
+        precision=float(os.getenv('PREDICTION_CACHE_PRECISION', 1e-3))
+    )
+models_ready = threading.Event()
+
+def load_models():
+    """Charge le modèle, le scaler et l'encodeur puis démarre la file d'inférence"""
+    global model, scaler, label_encoder, feature_schema, inference_queue, batch_predict
+    
+    try:
+        with startup_timer.phase('model.engine'):
+            loaded_model = load_engine(
+                INFERENCE_ENGINE,
+                os.path.join(MODEL_DIR, "traffic_classifier_model.h5"),
+                weights_path=os.path.join(MODEL_DIR, "traffic_classifier_weights.npz"),
+                onnx_path=os.path.join(MODEL_DIR, "traffic_classifier_model.onnx")
+            )
+        with startup_timer.phase('model.scaler'):
+            scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
+            feature_schema = FeatureSchema.from_scaler(scaler)
+        with startup_timer.phase('model.encoder'):
+            label_encoder = joblib.load(os.path.join(MODEL_DIR, "label_encoder.pkl"))
+        
+        predict_fn = batch_predict = metrics.timed_predict(loaded_model.predict, loaded_model.name)
+        if prediction_cache is not None:
+            predict_fn = prediction_cache.wrap(predict_fn)
+            metrics.watch_prediction_cache(prediction_cache)
+        loaded_queue = InferenceQueue(
+            predict_fn,
+            max_batch_size=int(os.getenv('INFERENCE_BATCH_SIZE', 256)),
+            max_delay=float(os.getenv('INFERENCE_BATCH_DELAY', 0.005))
+        )
+        loaded_queue.start()
+        metrics.watch_inference_queue(loaded_queue)
+        inference_queue = loaded_queue
+        # Publié en dernier: model non nul => scaler, encodeur et file prêts
+        model = loaded_model
+        logging.info("Modèle chargé avec succès")
+    except Exception as e:
+        logging.error(f"Erreur lors du chargement du modèle: {e}")
+        model, scaler, label_encoder = None, None, None
+    finally:
+        models_ready.set()
+        startup_timer.log("Chargement du modèle")
+
+if LAZY_MODEL_LOAD:
+    threading.Thread(target=load_models, name='model-loader', daemon=True).start()
+else:
+    load_models()
 
 # Variables globales pour la capture et l'analyse
 real_time_active = False
 network_capture_active = False
-flow_data = defaultdict(lambda: {
-    'packets': 0,
-    'bytes': 0,
-    'start_time': time.time(),
-    'last_packet_time': time.time(),
-    'src_ports': set(),
-    'dst_ports': set(),
-    'protocols': set(),
-    'packet_sizes': [],
-    'inter_arrival_times': [],
-    'tcp_flags': [],
-    'packet_count_per_second': deque(maxlen=60)
-})
+# Table des flows bidirectionnels (colonnes NumPy préallouées, indexées par slot)
+flow_data = FlowTable(capacity=int(os.getenv('FLOW_TABLE_CAPACITY', 65536)))
+
+# Expiration des flows: inactivité / durée max (secondes), FIN/RST
+flow_expiry = FlowExpiry(
+    flow_data,
+    idle_timeout=float(os.getenv('FLOW_IDLE_TIMEOUT', 15)),
+    active_timeout=float(os.getenv('FLOW_ACTIVE_TIMEOUT', 120))
+)
+metrics.FLOW_TABLE_SIZE.set_function(lambda: len(flow_data))
+# Backend de capture: 'auto' (socket brute si possible, sinon Scapy), 'raw' ou 'scapy'
+CAPTURE_BACKEND = os.getenv('CAPTURE_BACKEND', 'auto')
+CAPTURE_INTERFACE = os.getenv('CAPTURE_INTERFACE')  # défaut: toutes les interfaces
+
+# Capture multi-processus: N workers possédant chacun leurs flows et leur prédicteur
+CAPTURE_SHARDS = int(os.getenv('CAPTURE_SHARDS', 1))
+CAPTURE_SHARD_START_METHOD = os.getenv('CAPTURE_SHARD_START_METHOD', 'spawn')
+# Dans un worker de shard: les résultats sont renvoyés au processus web au lieu d'être émis
+prediction_sink = None
+
+SWEEP_INTERVAL = 1.0  # secondes entre deux balayages des flows expirés
+last_sweep_time = 0.0
 
 real_time_stats = {
     'total_processed': 0,
@@ -71,56 +172,206 @@ real_time_stats = {
     'active_connections': 0
 }
 
+# Classifications de la dernière minute glissante (classifications_per_minute)
+classification_rate = metrics.RateMeter(window=60)
+
 # Buffer pour stocker les flows à analyser
 flows_buffer = deque(maxlen=100)
 
+# Flows classifiés en attente de publication: le worker d'inférence ne fait que les déposer,
+# le thread de capture les publie (stats, émission, historique) entre deux paquets
+completed_flows = SimpleQueue()
+
+# Émission groupée des prédictions: trames 'real_time_batch' toutes les SOCKET_EMIT_INTERVAL
+# secondes (stats en delta, Low résumés sous charge, file par client); 0 = un événement par flow
+SOCKET_EMIT_INTERVAL = float(os.getenv('SOCKET_EMIT_INTERVAL', 0.25))
+emitter = None
+if SOCKET_EMIT_INTERVAL > 0:
+    emitter = PredictionEmitter(
+        socketio,
+        interval=SOCKET_EMIT_INTERVAL,
+        max_batch=int(os.getenv('SOCKET_MAX_BATCH', 200)),
+        client_queue=int(os.getenv('SOCKET_CLIENT_QUEUE', 8)),
+        send_features=os.getenv('SOCKET_SEND_FEATURES', '0') == '1',
+        stats_source=lambda: current_stats()
+    )
+    metrics.watch_emitter(emitter)
+
+# Historique persistant des flows classifiés (SQLite WAL, écritures par lots dans un thread dédié)
+# HISTORY_RETENTION_HOURS / HISTORY_MAX_ROWS: rétention (0 = illimitée)
+history_store = None
+if os.getenv('HISTORY_ENABLED', '1') == '1':
+    history_store = HistoryStore(
+        os.getenv('HISTORY_PATH'),
+        retention_hours=float(os.getenv('HISTORY_RETENTION_HOURS', 168)),
+        max_rows=int(os.getenv('HISTORY_MAX_ROWS', 5000000)),
+        batch_size=int(os.getenv('HISTORY_BATCH_SIZE', 500)),
+        flush_interval=float(os.getenv('HISTORY_FLUSH_INTERVAL', 1.0)),
+        max_pending=int(os.getenv('HISTORY_MAX_PENDING', 50000))
+    )
+    metrics.watch_history_store(history_store)
+
+# Features attendues par le modèle (ordre du vecteur d'entrée)
+EXPECTED_FEATURES = [
+    'flow_duration', 'total_fwd_packets', 'total_backward_packets',
+    'flow_bytes_s', 'flow_packets_s', 'flow_iat_mean', 'flow_iat_std',
+    'flow_iat_max', 'flow_iat_min', 'fwd_packets_length_max',
+    'fwd_packets_length_min', 'fwd_packets_length_mean', 'fwd_packets_length_std',
+    'min_packet_length', 'max_packet_length', 'packet_length_mean',
+    'packet_length_std', 'fin_flag_count', 'syn_flag_count',
+    'rst_flag_count', 'psh_flag_count', 'ack_flag_count',
+    'average_packet_size', 'unique_ports_count', 'protocol_diversity'
+]
+
+# Feature extraite -> colonne du scaler (CICFlowMeter, scaler.feature_names_in_);
+# les colonnes sans équivalent dans la FlowTable restent à 0
+MODEL_COLUMNS = {
+    'src_port': 'Src Port',
+    'dst_port': 'Dst Port',
+    'protocol': 'Protocol',
+    'flow_duration': 'Flow Duration',
+    'total_fwd_packets': 'Total Fwd Packet',
+    'total_backward_packets': 'Total Bwd packets',
+    'total_length_fwd_packets': 'Total Length of Fwd Packet',
+    'total_length_bwd_packets': 'Total Length of Bwd Packet',
+    'fwd_packets_length_max': 'Fwd Packet Length Max',
+    'fwd_packets_length_min': 'Fwd Packet Length Min',
+    'fwd_packets_length_mean': 'Fwd Packet Length Mean',
+    'fwd_packets_length_std': 'Fwd Packet Length Std',
+    'bwd_packets_length_max': 'Bwd Packet Length Max',
+    'bwd_packets_length_min': 'Bwd Packet Length Min',
+    'bwd_packets_length_mean': 'Bwd Packet Length Mean',
+    'bwd_packets_length_std': 'Bwd Packet Length Std',
+    'flow_bytes_s': 'Flow Bytes/s',
+    'flow_packets_s': 'Flow Packets/s',
+    'flow_iat_mean': 'Flow IAT Mean',
+    'flow_iat_std': 'Flow IAT Std',
+    'flow_iat_max': 'Flow IAT Max',
+    'flow_iat_min': 'Flow IAT Min',
+    'fwd_iat_total': 'Fwd IAT Total',
+    'fwd_iat_mean': 'Fwd IAT Mean',
+    'fwd_iat_std': 'Fwd IAT Std',
+    'fwd_iat_max': 'Fwd IAT Max',
+    'fwd_iat_min': 'Fwd IAT Min',
+    'bwd_iat_total': 'Bwd IAT Total',
+    'bwd_iat_mean': 'Bwd IAT Mean',
+    'bwd_iat_std': 'Bwd IAT Std',
+    'bwd_iat_max': 'Bwd IAT Max',
+    'bwd_iat_min': 'Bwd IAT Min',
+    'fwd_packets_s': 'Fwd Packets/s',
+    'bwd_packets_s': 'Bwd Packets/s',
+    'min_packet_length': 'Packet Length Min',
+    'max_packet_length': 'Packet Length Max',
+    'packet_length_mean': 'Packet Length Mean',
+    'packet_length_std': 'Packet Length Std',
+    'fin_flag_count': 'FIN Flag Count',
+    'syn_flag_count': 'SYN Flag Count',
+    'rst_flag_count': 'RST Flag Count',
+    'psh_flag_count': 'PSH Flag Count',
+    'ack_flag_count': 'ACK Flag Count',
+    'down_up_ratio': 'Down/Up Ratio',
+    'average_packet_size': 'Average Packet Size'
+}
+
+# Durées extraites en secondes, en microsecondes dans CICFlowMeter
+MICROSECOND_FEATURES = frozenset(
+    name for name in MODEL_COLUMNS if name == 'flow_duration' or '_iat_' in name
+)
+
 class NetworkFlowAnalyzer:
     """Classe pour analyser les flows réseau et extraire des features"""
     
     @staticmethod
-    def extract_features_from_flow(flow_id, flow_info):
-        """Extrait les features d'un flow pour la classification ML"""
-        current_time = time.time()
-        flow_duration = current_time - flow_info['start_time']
+    def extract_features_from_flow(flows, slot):
+        """Extrait les features d'un flow (slot de la FlowTable) pour la classification ML"""
+        flow_duration = float(flows.last_time[slot, FLOW] - flows.start_time[slot])
+        
+        packets = int(flows.packets[slot, FLOW])
+        fwd_packets = int(flows.packets[slot, FWD])
+        bwd_packets = int(flows.packets[slot, BWD])
+        fwd_bytes = int(flows.bytes[slot, FWD])
+        bwd_bytes = int(flows.bytes[slot, BWD])
+        
+        # Statistiques incrémentales (O(1), indépendantes du nombre de paquets)
+        size_mean, size_std, size_min, size_max = flows.size_stats(slot)
+        iat_mean, iat_std, iat_min, iat_max = flows.iat_stats(slot)
+        fwd_mean, fwd_std, fwd_min, fwd_max = flows.size_stats(slot, FWD)
+        bwd_mean, bwd_std, bwd_min, bwd_max = flows.size_stats(slot, BWD)
+        fwd_iat_mean, fwd_iat_std, fwd_iat_min, fwd_iat_max = flows.iat_stats(slot, FWD)
+        bwd_iat_mean, bwd_iat_std, bwd_iat_min, bwd_iat_max = flows.iat_stats(slot, BWD)
         
         # Features de base
         features = {
             'flow_duration': flow_duration,
-            'total_fwd_packets': flow_info['packets'],
-            'total_backward_packets': 0,  # Simplifié pour cet exemple
-            'flow_bytes_s': flow_info['bytes'] / max(flow_duration, 1),
-            'flow_packets_s': flow_info['packets'] / max(flow_duration, 1),
-            'flow_iat_mean': np.mean(flow_info['inter_arrival_times']) if flow_info['inter_arrival_times'] else 0,
-            'flow_iat_std': np.std(flow_info['inter_arrival_times']) if flow_info['inter_arrival_times'] else 0,
-            'flow_iat_max': max(flow_info['inter_arrival_times']) if flow_info['inter_arrival_times'] else 0,
-            'flow_iat_min': min(flow_info['inter_arrival_times']) if flow_info['inter_arrival_times'] else 0,
-            'fwd_packets_length_max': max(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'fwd_packets_length_min': min(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'fwd_packets_length_mean': np.mean(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'fwd_packets_length_std': np.std(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'min_packet_length': min(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'max_packet_length': max(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'packet_length_mean': np.mean(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'packet_length_std': np.std(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'fin_flag_count': sum(1 for flag in flow_info['tcp_flags'] if 'F' in str(flag)),
-            'syn_flag_count': sum(1 for flag in flow_info['tcp_flags'] if 'S' in str(flag)),
-            'rst_flag_count': sum(1 for flag in flow_info['tcp_flags'] if 'R' in str(flag)),
-            'psh_flag_count': sum(1 for flag in flow_info['tcp_flags'] if 'P' in str(flag)),
-            'ack_flag_count': sum(1 for flag in flow_info['tcp_flags'] if 'A' in str(flag)),
-            'average_packet_size': np.mean(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0,
-            'unique_ports_count': len(flow_info['src_ports'].union(flow_info['dst_ports'])),
-            'protocol_diversity': len(flow_info['protocols'])
+            'total_fwd_packets': fwd_packets,
+            'total_backward_packets': bwd_packets,
+            'flow_bytes_s': (fwd_bytes + bwd_bytes) / max(flow_duration, 1),
+            'flow_packets_s': packets / max(flow_duration, 1),
+            'flow_iat_mean': iat_mean,
+            'flow_iat_std': iat_std,
+            'flow_iat_max': iat_max,
+            'flow_iat_min': iat_min,
+            'fwd_packets_length_max': fwd_max,
+            'fwd_packets_length_min': fwd_min,
+            'fwd_packets_length_mean': fwd_mean,
+            'fwd_packets_length_std': fwd_std,
+            'min_packet_length': size_min,
+            'max_packet_length': size_max,
+            'packet_length_mean': size_mean,
+            'packet_length_std': size_std,
+            'fin_flag_count': int(flows.fin_count[slot]),
+            'syn_flag_count': int(flows.syn_count[slot]),
+            'rst_flag_count': int(flows.rst_count[slot]),
+            'psh_flag_count': int(flows.psh_count[slot]),
+            'ack_flag_count': int(flows.ack_count[slot]),
+            'average_packet_size': size_mean,
+            'unique_ports_count': 1 if flows.src_port[slot] == flows.dst_port[slot] else 2,
+            'protocol_diversity': 1,
+            'src_port': int(flows.src_port[slot]),
+            'dst_port': int(flows.dst_port[slot]),
+            'protocol': int(flows.protocol[slot]),
+            # Features par sens (forward = initiateur, backward = répondeur)
+            'total_length_fwd_packets': fwd_bytes,
+            'total_length_bwd_packets': bwd_bytes,
+            'bwd_packets_length_max': bwd_max,
+            'bwd_packets_length_min': bwd_min,
+            'bwd_packets_length_mean': bwd_mean,
+            'bwd_packets_length_std': bwd_std,
+            'fwd_iat_total': fwd_iat_mean * max(fwd_packets - 1, 0),
+            'fwd_iat_mean': fwd_iat_mean,
+            'fwd_iat_std': fwd_iat_std,
+            'fwd_iat_max': fwd_iat_max,
+            'fwd_iat_min': fwd_iat_min,
+            'bwd_iat_total': bwd_iat_mean * max(bwd_packets - 1, 0),
+            'bwd_iat_mean': bwd_iat_mean,
+            'bwd_iat_std': bwd_iat_std,
+            'bwd_iat_max': bwd_iat_max,
+            'bwd_iat_min': bwd_iat_min,
+            'fwd_packets_s': fwd_packets / max(flow_duration, 1),
+            'bwd_packets_s': bwd_packets / max(flow_duration, 1),
+            'down_up_ratio': bwd_packets / fwd_packets if fwd_packets else 0
         }
         
         return features
 
 def packet_handler(packet):
     """Handler pour traiter chaque paquet capturé"""
-    global flow_data, real_time_stats
-    
     if not network_capture_active:
         return
     
+    process_packet(packet)
+
+def load_scapy():
+    """Importe Scapy à la première capture (import coûteux)"""
+    global sniff, IP, TCP, UDP
+    
+    if sniff is None:
+        with startup_timer.phase('scapy'):
+            from scapy.all import sniff, IP, TCP, UDP
+    return sniff
+
+def process_packet(packet):
+    """Construit les flows à partir d'un paquet Scapy (chemin de repli)"""
     try:
         if IP in packet:
             # Identifier le flow
@@ -129,67 +380,135 @@ def packet_handler(packet):
             protocol = packet[IP].proto
             
             src_port = dst_port = 0
-            tcp_flags = ""
+            tcp_flags = 0
             
             if TCP in packet:
                 src_port = packet[TCP].sport
                 dst_port = packet[TCP].dport
-                tcp_flags = packet[TCP].flags
+                tcp_flags = int(packet[TCP].flags)
             elif UDP in packet:
                 src_port = packet[UDP].sport
                 dst_port = packet[UDP].dport
             
-            # Créer un identifiant unique pour le flow
-            flow_id = f"{src_ip}:{src_port}->{dst_ip}:{dst_port}_{protocol}"
-            
-            # Mettre à jour les informations du flow
-            current_time = time.time()
-            packet_size = len(packet)
-            
-            flow_info = flow_data[flow_id]
-            
-            # Calculer l'inter-arrival time
-            if flow_info['packets'] > 0:
-                iat = current_time - flow_info['last_packet_time']
-                flow_info['inter_arrival_times'].append(iat)
-            
-            # Mettre à jour les statistiques du flow
-            flow_info['packets'] += 1
-            flow_info['bytes'] += packet_size
-            flow_info['last_packet_time'] = current_time
-            flow_info['src_ports'].add(src_port)
-            flow_info['dst_ports'].add(dst_port)
-            flow_info['protocols'].add(protocol)
-            flow_info['packet_sizes'].append(packet_size)
-            flow_info['tcp_flags'].append(tcp_flags)
-            
-            # Ajouter à la liste des paquets par seconde
-            flow_info['packet_count_per_second'].append(current_time)
-            
-            # Mettre à jour les statistiques globales
-            real_time_stats['bytes_analyzed'] += packet_size
-            
-            # Si le flow a suffisamment de données, l'analyser
-            if (flow_info['packets'] >= 10 and 
-                current_time - flow_info['start_time'] >= 5):  # Au moins 10 paquets et 5 secondes
-                
-                analyze_flow(flow_id, flow_info)
+            update_flow(float(packet.time), src_ip, dst_ip, protocol,
+                        src_port, dst_port, tcp_flags, len(packet))
                 
     except Exception as e:
-        logging.error(f"Erreur lors du traitement du paquet: {e}")
+        metrics.PACKET_ERRORS.inc()
+        logging.error("Erreur lors du traitement du paquet: %s", e)
 
-def analyze_flow(flow_id, flow_info):
+def process_raw_packet(timestamp, frame, linktype=LINKTYPE_ETHERNET):
+    """Construit les flows à partir d'une trame brute (décodage rapide, sans Scapy)"""
+    try:
+        decoded = decode_frame(frame, linktype)
+        if decoded is not None:
+            update_flow(timestamp, *decoded, len(frame))
+    except Exception as e:
+        metrics.PACKET_ERRORS.inc()
+        logging.error("Erreur lors du traitement du paquet: %s", e)
+
+def update_flow(current_time, src_ip, dst_ip, protocol, src_port, dst_port, tcp_flags, packet_size):
+    """Comptabilise un paquet décodé dans la table des flows"""
+    global flow_data, real_time_stats
+    
+    # Clé bidirectionnelle du flow (5-tuple trié, même clé pour les deux sens)
+    flow_key, canonical = bidirectional_key(src_ip, src_port, dst_ip, dst_port, protocol)
+    
+    slot = flow_data.lookup(flow_key)
+    if slot is None:
+        # Nouveau flow: l'émetteur du premier paquet est l'initiateur (forward)
+        slot = flow_data.open(flow_key, current_time, canonical,
+                              (src_ip, src_port, dst_ip, dst_port, protocol))
+        flow_expiry.schedule(flow_key, slot)
+    
+    finished = flow_data.update(slot, current_time, packet_size, tcp_flags, canonical)
+    
+    # Mettre à jour les statistiques globales
+    real_time_stats['bytes_analyzed'] += packet_size
+    metrics.PACKETS.inc()
+    
+    # RST ou FIN dans les deux sens: le flow est terminé, le classifier une seule fois
+    if finished:
+        finish_flow(flow_key, slot)
+    
+    if current_time - last_sweep_time >= SWEEP_INTERVAL:
+        sweep_expired_flows(current_time)
+    elif not completed_flows.empty():
+        publish_completed_flows()
+
+def finish_flow(flow_key, slot):
+    """Classifie un flow terminé puis libère son slot"""
+    analyze_flow(flow_key, slot)
+    flow_data.release(flow_key)
+
+def sweep_expired_flows(now):
+    """Termine les flows inactifs ou ayant dépassé la durée max"""
+    global last_sweep_time
+    
+    last_sweep_time = now
+    for flow_key, slot in flow_expiry.expired(now):
+        finish_flow(flow_key, slot)
+    publish_completed_flows()
+
+def flush_flows():
+    """Termine tous les flows encore actifs (arrêt de la capture)"""
+    for flow_key, slot in flow_expiry.drain():
+        finish_flow(flow_key, slot)
+
+def finish_capture():
+    """Arrêt de la capture: termine les flows, attend les dernières inférences et les publie"""
+    flush_flows()
+    if inference_queue:
+        inference_queue.wait_idle()
+    publish_completed_flows()
+
+def format_flow_id(endpoints):
+    """Identifiant lisible d'un flow (construit uniquement à l'analyse)"""
+    src_ip, src_port, dst_ip, dst_port, protocol = endpoints
+    return f"{format_ip(src_ip)}:{src_port}<->{format_ip(dst_ip)}:{dst_port}_{protocol}"
+
+def analyze_flow(flow_key, slot):
     """Analyse un flow et effectue la classification"""
     global real_time_stats, flows_buffer
     
+    flow_id = format_flow_id(flow_data.endpoints[slot])
+    
     try:
         # Extraire les features
-        analyzer = NetworkFlowAnalyzer()
-        features = analyzer.extract_features_from_flow(flow_id, flow_info)
+        with metrics.FEATURE_SECONDS.time():
+            features = NetworkFlowAnalyzer.extract_features_from_flow(flow_data, slot)
         
-        # Classifier le flow si le modèle est disponible
-        prediction_result = classify_flow(features)
+        flow_stats = {
+            'packets': int(flow_data.packets[slot, FLOW]),
+            'fwd_packets': int(flow_data.packets[slot, FWD]),
+            'bwd_packets': int(flow_data.packets[slot, BWD]),
+            'bytes': int(flow_data.bytes[slot, FLOW]),
+            'duration': features['flow_duration'],
+            'avg_packet_size': features['average_packet_size']
+        }
+        
+        # Classifier le flow de façon asynchrone (micro-batching); le callback s'exécute
+        # dans le worker d'inférence: il dépose seulement le résultat (publication par la capture)
+        future = submit_classification(features)
+        future.add_done_callback(
+            lambda f: completed_flows.put((flow_id, features, flow_stats, f))
+        )
         
+    except Exception as e:
+        logging.error("Erreur lors de l'analyse du flow %s: %s", flow_id, e)
+
+def publish_completed_flows():
+    """Publie les flows dont la classification est terminée (thread de capture)"""
+    while True:
+        try:
+            flow_id, features, flow_stats, future = completed_flows.get_nowait()
+        except Empty:
+            return
+        publish_prediction(flow_id, features, flow_stats, future.result())
+
+def publish_prediction(flow_id, features, flow_stats, prediction_result):
+    """Enregistre et diffuse le résultat de classification d'un flow"""
+    try:
         # Créer l'objet de prédiction
         prediction_data = {
             'flow_id': flow_id,
@@ -198,22 +517,35 @@ def analyze_flow(flow_id, flow_info):
             'confidence': prediction_result['confidence'],
             'risk': prediction_result['risk'],
             'features': features,
-            'flow_stats': {
-                'packets': flow_info['packets'],
-                'bytes': flow_info['bytes'],
-                'duration': time.time() - flow_info['start_time'],
-                'avg_packet_size': np.mean(flow_info['packet_sizes']) if flow_info['packet_sizes'] else 0
-            }
+            'flow_stats': flow_stats
         }
         
+        if prediction_sink is not None:
+            # Worker de shard: le processus web se charge des stats et de l'émission
+            prediction_sink(prediction_data)
+        else:
+            record_prediction(prediction_data)
+        
+    except Exception as e:
+        logging.error("Erreur lors de la publication du flow %s: %s", flow_id, e)
+
+def record_prediction(prediction_data):
+    """Met à jour le buffer et les statistiques puis émet la prédiction (processus web)"""
+    global real_time_stats, flows_buffer
+    
+    flow_id = prediction_data['flow_id']
+    
+    try:
         # Ajouter au buffer
         flows_buffer.append(prediction_data)
         
         # Mettre à jour les statistiques
         real_time_stats['total_processed'] += 1
         real_time_stats['flows_analyzed'] += 1
+        classification_rate.mark()
+        metrics.FLOWS_CLASSIFIED.labels(prediction_data['risk']).inc()
         
-        if prediction_result['risk'] == 'High':
+        if prediction_data['risk'] == 'High':
             real_time_stats['high_risk_count'] += 1
         
         # Calculer le niveau de menace
@@ -226,87 +558,144 @@ def analyze_flow(flow_id, flow_info):
             real_time_stats['current_threat_level'] = 'Faible'
         
         # Envoyer via WebSocket
-        socketio.emit('real_time_prediction', {
-            'prediction': prediction_data,
-            'stats': real_time_stats
-        })
+        emit_prediction(prediction_data)
         
-        logging.info(f"Flow analysé: {flow_id} -> {prediction_result['prediction']} ({prediction_result['confidence']:.3f})")
+        # Historique persistant (ajout en mémoire, écriture par lots)
+        if history_store is not None:
+            history_store.record(prediction_data)
+        
+        logging.info("Flow analysé: %s -> %s (%.3f)", flow_id, prediction_data['prediction'], prediction_data['confidence'])
         
     except Exception as e:
-        logging.error(f"Erreur lors de l'analyse du flow {flow_id}: {e}")
+        logging.error("Erreur lors de l'enregistrement du flow %s: %s", flow_id, e)
+
+def emit_prediction(prediction_data):
+    """Diffuse une prédiction: trame groupée si l'émetteur est actif, sinon événement immédiat"""
+    if emitter is not None:
+        emitter.publish(prediction_data)
+    else:
+        socketio.emit('real_time_prediction', {
+            'prediction': prediction_data,
+            'stats': current_stats()
+        })
+
+def current_stats():
+    """Statistiques temps réel avec le débit de la dernière minute glissante"""
+    real_time_stats['classifications_per_minute'] = classification_rate.per_minute()
+    return real_time_stats
 
 def classify_flow(features):
     """Classifie un flow basé sur ses features avec gestion d'erreur améliorée"""
+    return submit_classification(features).result()
+
+def submit_classification(features):
+    """
+    Soumet un flow à la file d'inférence
+    
+    Returns:
+        Future résolu avec {'prediction', 'confidence', 'risk'}
+        (repli sur les règles en cas d'erreur ML)
+    """
+    result = Future()
+    
     if model is None or scaler is None or label_encoder is None:
-        return classify_flow_rule_based(features)
+        result.set_result(classify_flow_rule_based(features))
+        return result
     
     try:
-        # Features attendues
-        feature_names = [
-            'flow_duration', 'total_fwd_packets', 'total_backward_packets',
-            'flow_bytes_s', 'flow_packets_s', 'flow_iat_mean', 'flow_iat_std',
-            'flow_iat_max', 'flow_iat_min', 'fwd_packets_length_max',
-            'fwd_packets_length_min', 'fwd_packets_length_mean', 'fwd_packets_length_std',
-            'min_packet_length', 'max_packet_length', 'packet_length_mean',
-            'packet_length_std', 'fin_flag_count', 'syn_flag_count',
-            'rst_flag_count', 'psh_flag_count', 'ack_flag_count',
-            'average_packet_size', 'unique_ports_count', 'protocol_diversity'
-        ]
-        
-        # Créer l'array de features
-        feature_values = []
-        for name in feature_names:
-            value = features.get(name, 0)
-            # Nettoyer la valeur
-            if np.isnan(value) or np.isinf(value):
-                value = 0
-            feature_values.append(float(value))
-        
-        X = np.array(feature_values).reshape(1, -1)
-        
-        # Adapter au nombre de features attendu par le scaler
-        expected_features = scaler.n_features_in_
-        if X.shape[1] != expected_features:
-            if X.shape[1] > expected_features:
-                X = X[:, :expected_features]
-            else:
-                padding = np.zeros((1, expected_features - X.shape[1]))
-                X = np.concatenate([X, padding], axis=1)
-        
-        # Nettoyer les données avant normalisation
-        X = np.nan_to_num(X, nan=0.0, posinf=1e6, neginf=-1e6)
-        
-        # Normaliser
-        X_scaled = scaler.transform(X)
-        
-        # Reshape pour LSTM
-        X_reshaped = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
-        
-        # Prédiction
-        y_pred = model.predict(X_reshaped, verbose=0)
-        y_class = np.argmax(y_pred, axis=1)[0]
-        confidence = np.max(y_pred, axis=1)[0]
-        
-        # Vérifier que l'index est valide
-        if y_class >= len(label_encoder.classes_):
-            y_class = 0  # Classe par défaut
-        
-        # Decoder la classe
-        prediction = label_encoder.classes_[y_class]
-        
-        # Calculer le niveau de risque
-        risk = calculate_risk_level(prediction, confidence)
-        
-        return {
-            'prediction': prediction,
-            'confidence': float(confidence),
-            'risk': risk
-        }
-        
+        X_reshaped = build_model_input(features)
     except Exception as e:
-        logging.error(f"Erreur lors de la classification ML: {e}")
-        return classify_flow_rule_based(features)
+        logging.error("Erreur lors de la classification ML: %s", e)
+        result.set_result(classify_flow_rule_based(features))
+        return result
+    
+    def on_done(f):
+        try:
+            result.set_result(decode_prediction(f.result()[0]))
+        except Exception as e:
+            logging.error("Erreur lors de la classification ML: %s", e)
+            result.set_result(classify_flow_rule_based(features))
+    
+    inference_queue.submit(X_reshaped).add_done_callback(on_done)
+    return result
+
+def model_record(features):
+    """Features d'un flow renommées selon les colonnes du scaler (durées en microsecondes)"""
+    record = {}
+    for name, value in features.items():
+        column = MODEL_COLUMNS.get(name)
+        if column is not None:
+            record[column] = value * 1e6 if name in MICROSECOND_FEATURES else value
+    return record
+
+def build_model_input(features):
+    """Construit l'entrée LSTM [1, 1, n_features] à partir des features d'un flow"""
+    # Ligne construite par nom de colonne (colonnes absentes et valeurs non finies -> 0)
+    with metrics.PREPROCESS_SECONDS.labels('records').time():
+        X_scaled = feature_schema.transform(model_record(features), strict=False)
+    
+    # Reshape pour LSTM
+    return X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+
+def model_frame(feature_values):
+    """Matrice [lignes, EXPECTED_FEATURES] -> DataFrame aux colonnes du scaler (model_record par colonne)"""
+    import pandas as pd
+    columns = {}
+    for j, name in enumerate(EXPECTED_FEATURES):
+        column = MODEL_COLUMNS.get(name)
+        if column is not None and j < feature_values.shape[1]:
+            values = feature_values[:, j].astype(np.float64)
+            columns[column] = values * 1e6 if name in MICROSECOND_FEATURES else values
+    return pd.DataFrame(columns)
+
+def classify_batch(feature_values):
+    """
+    Classifie un chunk de fichier en un seul appel au modèle (hors file d'inférence et cache)
+    
+    Returns:
+        (labels, confidences, risks), une valeur par ligne
+        (repli sur les règles en cas d'erreur ML)
+    """
+    if model is not None:
+        try:
+            with metrics.PREPROCESS_SECONDS.labels('dataframe').time():
+                X_scaled = feature_schema.transform(model_frame(feature_values), strict=False)
+            y_pred = batch_predict(X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1])))
+            
+            classes = label_encoder.classes_
+            y_class = np.argmax(y_pred, axis=1)
+            y_class[y_class >= len(classes)] = 0  # Classe par défaut
+            labels = classes[y_class]
+            confidences = np.max(y_pred, axis=1).astype(float)
+            risks = [calculate_risk_level(label, confidence) for label, confidence in zip(labels, confidences)]
+            return labels.tolist(), confidences.tolist(), risks
+        except Exception as e:
+            logging.error("Erreur lors de la classification ML du chunk: %s", e)
+    
+    results = [classify_flow_rule_based(dict(zip(EXPECTED_FEATURES, map(float, row)))) for row in feature_values]
+    return ([r['prediction'] for r in results], [r['confidence'] for r in results],
+            [r['risk'] for r in results])
+
+def decode_prediction(y_pred):
+    """Décode le vecteur de probabilités d'un flow"""
+    y_class = int(np.argmax(y_pred))
+    confidence = np.max(y_pred)
+    
+    # Vérifier que l'index est valide
+    if y_class >= len(label_encoder.classes_):
+        y_class = 0  # Classe par défaut
+    
+    # Decoder la classe
+    prediction = label_encoder.classes_[y_class]
+    
+    # Calculer le niveau de risque
+    risk = calculate_risk_level(prediction, confidence)
+    
+    return {
+        'prediction': prediction,
+        'confidence': float(confidence),
+        'risk': risk
+    }
 
 def classify_flow_rule_based(features):
     """Classification basée sur des règles simples"""
@@ -344,13 +733,28 @@ def capture_network_traffic():
     """Fonction principale pour capturer le trafic réseau"""
     global network_capture_active
     
+    # Chemin rapide: socket AF_PACKET + décodage struct (Linux, root)
+    if CAPTURE_BACKEND in ('auto', 'raw') and RAW_SOCKET_AVAILABLE:
+        try:
+            capture_raw_socket()
+            return
+        except OSError as e:
+            logging.error(f"Capture socket brute indisponible: {e}")
+            logging.info("Basculement vers la capture Scapy...")
+    
     if SCAPY_AVAILABLE:
         # Capturer avec Scapy (nécessite des privilèges administrateur)
         logging.info("Démarrage de la capture avec Scapy...")
         try:
-            sniff(prn=packet_handler, 
-                  stop_filter=lambda x: not network_capture_active,
-                  timeout=1)
+            load_scapy()
+            # Capturer par tranches d'1s pour balayer les flows expirés même sans trafic
+            while network_capture_active:
+                sniff(prn=packet_handler, 
+                      stop_filter=lambda x: not network_capture_active,
+                      timeout=1)
+                sweep_expired_flows(time.time())
+            
+            finish_capture()
         except Exception as e:
             logging.error(f"Erreur lors de la capture Scapy: {e}")
             logging.info("Basculement vers la surveillance des connexions système...")
@@ -359,6 +763,87 @@ def capture_network_traffic():
         # Fallback: surveiller les connexions système avec psutil
         monitor_system_connections()
 
+def capture_raw_socket():
+    """Capture live avec le décodeur rapide (sans dissection Scapy)"""
+    if CAPTURE_SHARDS > 1:
+        capture_raw_socket_sharded()
+        return
+    
+    logging.info("Démarrage de la capture rapide (AF_PACKET)...")
+    
+    for record in read_raw_socket(CAPTURE_INTERFACE, is_active=lambda: network_capture_active):
+        if record is None:
+            # Aucun trafic pendant 1s: balayer les flows expirés
+            sweep_expired_flows(time.time())
+            continue
+        process_raw_packet(*record)
+    
+    finish_capture()
+
+def capture_raw_socket_sharded():
+    """Capture live répartie sur CAPTURE_SHARDS processus (décodage + routage ici)"""
+    logging.info(f"Démarrage de la capture rapide (AF_PACKET) sur {CAPTURE_SHARDS} shards...")
+    
+    dispatcher = create_shard_dispatcher()
+    dispatcher.start()
+    try:
+        for record in read_raw_socket(CAPTURE_INTERFACE, is_active=lambda: network_capture_active):
+            if record is None:
+                # Aucun trafic: envoyer les lots incomplets (les workers balayent eux-mêmes)
+                dispatcher.flush()
+                continue
+            dispatch_raw_packet(dispatcher, *record)
+    finally:
+        dispatcher.stop()
+
+def create_shard_dispatcher(live=True):
+    """
+    Pipeline shardé: les résultats des workers sont émis par ce processus
+    
+    Args:
+        live: Capture live (expiration sur l'horloge murale) ou replay d'un
+            pcap (expiration sur les timestamps des paquets)
+    """
+    return ShardDispatcher(
+        CAPTURE_SHARDS,
+        shard_worker_main,
+        on_result=record_prediction,
+        batch_size=int(os.getenv('CAPTURE_SHARD_BATCH', 256)),
+        start_method=CAPTURE_SHARD_START_METHOD,
+        worker_args=(live,)
+    )
+
+def dispatch_raw_packet(dispatcher, timestamp, frame, linktype=LINKTYPE_ETHERNET):
+    """Décode une trame et la route vers le worker de son flow"""
+    try:
+        decoded = decode_frame(frame, linktype)
+        if decoded is not None:
+            real_time_stats['bytes_analyzed'] += len(frame)
+            metrics.PACKETS.inc()
+            dispatcher.dispatch(timestamp, decoded, len(frame))
+    except Exception as e:
+        metrics.PACKET_ERRORS.inc()
+        logging.error("Erreur lors du traitement du paquet: %s", e)
+
+def shard_worker_main(shard_id, in_queue, out_queue, live=True):
+    """Processus worker: table de flows, expiration et prédicteur propres au shard"""
+    global prediction_sink
+    
+    prediction_sink = out_queue.put
+    flow_data.clear()
+    flow_expiry.clear()
+    
+    def on_idle(last_timestamp):
+        # Live: horloge murale (flows inactifs sans nouveau paquet). Replay: horloge des
+        # paquets, sinon tous les flows d'un pcap ancien expireraient au premier balayage
+        now = time.time() if live else last_timestamp
+        if now is not None:
+            sweep_expired_flows(now)
+    
+    models_ready.wait()
+    logging.info(f"Worker de shard {shard_id} démarré (pid {os.getpid()})")
+    run_shard_worker(in_queue, update_flow, on_idle=on_idle, on_stop=finish_capture)
+
 def monitor_system_connections():
     """Surveille les connexions système avec psutil"""
     global network_capture_active, real_time_stats
@@ -417,12 +902,10 @@ def monitor_system_connections():
                         }
                         
                         # Envoyer via WebSocket
-                        socketio.emit('real_time_prediction', {
-                            'prediction': prediction_data,
-                            'stats': real_time_stats
-                        })
+                        emit_prediction(prediction_data)
                         
                         real_time_stats['total_processed'] += 1
+                        classification_rate.mark()
                     
                     # Sauvegarder les statistiques actuelles
                     connection_stats[interface] = {
@@ -433,12 +916,68 @@ def monitor_system_connections():
             time.sleep(5)  # Attendre 5 secondes entre chaque mesure
             
         except Exception as e:
-            logging.error(f"Erreur lors de la surveillance des connexions: {e}")
+            logging.error("Erreur lors de la surveillance des connexions: %s", e)
             time.sleep(10)
 
+PREDICT_CHUNKSIZE = int(os.getenv('PREDICT_CHUNKSIZE', 50000))
+# Résultats complets de /predict, consultables par pages via /results/<id>
+result_store = ResultStore(os.getenv('RESULTS_DIR'), int(os.getenv('RESULTS_MAX', 50)))
+
+def build_feature_matrix(df):
+    """Construit la matrice des features attendues à partir d'un chunk CSV"""
+    # Préprocessing - adapter selon vos données
+    # Supprimer les colonnes non nécessaires
+    drop_cols = ["Flow ID", "Src IP", "Dst IP", "Timestamp", "Label", "Label.1"]
+    available_drop_cols = [col for col in drop_cols if col in df.columns]
+    if available_drop_cols:
+        df_features = df.drop(columns=available_drop_cols, errors='ignore')
+    else:
+        df_features = df.copy()
+    
+    # Features attendues par le modèle
+    expected_features = EXPECTED_FEATURES
+    
+    # Si les colonnes ne correspondent pas exactement, essayer de mapper
+    available_features = [col for col in df_features.columns if col in expected_features]
+    
+    if len(available_features) == 0:
+        # Aucune correspondance exacte, utiliser les colonnes numériques disponibles
+        numeric_cols = df_features.select_dtypes(include=[np.number]).columns.tolist()
+        logging.info(f"Utilisation des colonnes numériques: {numeric_cols}")
+        
+        # Créer un mapping simple
+        feature_values = []
+        for i in range(len(expected_features)):
+            if i < len(numeric_cols):
+                feature_values.append(df_features[numeric_cols[i]].values)
+            else:
+                # Valeurs par défaut
+                feature_values.append(np.random.uniform(0, 1, len(df_features)))
+        feature_values = np.column_stack(feature_values)
+    else:
+        # Utiliser les features disponibles et compléter
+        feature_values = []
+        for feature in expected_features:
+            if feature in available_features:
+                feature_values.append(df_features[feature].values)
+            else:
+                # Valeurs par défaut basées sur le type de feature
+                if 'flag_count' in feature or 'unique_ports' in feature or 'protocol_diversity' in feature:
+                    feature_values.append(np.random.randint(0, 5, len(df_features)))
+                elif 'duration' in feature:
+                    feature_values.append(np.random.exponential(30, len(df_features)))
+                else:
+                    feature_values.append(np.random.lognormal(5, 1, len(df_features)))
+        feature_values = np.column_stack(feature_values)
+    
+    # Nettoyer les données
+    feature_values = np.nan_to_num(feature_values, nan=0.0, posinf=1e6, neginf=-1e6)
+    
+    return feature_values
+
 @app.route('/predict', methods=['POST'])
 def predict_file():
-    """Endpoint pour prédire sur un fichier CSV uploadé"""
+    """Endpoint pour prédire sur un fichier CSV uploadé (lecture par chunks, sans limite de lignes)"""
     if 'file' not in request.files:
         return jsonify({'error': 'Aucun fichier fourni'}), 400
     
@@ -449,110 +988,51 @@ def predict_file():
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Seuls les fichiers CSV sont acceptés'}), 400
     
+    import pandas as pd
+    
+    writer = None
     try:
-        # Lire le fichier CSV
-        df = pd.read_csv(file)
-        logging.info(f"Fichier chargé avec {len(df)} lignes et {len(df.columns)} colonnes")
-        
-        # Sauvegarder les statistiques initiales
-        total_samples = len(df)
-        original_columns = df.columns.tolist()
-        logging.info(f"Colonnes disponibles: {original_columns}")
-        
-        # Préprocessing - adapter selon vos données
-        # Supprimer les colonnes non nécessaires
-        drop_cols = ["Flow ID", "Src IP", "Dst IP", "Timestamp", "Label", "Label.1"]
-        available_drop_cols = [col for col in drop_cols if col in df.columns]
-        if available_drop_cols:
-            df_features = df.drop(columns=available_drop_cols, errors='ignore')
-        else:
-            df_features = df.copy()
-        
-        # Features attendues par le modèle
-        expected_features = [
-            'flow_duration', 'total_fwd_packets', 'total_backward_packets',
-            'flow_bytes_s', 'flow_packets_s', 'flow_iat_mean', 'flow_iat_std',
-            'flow_iat_max', 'flow_iat_min', 'fwd_packets_length_max',
-            'fwd_packets_length_min', 'fwd_packets_length_mean', 'fwd_packets_length_std',
-            'min_packet_length', 'max_packet_length', 'packet_length_mean',
-            'packet_length_std', 'fin_flag_count', 'syn_flag_count',
-            'rst_flag_count', 'psh_flag_count', 'ack_flag_count',
-            'average_packet_size', 'unique_ports_count', 'protocol_diversity'
-        ]
-        
-        # Si les colonnes ne correspondent pas exactement, essayer de mapper
-        available_features = [col for col in df_features.columns if col in expected_features]
-        
-        if len(available_features) == 0:
-            # Aucune correspondance exacte, utiliser les colonnes numériques disponibles
-            numeric_cols = df_features.select_dtypes(include=[np.number]).columns.tolist()
-            logging.info(f"Utilisation des colonnes numériques: {numeric_cols}")
-            
-            # Créer un mapping simple
-            feature_values = []
-            for i in range(len(expected_features)):
-                if i < len(numeric_cols):
-                    feature_values.append(df_features[numeric_cols[i]].values)
-                else:
-                    # Valeurs par défaut
-                    feature_values.append(np.random.uniform(0, 1, len(df_features)))
-            feature_values = np.column_stack(feature_values)
-        else:
-            # Utiliser les features disponibles et compléter
-            feature_values = []
-            for feature in expected_features:
-                if feature in available_features:
-                    feature_values.append(df_features[feature].values)
-                else:
-                    # Valeurs par défaut basées sur le type de feature
-                    if 'flag_count' in feature or 'unique_ports' in feature or 'protocol_diversity' in feature:
-                        feature_values.append(np.random.randint(0, 5, len(df_features)))
-                    elif 'duration' in feature:
-                        feature_values.append(np.random.exponential(30, len(df_features)))
-                    else:
-                        feature_values.append(np.random.lognormal(5, 1, len(df_features)))
-            feature_values = np.column_stack(feature_values)
-        
-        # Nettoyer les données
-        feature_values = np.nan_to_num(feature_values, nan=0.0, posinf=1e6, neginf=-1e6)
-        
+        total_samples = 0
         predictions = []
         processed_samples = 0
         high_risk_count = 0
+        summary = {}
+        writer = result_store.create(file.filename)
         
-        # Limiter le nombre d'échantillons pour éviter les timeouts
-        max_samples = min(1000, len(feature_values))
-        sample_indices = np.random.choice(len(feature_values), max_samples, replace=False) if len(feature_values) > max_samples else range(len(feature_values))
+        # Lire le fichier CSV par chunks pour borner la mémoire
+        for chunk in metrics.timed_iter(pd.read_csv(file, chunksize=PREDICT_CHUNKSIZE), metrics.CSV_PARSE_SECONDS):
+            if total_samples == 0:
+                logging.info(f"Colonnes disponibles: {chunk.columns.tolist()}")
+            
+            feature_values = build_feature_matrix(chunk)
+            
+            # Un prétraitement et un appel au modèle par chunk (colonnes du chunk pour le ResultStore)
+            labels, confidences, risks = classify_batch(feature_values)
+            flow_ids = [f"flow_{idx+1}" for idx in range(total_samples, total_samples + len(labels))]
+            
+            processed_samples += len(labels)
+            high_risk_count += risks.count('High')
+            for label in labels:
+                summary[label] = summary.get(label, 0) + 1
+            
+            # Conserver les 100 premières prédictions pour l'affichage
+            for i in range(min(len(labels), 100 - len(predictions))):
+                predictions.append({
+                    'id': total_samples + i + 1,
+                    'flow': flow_ids[i],
+                    'prediction': labels[i],
+                    'confidence': confidences[i],
+                    'risk': risks[i]
+                })
+            
+            writer.append(flow_ids, labels, confidences, risks, start=total_samples)
+            total_samples += len(chunk)
+            metrics.ROWS_SCORED.inc(len(chunk))
+            logging.info("Chunk traité: %d lignes lues", total_samples)
         
-        # Faire les prédictions
-        for idx in sample_indices:
-            try:
-                row = feature_values[idx]
-                
-                # Créer un dictionnaire de features
-                features = {name: float(row[j]) if j < len(row) else 0.0 
-                           for j, name in enumerate(expected_features)}
-                
-                # Classifier
-                result = classify_flow(features)
-                
-                prediction_data = {
-                    'id': int(idx + 1),
-                    'flow': f"flow_{idx+1}",
-                    'prediction': result['prediction'],
-                    'confidence': result['confidence'],
-                    'risk': result['risk']
-                }
-                
-                predictions.append(prediction_data)
-                processed_samples += 1
-                
-                if result['risk'] == 'High':
-                    high_risk_count += 1
-                    
-            except Exception as e:
-                logging.error(f"Erreur lors de la prédiction pour la ligne {idx}: {e}")
-                continue
+        if total_samples == 0:
+            writer.fail('Fichier vide')
+            return jsonify({'error': 'Le fichier CSV est vide'}), 400
         
         # Calculer le niveau de menace global
         threat_ratio = high_risk_count / max(processed_samples, 1)
@@ -563,15 +1043,6 @@ def predict_file():
         else:
             threat_level = 'Faible'
         
-        # Créer le résumé
-        summary = {}
-        for pred in predictions:
-            pred_type = pred['prediction']
-            summary[pred_type] = summary.get(pred_type, 0) + 1
-        
-        # Limiter à 100 prédictions pour l'affichage
-        predictions_to_return = predictions[:100]
-        
         response = {
             'status': 'success',
             'stats': {
@@ -581,30 +1052,63 @@ def predict_file():
                 'threat_level': threat_level
             },
             'summary': summary,
-            'predictions': predictions_to_return,
+            'predictions': predictions,
+            'result_id': writer.result_id,
+            'results_url': f'/results/{writer.result_id}',
             'message': f'Analyse terminée. {processed_samples} échantillons traités sur {total_samples}.'
         }
+        writer.close(response['stats'], summary)
         
-        if len(predictions) > 100:
-            response['message'] += f' Affichage des 100 premiers résultats sur {len(predictions)}.'
+        if processed_samples > 100:
+            response['message'] += (f' Affichage des 100 premiers résultats sur {processed_samples}'
+                                    f' (tous les résultats via /results/{writer.result_id}).')
         
         logging.info(f"Prédiction terminée: {processed_samples} échantillons traités")
         return jsonify(response)
         
-    except pd.errors.EmptyDataError:
+    except pd.errors.EmptyDataError as e:
+        if writer is not None:
+            writer.fail(e)
         return jsonify({'error': 'Le fichier CSV est vide'}), 400
     except pd.errors.ParserError as e:
+        if writer is not None:
+            writer.fail(e)
         return jsonify({'error': f'Erreur lors de la lecture du CSV: {str(e)}'}), 400
     except Exception as e:
         logging.error(f"Erreur lors de la prédiction: {e}")
+        # Jeu de résultats marqué en échec (sinon /results/<id> le voit incomplet pour toujours)
+        if writer is not None:
+            writer.fail(e)
         return jsonify({'error': f'Erreur lors de l\'analyse: {str(e)}'}), 500
 
+@app.route('/results/<result_id>', methods=['GET'])
+def get_results(result_id):
+    """Page de résultats filtrés d'une analyse (?offset, limit, risk, label, min_confidence, flow_id)"""
+    def list_arg(name):
+        value = request.args.get(name)
+        return [v.strip() for v in value.split(',') if v.strip()] if value else None
+    
+    page = result_store.query(
+        result_id,
+        offset=max(0, request.args.get('offset', 0, type=int)),
+        limit=min(max(1, request.args.get('limit', 100, type=int)), 1000),
+        risk=list_arg('risk'),
+        label=list_arg('label'),
+        min_confidence=request.args.get('min_confidence', type=float),
+        max_confidence=request.args.get('max_confidence', type=float),
+        flow_id=request.args.get('flow_id')
+    )
+    if page is None:
+        return jsonify({'error': 'Résultats introuvables'}), 404
+    return jsonify(page)
+
 @app.route('/model/info', methods=['GET'])
 def get_model_info():
     """Informations sur le modèle chargé"""
     try:
         info = {
             'model_loaded': model is not None,
+            'inference_engine': model.name if model is not None else None,
             'scaler_loaded': scaler is not None,
             'label_encoder_loaded': label_encoder is not None,
             'classes': label_encoder.classes_.tolist() if label_encoder is not None else [],
@@ -614,7 +1118,7 @@ def get_model_info():
         
         # Essayer de charger les infos du modèle si disponibles
         try:
-            with open("model/model/model_info.json", 'r') as f:
+            with open(os.path.join(MODEL_DIR, "model_info.json"), 'r') as f:
                 model_info = json.load(f)
                 info.update(model_info)
         except:
@@ -642,13 +1146,19 @@ def start_real_time():
         'active_connections': 0
     })
     
+    classification_rate.reset()
+    
     # Vider le buffer des flows
     flows_buffer.clear()
     flow_data.clear()
+    flow_expiry.clear()
     
     real_time_active = True
     network_capture_active = True
     
+    if history_store is not None:
+        history_store.start()
+    
     # Démarrer le thread de capture
     capture_thread = threading.Thread(target=capture_network_traffic, daemon=True)
     capture_thread.start()
@@ -673,17 +1183,111 @@ def stop_real_time():
 @app.route('/real-time/stats', methods=['GET'])
 def get_real_time_stats():
     return jsonify({
-        'stats': real_time_stats,
+        'stats': current_stats(),
         'active_flows': len(flow_data),
         'buffer_size': len(flows_buffer),
-        'scapy_available': SCAPY_AVAILABLE
+        'scapy_available': SCAPY_AVAILABLE,
+        'emitter': emitter.get_stats() if emitter is not None else None,
+        'history': history_store.get_stats() if history_store is not None else None,
+        'prediction_cache': prediction_cache.get_stats() if prediction_cache is not None else None
     })
 
+def history_filters():
+    """Filtres de /history: période [start, end[ (epoch ou ISO 8601), label, risque, confiance"""
+    def list_arg(name):
+        value = request.args.get(name)
+        return [v.strip() for v in value.split(',') if v.strip()] if value else None
+    
+    return {
+        'start': parse_time(request.args.get('start')),
+        'end': parse_time(request.args.get('end')),
+        'labels': list_arg('label'),
+        'risks': list_arg('risk'),
+        'min_confidence': request.args.get('min_confidence', type=float)
+    }
+
+@app.route('/history', methods=['GET'])
+def get_history():
+    """Flows classifiés persistés, du plus récent au plus ancien (next_cursor: page suivante)"""
+    if history_store is None:
+        return jsonify({'error': 'Historique désactivé (HISTORY_ENABLED=0)'}), 404
+    try:
+        filters = history_filters()
+        cursor = parse_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre de date ou curseur invalide: {e}'}), 400
+    
+    limit = min(max(1, request.args.get('limit', 100, type=int)), 1000)
+    return jsonify(dict(history_store.query(limit=limit, cursor=cursor, **filters), limit=limit))
+
+@app.route('/history/summary', methods=['GET'])
+def get_history_summary():
+    """Nombre de flows par label et niveau de risque sur une période"""
+    if history_store is None:
+        return jsonify({'error': 'Historique désactivé (HISTORY_ENABLED=0)'}), 404
+    try:
+        filters = history_filters()
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre de date invalide: {e}'}), 400
+    
+    return jsonify(dict(history_store.summary(**filters), store=history_store.get_stats()))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métriques du processus au format texte Prometheus"""
+    return Response(metrics.metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# Profilage à la demande: jeton X-Debug-Token si DEBUG_TOKEN est défini, sinon requêtes locales
+DEBUG_PROFILE_ENABLED = os.getenv('DEBUG_PROFILE_ENABLED', '1') == '1'
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN')
+profiler = SamplingProfiler(
+    max_seconds=float(os.getenv('DEBUG_PROFILE_MAX_SECONDS', 60)),
+    default_interval=float(os.getenv('DEBUG_PROFILE_INTERVAL', 0.01))
+)
+
+@app.route('/debug/profile', methods=['POST'])
+def run_profile():
+    """Profilage par échantillonnage de tous les threads (POST /debug/profile?seconds=30)"""
+    if not DEBUG_PROFILE_ENABLED:
+        return jsonify({'error': 'Endpoints de debug désactivés'}), 404
+    if DEBUG_TOKEN:
+        authorized = hmac.compare_digest(request.headers.get('X-Debug-Token', ''), DEBUG_TOKEN)
+    else:
+        authorized = request.remote_addr in ('127.0.0.1', '::1')
+    if not authorized:
+        return jsonify({'error': 'Accès refusé'}), 403
+    
+    interval_ms = request.args.get('interval_ms', type=float)
+    try:
+        result = profiler.profile(
+            request.args.get('seconds', 10, type=float),
+            interval=interval_ms / 1000 if interval_ms else None,
+            include_idle=request.args.get('idle', '0') == '1',
+            top=min(max(1, request.args.get('top', 30, type=int)), 500)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+    
+    if request.args.get('format') == 'collapsed':
+        return Response(result['collapsed'], mimetype='text/plain', headers={
+            'Content-Disposition': f"attachment; filename=profile-{result['pid']}.collapsed"
+        })
+    return jsonify(result)
+
+@app.route('/ping', methods=['GET'])
+def ping():
+    return jsonify({'status': 'pong'})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "OK",
+        "ready": models_ready.is_set(),
         "model_loaded": model is not None,
+        "inference_engine": model.name if model is not None else None,
+        "startup": startup_timer.report(),
         "scaler_loaded": scaler is not None,
         "label_encoder_loaded": label_encoder is not None,
         "scapy_available": SCAPY_AVAILABLE,
@@ -694,16 +1298,83 @@ def health_check():
 def handle_connect():
     emit('connection_status', {
         'real_time_active': real_time_active,
-        'stats': real_time_stats,
+        'stats': current_stats(),
         'scapy_available': SCAPY_AVAILABLE
     })
+    if emitter is not None:
+        emitter.add_client(request.sid)
+        emitter.start()
     logging.info(f"Client connecté: {request.sid}")
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    if emitter is not None:
+        emitter.remove_client(request.sid)
     logging.info(f"Client déconnecté: {request.sid}")
 
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Abonnement filtré: {min_risk, labels, flow_id, subnet, sample_rate} (champs optionnels)"""
+    if emitter is None:
+        emit('subscription_error', {'error': 'Abonnements indisponibles (SOCKET_EMIT_INTERVAL=0)'})
+        return
+    try:
+        subscription = Subscription.from_request(data or {})
+    except ValueError as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    emitter.subscribe(request.sid, subscription)
+    logging.info(f"Abonnement {request.sid}: {subscription.to_dict()}")
+    emit('subscribed', subscription.to_dict())
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe():
+    if emitter is not None:
+        emitter.subscribe(request.sid, None)
+    emit('subscribed', None)
+
+def replay_capture(path, realtime=False, speed=1.0):
+    """Rejoue un pcap/pcapng dans le pipeline flows -> classification (hors serveur)"""
+    models_ready.wait()
+    flows_buffer.clear()
+    if history_store is not None:
+        history_store.start()
+    flow_data.clear()
+    flow_expiry.clear()
+    
+    if CAPTURE_SHARDS > 1:
+        # Les workers terminent leurs flows à l'arrêt du dispatcher
+        dispatcher = create_shard_dispatcher(live=False)
+        dispatcher.start()
+        handler = lambda *record: dispatch_raw_packet(dispatcher, *record)
+        complete = dispatcher.stop
+    else:
+        handler = process_raw_packet
+        # Terminer les flows restants puis publier les dernières inférences
+        complete = finish_capture
+    
+    replay = PcapReplay(
+        handler,
+        realtime=realtime,
+        speed=speed,
+        flow_counter=lambda: real_time_stats['flows_analyzed']
+    )
+    return replay.run(path, on_complete=complete)
+
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Classificateur de trafic réseau en temps réel")
+    parser.add_argument('--replay', metavar='PCAP', help="Rejouer un fichier pcap/pcapng au lieu de démarrer le serveur")
+    parser.add_argument('--realtime', action='store_true', help="Respecter le timing original du pcap")
+    parser.add_argument('--speed', type=float, default=1.0, help="Facteur d'accélération en mode --realtime")
+    args = parser.parse_args()
+    
+    if args.replay:
+        report = replay_capture(args.replay, realtime=args.realtime, speed=args.speed)
+        print(json.dumps(report, indent=2))
+        raise SystemExit(0)
+    
     print("=" * 60)
     print("CLASSIFICATEUR DE TRAFIC RÉSEAU EN TEMPS RÉEL")
     print("=" * 60)
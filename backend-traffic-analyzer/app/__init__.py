@@ -1,3 +1,5 @@
+from app.startup import startup_timer
+from app.logs import configure_logging
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_socketio import SocketIO
@@ -5,6 +7,8 @@ import logging
 import os
 import sys
 
+startup_timer.mark('imports')
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,23 +25,107 @@ def create_app():
     Factory pour créer l'application Flask
     Utilise les modèles générés par stage.py
     """
+    startup_timer.mark()
     app = Flask(__name__)
     
     # ==================== Configuration ====================
+    # Logs: écriture asynchrone (file bornée), format text | json, limitation par message
+    app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
+    app.config['LOG_FORMAT'] = os.getenv('LOG_FORMAT', 'text')
+    app.config['LOG_ASYNC'] = os.getenv('LOG_ASYNC', '1') == '1'
+    app.config['LOG_FILE'] = os.getenv('LOG_FILE')
+    app.config['LOG_RATE_LIMIT'] = int(os.getenv('LOG_RATE_LIMIT', 20))  # par message et par période, 0 = illimité
+    app.config['LOG_RATE_PERIOD'] = float(os.getenv('LOG_RATE_PERIOD', 10))
+    app.config['LOG_QUEUE_SIZE'] = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    # Logs internes Socket.IO / Engine.IO (une ligne par paquet émis: coûteux sous charge)
+    app.config['SOCKETIO_LOGGER'] = os.getenv('SOCKETIO_LOGGER', '0') == '1'
+    app.config['ENGINEIO_LOGGER'] = os.getenv('ENGINEIO_LOGGER', '0') == '1'
+    
+    configure_logging(
+        level=app.config['LOG_LEVEL'],
+        fmt=app.config['LOG_FORMAT'],
+        async_logging=app.config['LOG_ASYNC'],
+        log_file=app.config['LOG_FILE'],
+        rate_limit=app.config['LOG_RATE_LIMIT'],
+        rate_period=app.config['LOG_RATE_PERIOD'],
+        queue_size=app.config['LOG_QUEUE_SIZE']
+    )
+    
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max pour uploads (augmenté)
+    # Taille max des uploads (50MB par défaut, configurable pour les gros exports)
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 50)) * 1024 * 1024
     
-    # Chemins des modèles générés par stage.py
-    model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'model')
+    # Chemins des modèles générés par stage.py (MODEL_DIR, défaut: model/model)
+    from app.models.engine import model_dir as default_model_dir
+    model_dir = default_model_dir()
     app.config['MODEL_PATH'] = os.path.join(model_dir, 'traffic_classifier_model.h5')
     app.config['SCALER_PATH'] = os.path.join(model_dir, 'scaler.pkl')
     app.config['ENCODER_PATH'] = os.path.join(model_dir, 'label_encoder.pkl')
     
+    # Moteur d'inférence: auto | numpy | onnx | keras (poids exportés par export_model.py)
+    app.config['INFERENCE_ENGINE'] = os.getenv('INFERENCE_ENGINE', 'auto')
+    app.config['WEIGHTS_PATH'] = os.getenv('MODEL_WEIGHTS_PATH', os.path.join(model_dir, 'traffic_classifier_weights.npz'))
+    app.config['ONNX_PATH'] = os.getenv('MODEL_ONNX_PATH', os.path.join(model_dir, 'traffic_classifier_model.onnx'))
+    # Poids NumPy mappés en mémoire: une seule copie partagée par tous les workers
+    app.config['MODEL_MMAP'] = os.getenv('MODEL_MMAP', '1') == '1'
+    
     logger.info(f"📂 Répertoire des modèles: {model_dir}")
     
     # Configuration temps réel
     app.config['REALTIME_INTERVAL'] = 1.0  # secondes entre prédictions
     
+    # Prédiction CSV en streaming (lecture par chunks, mémoire bornée)
+    app.config['PREDICT_STREAMING'] = os.getenv('PREDICT_STREAMING', '1') == '1'
+    app.config['PREDICT_CHUNKSIZE'] = int(os.getenv('PREDICT_CHUNKSIZE', 50000))
+    # Lecteur CSV: auto (pyarrow si installé) | pyarrow | c
+    app.config['CSV_ENGINE'] = os.getenv('CSV_ENGINE', 'auto')
+    
+    # Jobs de scoring asynchrones (POST /jobs)
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+    app.config['JOB_UPLOAD_DIR'] = os.getenv('JOB_UPLOAD_DIR')  # défaut: répertoire temporaire
+    
+    # Résultats complets consultables par pages (GET /results/<id>)
+    app.config['RESULTS_DIR'] = os.getenv('RESULTS_DIR')  # défaut: répertoire temporaire
+    app.config['RESULTS_MAX'] = int(os.getenv('RESULTS_MAX', 50))
+    
+    # Micro-batching de l'inférence (lignes par lot / délai max en secondes)
+    app.config['INFERENCE_BATCH_SIZE'] = int(os.getenv('INFERENCE_BATCH_SIZE', 256))
+    app.config['INFERENCE_BATCH_DELAY'] = float(os.getenv('INFERENCE_BATCH_DELAY', 0.005))
+    
+    # Émission temps réel groupée (trames 'real_time_batch'); 0 = un événement par prédiction
+    app.config['SOCKET_EMIT_INTERVAL'] = float(os.getenv('SOCKET_EMIT_INTERVAL', 0.25))
+    app.config['SOCKET_MAX_BATCH'] = int(os.getenv('SOCKET_MAX_BATCH', 200))
+    app.config['SOCKET_CLIENT_QUEUE'] = int(os.getenv('SOCKET_CLIENT_QUEUE', 8))
+    app.config['SOCKET_SEND_FEATURES'] = os.getenv('SOCKET_SEND_FEATURES', '0') == '1'
+    
+    # Cache des prédictions temps réel: entrées max (0 = désactivé), durée de vie (s),
+    # pas de quantification des features normalisées
+    app.config['PREDICTION_CACHE_SIZE'] = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+    app.config['PREDICTION_CACHE_TTL'] = float(os.getenv('PREDICTION_CACHE_TTL', 300))
+    app.config['PREDICTION_CACHE_PRECISION'] = float(os.getenv('PREDICTION_CACHE_PRECISION', 1e-3))
+    
+    # Historique persistant des flows classifiés (SQLite WAL, écritures par lots)
+    app.config['HISTORY_ENABLED'] = os.getenv('HISTORY_ENABLED', '1') == '1'
+    app.config['HISTORY_PATH'] = os.getenv('HISTORY_PATH')  # défaut: répertoire temporaire
+    app.config['HISTORY_RETENTION_HOURS'] = float(os.getenv('HISTORY_RETENTION_HOURS', 168))  # 0 = illimité
+    app.config['HISTORY_MAX_ROWS'] = int(os.getenv('HISTORY_MAX_ROWS', 5000000))  # 0 = illimité
+    app.config['HISTORY_BATCH_SIZE'] = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+    app.config['HISTORY_FLUSH_INTERVAL'] = float(os.getenv('HISTORY_FLUSH_INTERVAL', 1.0))
+    app.config['HISTORY_MAX_PENDING'] = int(os.getenv('HISTORY_MAX_PENDING', 50000))
+    app.config['HISTORY_FEATURES'] = [f.strip() for f in os.getenv('HISTORY_FEATURES', '').split(',') if f.strip()]
+    
+    # Profilage à la demande (POST /debug/profile): jeton X-Debug-Token si DEBUG_TOKEN est
+    # défini, sinon requêtes locales uniquement
+    app.config['DEBUG_PROFILE_ENABLED'] = os.getenv('DEBUG_PROFILE_ENABLED', '1') == '1'
+    app.config['DEBUG_TOKEN'] = os.getenv('DEBUG_TOKEN')
+    app.config['DEBUG_PROFILE_MAX_SECONDS'] = float(os.getenv('DEBUG_PROFILE_MAX_SECONDS', 60))
+    app.config['DEBUG_PROFILE_INTERVAL'] = float(os.getenv('DEBUG_PROFILE_INTERVAL', 0.01))
+    
+    # Chargement des modèles en arrière-plan: le serveur répond tout de suite (/ping, /health)
+    app.config['LAZY_MODEL_LOAD'] = os.getenv('LAZY_MODEL_LOAD', '1') == '1'
+    
+    startup_timer.mark('config')
+    
     # ==================== Extensions ====================
     # CORS - Permettre les requêtes depuis le frontend
     CORS(app, 
@@ -58,8 +146,8 @@ def create_app():
             app,
             cors_allowed_origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000"],
             async_mode='threading',  # Changé de 'eventlet' à 'threading' pour compatibilité
-            logger=True,
-            engineio_logger=True,
+            logger=app.config['SOCKETIO_LOGGER'],
+            engineio_logger=app.config['ENGINEIO_LOGGER'],
             ping_timeout=60,
             ping_interval=25
         )
@@ -68,26 +156,36 @@ def create_app():
         logger.error(f"❌ Erreur Socket.IO: {e}")
         # Continuer même si Socket.IO échoue
     
+    startup_timer.mark('extensions')
+    
     # ==================== Blueprints (Routes) ====================
     try:
-        from app.routes import health, prediction, realtime
+        from app.routes import health, prediction, realtime, jobs, results, metrics, debug, history
         
         app.register_blueprint(health.bp)
         app.register_blueprint(prediction.bp)
         app.register_blueprint(realtime.bp)
+        app.register_blueprint(jobs.bp)
+        app.register_blueprint(results.bp)
+        app.register_blueprint(metrics.bp)
+        app.register_blueprint(debug.bp)
+        app.register_blueprint(history.bp)
         
         logger.info("✅ Routes enregistrées")
     except Exception as e:
         logger.error(f"❌ Erreur enregistrement routes: {e}")
         raise
     
+    startup_timer.mark('blueprints')
+    
     # ==================== Initialisation Modèles ====================
     with app.app_context():
         from app.services import prediction_service
         
         try:
             # Vérifier que les modèles existent
-            model_exists = os.path.exists(app.config['MODEL_PATH'])
+            model_exists = any(os.path.exists(app.config[key])
+                               for key in ('MODEL_PATH', 'WEIGHTS_PATH', 'ONNX_PATH'))
             scaler_exists = os.path.exists(app.config['SCALER_PATH'])
             encoder_exists = os.path.exists(app.config['ENCODER_PATH'])
             
@@ -99,21 +197,40 @@ def create_app():
             if not (model_exists and scaler_exists and encoder_exists):
                 logger.error("❌ Modèles introuvables. Exécutez d'abord stage.py !")
                 logger.error(f"   Répertoire attendu: {model_dir}")
-                logger.error("   SOLUTION: cd backend-traffic-analyzer && python stage.py")
-                # Ne pas crash, juste logger l'erreur
+                logger.error("   SOLUTION: cd backend-traffic-analyzer/model && python stage.py")
+                # Ne pas crash: /health rapporte l'échec (serveur UP, model_loaded: false)
+                prediction_service.mark_failed(f"Modèles introuvables dans {model_dir}")
             else:
-                # Charger les modèles
-                prediction_service.initialize(
+                # Charger les modèles (en arrière-plan si LAZY_MODEL_LOAD)
+                load = (prediction_service.initialize_async if app.config['LAZY_MODEL_LOAD']
+                        else prediction_service.initialize)
+                load(
                     app.config['MODEL_PATH'],
                     app.config['SCALER_PATH'],
-                    app.config['ENCODER_PATH']
+                    app.config['ENCODER_PATH'],
+                    batch_size=app.config['INFERENCE_BATCH_SIZE'],
+                    batch_delay=app.config['INFERENCE_BATCH_DELAY'],
+                    engine=app.config['INFERENCE_ENGINE'],
+                    weights_path=app.config['WEIGHTS_PATH'],
+                    onnx_path=app.config['ONNX_PATH'],
+                    mmap=app.config['MODEL_MMAP'],
+                    csv_engine=app.config['CSV_ENGINE'],
+                    cache_size=app.config['PREDICTION_CACHE_SIZE'],
+                    cache_ttl=app.config['PREDICTION_CACHE_TTL'],
+                    cache_precision=app.config['PREDICTION_CACHE_PRECISION']
                 )
-                logger.info("✅ Modèles de stage.py chargés avec succès")
+                if app.config['LAZY_MODEL_LOAD']:
+                    logger.info("⏳ Chargement des modèles de stage.py en arrière-plan")
+                else:
+                    logger.info("✅ Modèles de stage.py chargés avec succès")
                 
         except Exception as e:
             logger.error(f"❌ Erreur chargement modèles: {e}")
             logger.error("   Le backend démarrera SANS les modèles ML")
-            logger.error("   SOLUTION: cd backend-traffic-analyzer && python stage.py")
+            logger.error("   SOLUTION: cd backend-traffic-analyzer/model && python stage.py")
+            prediction_service.mark_failed(e)
+    
+    startup_timer.mark('models')
     
     # ==================== Socket.IO Events ====================
     try:
@@ -122,6 +239,8 @@ def create_app():
     except Exception as e:
         logger.error(f"❌ Erreur chargement socket events: {e}")
     
+    startup_timer.mark('socket_events')
+    
     # ==================== Gestionnaire d'erreurs ====================
     @app.errorhandler(404)
     def not_found(e):
@@ -147,10 +266,17 @@ def create_app():
             'endpoints': {
                 'health': '/health',
                 'predict': '/predict',
-                'realtime': '/real-time/*'
+                'jobs': '/jobs',
+                'results': '/results/<id>',
+                'realtime': '/real-time/*',
+                'history': '/history',
+                'metrics': '/metrics',
+                'profile': '/debug/profile'
             }
         })
     
+    startup_timer.mark('handlers')
     logger.info("✅ Application Flask créée avec succès")
+    startup_timer.log()
     
     return app
\ No newline at end of file
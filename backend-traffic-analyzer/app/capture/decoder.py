@@ -0,0 +1,102 @@
+import socket
+import struct
+
+# Types de lien (pcap LINKTYPE_*)
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_VLAN = (0x8100, 0x88A8)
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+# En-têtes d'extension IPv6 parcourus pour atteindre TCP/UDP
+IPV6_EXT_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT = 44
+
+_unpack_u16 = struct.Struct('!H').unpack_from
+_unpack_ports = struct.Struct('!HH').unpack_from
+
+
+def decode_frame(buf, linktype=LINKTYPE_ETHERNET):
+    """
+    Décode les en-têtes utiles d'une trame brute, sans dissection Scapy
+
+    Seuls Ethernet (avec VLAN), Linux SLL, IPv4/IPv6 et TCP/UDP sont lus,
+    avec struct sur un buffer (bytes / memoryview), sans objet par couche.
+
+    Args:
+        buf: Trame brute
+        linktype: Type de lien pcap (Ethernet par défaut)
+
+    Returns:
+        (src_ip, dst_ip, protocol, src_port, dst_port, tcp_flags) ou None
+        si la trame n'est pas IP. Les adresses sont des bytes (4 ou 16
+        octets), voir format_ip pour l'affichage.
+    """
+    try:
+        if linktype == LINKTYPE_ETHERNET:
+            ethertype = _unpack_u16(buf, 12)[0]
+            offset = 14
+            while ethertype in ETH_P_VLAN:
+                ethertype = _unpack_u16(buf, offset + 2)[0]
+                offset += 4
+        elif linktype == LINKTYPE_LINUX_SLL:
+            ethertype = _unpack_u16(buf, 14)[0]
+            offset = 16
+        elif linktype == LINKTYPE_RAW:
+            version = buf[0] >> 4
+            ethertype = ETH_P_IP if version == 4 else ETH_P_IPV6 if version == 6 else 0
+            offset = 0
+        else:
+            return None
+
+        if ethertype == ETH_P_IP:
+            ihl = (buf[offset] & 0x0F) * 4
+            protocol = buf[offset + 9]
+            src_ip = bytes(buf[offset + 12:offset + 16])
+            dst_ip = bytes(buf[offset + 16:offset + 20])
+            fragment_offset = _unpack_u16(buf, offset + 6)[0] & 0x1FFF
+            if fragment_offset:
+                return src_ip, dst_ip, protocol, 0, 0, 0  # Pas d'en-tête L4
+            l4 = offset + ihl
+
+        elif ethertype == ETH_P_IPV6:
+            protocol = buf[offset + 6]
+            src_ip = bytes(buf[offset + 8:offset + 24])
+            dst_ip = bytes(buf[offset + 24:offset + 40])
+            l4 = offset + 40
+            while protocol in IPV6_EXT_HEADERS:
+                protocol = buf[l4]
+                l4 += (buf[l4 + 1] + 1) * 8
+            if protocol == IPV6_FRAGMENT:
+                protocol = buf[l4]
+                if _unpack_u16(buf, l4 + 2)[0] & 0xFFF8:
+                    return src_ip, dst_ip, protocol, 0, 0, 0
+                l4 += 8
+
+        else:
+            return None
+
+        if protocol == IPPROTO_TCP:
+            src_port, dst_port = _unpack_ports(buf, l4)
+            return src_ip, dst_ip, protocol, src_port, dst_port, buf[l4 + 13]
+        if protocol == IPPROTO_UDP:
+            src_port, dst_port = _unpack_ports(buf, l4)
+            return src_ip, dst_ip, protocol, src_port, dst_port, 0
+
+        return src_ip, dst_ip, protocol, 0, 0, 0
+
+    except (IndexError, struct.error):
+        return None  # Trame tronquée
+
+
+def format_ip(address):
+    """Adresse lisible (bytes du décodeur ou str Scapy)"""
+    if isinstance(address, bytes):
+        family = socket.AF_INET if len(address) == 4 else socket.AF_INET6
+        return socket.inet_ntop(family, address)
+    return address
@@ -0,0 +1,80 @@
+import heapq
+import logging
+from app.capture.flow_table import FLOW
+
+logger = logging.getLogger(__name__)
+
+
+class FlowExpiry:
+    """
+    Moteur d'expiration des flows (timeouts façon CICFlowMeter)
+
+    Un flow se termine quand:
+    - aucun paquet n'a été vu depuis `idle_timeout` secondes (inactivité)
+    - il dure depuis plus de `active_timeout` secondes (durée max)
+    - un RST, ou un FIN dans chaque sens, le clôt (FlowTable.update)
+
+    Les échéances sont rangées dans un tas (deadline, start_time, clé). Un
+    paquet ne touche pas au tas: à l'extraction, l'échéance réelle est
+    recalculée depuis la FlowTable et l'entrée est replanifiée si le flow a
+    eu de l'activité entre-temps.
+    """
+
+    def __init__(self, table, idle_timeout=15.0, active_timeout=120.0):
+        self.table = table
+        self.idle_timeout = float(idle_timeout)
+        self.active_timeout = float(active_timeout)
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def deadline(self, slot):
+        """Échéance courante d'un flow (inactivité ou durée max)"""
+        return min(
+            self.table.last_time[slot, FLOW] + self.idle_timeout,
+            self.table.start_time[slot] + self.active_timeout
+        )
+
+    def schedule(self, key, slot):
+        """Planifie l'expiration d'un nouveau flow"""
+        heapq.heappush(
+            self._heap,
+            (self.deadline(slot), float(self.table.start_time[slot]), key)
+        )
+
+    def expired(self, now):
+        """
+        Extrait les flows arrivés à échéance
+
+        Args:
+            now: Temps courant (secondes, même horloge que les paquets)
+
+        Returns:
+            Liste de (clé, slot) à classifier puis libérer
+        """
+        table = self.table
+        result = []
+
+        while self._heap and self._heap[0][0] <= now:
+            _, start_time, key = heapq.heappop(self._heap)
+
+            slot = table.lookup(key)
+            if slot is None or table.start_time[slot] != start_time:
+                continue  # Flow déjà terminé (FIN/RST) ou remplacé
+
+            deadline = self.deadline(slot)
+            if deadline > now:
+                heapq.heappush(self._heap, (deadline, start_time, key))
+            else:
+                result.append((key, slot))
+
+        return result
+
+    def drain(self):
+        """Retourne tous les flows encore actifs (arrêt de la capture)"""
+        self._heap.clear()
+        return list(self.table.slots.items())
+
+    def clear(self):
+        self._heap.clear()
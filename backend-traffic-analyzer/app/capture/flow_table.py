@@ -0,0 +1,255 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bits des flags TCP (valeur entière de packet[TCP].flags)
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_PSH = 0x08
+TCP_ACK = 0x10
+
+# Index des accumulateurs par sens: flow complet, forward (initiateur), backward
+FLOW = 0
+FWD = 1
+BWD = 2
+
+
+def bidirectional_key(src_ip, src_port, dst_ip, dst_port, protocol):
+    """
+    Clé canonique d'un flow bidirectionnel
+
+    Les deux extrémités sont triées pour que les deux sens d'une connexion
+    partagent la même clé. La clé est le 5-tuple trié lui-même (et non son
+    hash): deux flows distincts ne peuvent pas être fusionnés par collision.
+
+    Returns:
+        (clé 5-tuple, canonical) où canonical indique si (src, dst) est déjà
+        dans l'ordre trié; comparé à celui du premier paquet, il donne le sens
+    """
+    if (src_ip, src_port) <= (dst_ip, dst_port):
+        return (src_ip, src_port, dst_ip, dst_port, protocol), True
+    return (dst_ip, dst_port, src_ip, src_port, protocol), False
+
+
+class FlowTable:
+    """
+    Table de flows bidirectionnels en struct-of-arrays
+
+    Chaque flow occupe un slot: ses compteurs sont stockés dans des colonnes
+    NumPy préallouées (une colonne par statistique) et la clé du flow (5-tuple)
+    est associée à son slot par un dict. Aucune liste par paquet n'est
+    conservée: les tailles et inter-arrivées sont agrégées en ligne
+    (algorithme de Welford: count, mean, M2, min, max) pour le flow complet
+    et pour chaque sens (forward = initiateur, backward = répondeur), avec des
+    compteurs de flags. La mémoire est donc proportionnelle au nombre de flows
+    actifs et les statistiques d'un flow s'obtiennent en temps constant.
+    """
+
+    # Colonnes: nom -> (dtype, largeur); largeur 3 = [FLOW, FWD, BWD]
+    COLUMNS = {
+        'packets': (np.int64, 3),
+        'bytes': (np.int64, 3),
+        'last_time': (np.float64, 3),
+        'size_mean': (np.float64, 3),
+        'size_m2': (np.float64, 3),
+        'size_min': (np.float64, 3),
+        'size_max': (np.float64, 3),
+        'iat_mean': (np.float64, 3),
+        'iat_m2': (np.float64, 3),
+        'iat_min': (np.float64, 3),
+        'iat_max': (np.float64, 3),
+        'start_time': (np.float64, 1),
+        'fin_count': (np.int32, 1),
+        'syn_count': (np.int32, 1),
+        'rst_count': (np.int32, 1),
+        'psh_count': (np.int32, 1),
+        'ack_count': (np.int32, 1),
+        'fin_dirs': (np.int8, 1),        # bit FWD / BWD: FIN vu dans ce sens
+        'canonical': (np.bool_, 1),      # ordre canonique du premier paquet
+        'src_port': (np.int32, 1),
+        'dst_port': (np.int32, 1),
+        'protocol': (np.int16, 1),
+    }
+
+    def __init__(self, capacity=65536):
+        self.capacity = max(1, int(capacity))
+        self.slots = {}                           # clé -> slot
+        self.keys = [None] * self.capacity        # slot -> clé
+        self.endpoints = [None] * self.capacity   # slot -> 5-tuple de l'initiateur
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+        for name, (dtype, width) in self.COLUMNS.items():
+            shape = (self.capacity, width) if width > 1 else self.capacity
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def lookup(self, key):
+        """Retourne le slot d'un flow (None si absent)"""
+        return self.slots.get(key)
+
+    def open(self, key, now, canonical, endpoints):
+        """
+        Crée un flow à partir de son premier paquet
+
+        Args:
+            key: Clé canonique du flow (bidirectional_key)
+            now: Timestamp du premier paquet
+            canonical: Ordre canonique du premier paquet (définit le sens forward)
+            endpoints: (src_ip, src_port, dst_ip, dst_port, protocol) de l'initiateur
+
+        Returns:
+            Slot du flow
+        """
+        if not self._free:
+            self._grow()
+
+        slot = self._free.pop()
+        self.slots[key] = slot
+        self.keys[slot] = key
+        self.endpoints[slot] = endpoints
+
+        for name in self.COLUMNS:
+            getattr(self, name)[slot] = 0
+
+        self.start_time[slot] = now
+        self.last_time[slot] = now
+        self.size_min[slot] = np.inf
+        self.size_max[slot] = -np.inf
+        self.iat_min[slot] = np.inf
+        self.iat_max[slot] = -np.inf
+        self.canonical[slot] = canonical
+        self.src_port[slot] = endpoints[1]
+        self.dst_port[slot] = endpoints[3]
+        self.protocol[slot] = endpoints[4]
+
+        return slot
+
+    def update(self, slot, now, size, flags=0, canonical=True):
+        """
+        Comptabilise un paquet dans un flow
+
+        Args:
+            slot: Slot du flow (open / lookup)
+            now: Timestamp du paquet (secondes)
+            size: Taille du paquet (octets)
+            flags: Flags TCP (entier, 0 si non TCP)
+            canonical: Ordre canonique du paquet (bidirectional_key)
+
+        Returns:
+            True si le paquet termine le flow (RST, ou FIN vu dans les deux sens)
+        """
+        direction = FWD if canonical == self.canonical[slot] else BWD
+
+        self._accumulate(slot, FLOW, now, size)
+        self._accumulate(slot, direction, now, size)
+
+        if flags:
+            if flags & TCP_FIN:
+                self.fin_count[slot] += 1
+                self.fin_dirs[slot] |= direction
+            if flags & TCP_SYN:
+                self.syn_count[slot] += 1
+            if flags & TCP_RST:
+                self.rst_count[slot] += 1
+            if flags & TCP_PSH:
+                self.psh_count[slot] += 1
+            if flags & TCP_ACK:
+                self.ack_count[slot] += 1
+            return bool(flags & TCP_RST) or self.fin_dirs[slot] == (FWD | BWD)
+
+        return False
+
+    def _accumulate(self, slot, d, now, size):
+        """Mise à jour Welford des accumulateurs taille / inter-arrivée du sens d"""
+        n = int(self.packets[slot, d])
+
+        if n > 0:
+            # Inter-arrivée: une de moins que le nombre de paquets
+            iat = now - self.last_time[slot, d]
+            mean = self.iat_mean[slot, d]
+            delta = iat - mean
+            mean += delta / n
+            self.iat_mean[slot, d] = mean
+            self.iat_m2[slot, d] += delta * (iat - mean)
+            if iat < self.iat_min[slot, d]:
+                self.iat_min[slot, d] = iat
+            if iat > self.iat_max[slot, d]:
+                self.iat_max[slot, d] = iat
+
+        n += 1
+        self.packets[slot, d] = n
+        self.bytes[slot, d] += size
+        self.last_time[slot, d] = now
+
+        mean = self.size_mean[slot, d]
+        delta = size - mean
+        mean += delta / n
+        self.size_mean[slot, d] = mean
+        self.size_m2[slot, d] += delta * (size - mean)
+        if size < self.size_min[slot, d]:
+            self.size_min[slot, d] = size
+        if size > self.size_max[slot, d]:
+            self.size_max[slot, d] = size
+
+    def size_stats(self, slot, d=FLOW):
+        """(mean, std, min, max) des tailles de paquets d'un flow, en O(1)"""
+        return self._moments(int(self.packets[slot, d]), self.size_mean, self.size_m2,
+                             self.size_min, self.size_max, slot, d)
+
+    def iat_stats(self, slot, d=FLOW):
+        """(mean, std, min, max) des inter-arrivées d'un flow, en O(1)"""
+        return self._moments(int(self.packets[slot, d]) - 1, self.iat_mean, self.iat_m2,
+                             self.iat_min, self.iat_max, slot, d)
+
+    @staticmethod
+    def _moments(count, mean, m2, minimum, maximum, slot, d):
+        """Statistiques dérivées de l'accumulateur de Welford (écart-type population)"""
+        if count <= 0:
+            return 0.0, 0.0, 0.0, 0.0
+        return (
+            float(mean[slot, d]),
+            float(np.sqrt(m2[slot, d] / count)),
+            float(minimum[slot, d]),
+            float(maximum[slot, d])
+        )
+
+    def release(self, key):
+        """Supprime un flow et libère son slot"""
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.keys[slot] = None
+            self.endpoints[slot] = None
+            self._free.append(slot)
+        return slot
+
+    def clear(self):
+        """Vide la table (les colonnes restent allouées)"""
+        self.slots.clear()
+        self.keys = [None] * self.capacity
+        self.endpoints = [None] * self.capacity
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    # ==================== Allocation ====================
+    def _grow(self):
+        """Double la capacité des colonnes"""
+        old = self.capacity
+        self.capacity = old * 2
+
+        for name, (dtype, width) in self.COLUMNS.items():
+            shape = (self.capacity, width) if width > 1 else self.capacity
+            column = np.zeros(shape, dtype=dtype)
+            column[:old] = getattr(self, name)
+            setattr(self, name, column)
+
+        self.keys.extend([None] * old)
+        self.endpoints.extend([None] * old)
+        self._free.extend(range(self.capacity - 1, old - 1, -1))
+
+        logger.info(f"📈 Table de flows agrandie: {old} -> {self.capacity} slots")
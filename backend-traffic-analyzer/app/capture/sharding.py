@@ -0,0 +1,183 @@
+import time
+import queue
+import threading
+import logging
+import multiprocessing as mp
+from app.capture.flow_table import bidirectional_key
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ShardDispatcher:
+    """
+    Répartit les paquets décodés sur N processus workers
+
+    Chaque paquet est routé selon la clé bidirectionnelle de son flow: tous
+    les paquets d'un flow (dans les deux sens) arrivent donc au même worker,
+    qui possède sa propre portion de la table de flows et son propre
+    prédicteur. Les paquets sont envoyés par lots pour amortir le coût IPC;
+    les résultats reviennent par une multiprocessing.Queue partagée et sont
+    remis à `on_result` par un thread du processus web (ex: socketio.emit).
+    """
+
+    def __init__(self, num_shards, worker_target, on_result, batch_size=256,
+                 flush_interval=0.05, queue_size=1024, start_method='spawn', worker_args=()):
+        """
+        Args:
+            num_shards: Nombre de processus workers
+            worker_target: Fonction top-level (shard_id, in_queue, out_queue,
+                *worker_args) exécutée dans chaque worker (voir run_shard_worker)
+            on_result: Appelé dans le processus web pour chaque résultat
+            batch_size: Paquets par lot envoyé à un worker
+            flush_interval: Délai max (secondes) avant l'envoi d'un lot incomplet
+            queue_size: Lots en attente max par worker (au-delà: paquets perdus)
+            start_method: 'spawn' (défaut, sûr avec TensorFlow) ou 'fork'
+            worker_args: Arguments supplémentaires passés à worker_target
+        """
+        self.num_shards = max(1, int(num_shards))
+        self.worker_target = worker_target
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.worker_args = tuple(worker_args)
+
+        self._ctx = mp.get_context(start_method)
+        self._in_queues = [self._ctx.Queue(maxsize=queue_size) for _ in range(self.num_shards)]
+        self._out_queue = self._ctx.Queue()
+        self._pending = [[] for _ in range(self.num_shards)]
+        self._last_flush = time.monotonic()
+        self._processes = []
+        self._drain_thread = None
+        self._running = False
+
+        self.stats = {
+            'packets_dispatched': 0,
+            'packets_dropped': 0,
+            'results_received': 0
+        }
+
+    def start(self):
+        """Démarre les workers et le thread de collecte des résultats"""
+        self._running = True
+
+        for shard_id, in_queue in enumerate(self._in_queues):
+            process = self._ctx.Process(
+                target=self.worker_target,
+                args=(shard_id, in_queue, self._out_queue, *self.worker_args),
+                name=f'flow-shard-{shard_id}',
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+        self._drain_thread = threading.Thread(target=self._drain, name='shard-results', daemon=True)
+        self._drain_thread.start()
+
+        logger.info(f"✅ Pipeline shardé démarré ({self.num_shards} workers)")
+
+    def dispatch(self, timestamp, decoded, size):
+        """
+        Route un paquet décodé vers le worker de son flow
+
+        Args:
+            timestamp: Horodatage du paquet
+            decoded: (src_ip, dst_ip, protocol, src_port, dst_port, tcp_flags)
+            size: Taille de la trame
+        """
+        src_ip, dst_ip, protocol, src_port, dst_port, _ = decoded
+        key, _ = bidirectional_key(src_ip, src_port, dst_ip, dst_port, protocol)
+        shard = hash(key) % self.num_shards
+
+        pending = self._pending[shard]
+        pending.append((timestamp, *decoded, size))
+
+        if len(pending) >= self.batch_size:
+            self._send(shard)
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Envoie les lots incomplets"""
+        for shard in range(self.num_shards):
+            if self._pending[shard]:
+                self._send(shard)
+        self._last_flush = time.monotonic()
+
+    def stop(self, timeout=10):
+        """Vide les lots, demande aux workers de terminer leurs flows puis attend"""
+        if not self._running:
+            return
+
+        self.flush()
+        for in_queue in self._in_queues:
+            in_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=timeout)
+
+        self._running = False
+        self._out_queue.put(None)
+        if self._drain_thread:
+            self._drain_thread.join(timeout=timeout)
+
+        logger.info(
+            f"🛑 Pipeline shardé arrêté ({self.stats['packets_dispatched']} paquets, "
+            f"{self.stats['packets_dropped']} perdus)"
+        )
+
+    def _send(self, shard):
+        """Envoie le lot d'un worker sans bloquer la capture"""
+        batch = self._pending[shard]
+        self._pending[shard] = []
+        try:
+            self._in_queues[shard].put_nowait(batch)
+            self.stats['packets_dispatched'] += len(batch)
+        except queue.Full:
+            self.stats['packets_dropped'] += len(batch)
+            metrics.PACKETS_DROPPED.inc(len(batch))
+
+    def _drain(self):
+        """Thread du processus web: remet les résultats des workers"""
+        while True:
+            result = self._out_queue.get()
+            if result is None:
+                break
+            self.stats['results_received'] += 1
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.error("❌ Erreur traitement résultat shard: %s", e)
+
+
+def run_shard_worker(in_queue, handle_record, on_idle=None, on_stop=None, idle_timeout=1.0):
+    """
+    Boucle d'un processus worker
+
+    Args:
+        in_queue: Queue des lots de paquets (None = arrêt)
+        handle_record: Appelé pour chaque paquet (timestamp, src_ip, dst_ip,
+            protocol, src_port, dst_port, tcp_flags, size)
+        on_idle: Appelé quand aucun lot n'arrive pendant idle_timeout, avec le
+            timestamp du dernier paquet reçu (None si aucun)
+        on_stop: Appelé avant de quitter (ex: terminer les flows actifs)
+    """
+    last_timestamp = None
+
+    while True:
+        try:
+            batch = in_queue.get(timeout=idle_timeout)
+        except queue.Empty:
+            if on_idle:
+                on_idle(last_timestamp)
+            continue
+
+        if batch is None:
+            break
+
+        for record in batch:
+            handle_record(*record)
+        if batch:
+            last_timestamp = batch[-1][0]
+
+    if on_stop:
+        on_stop()
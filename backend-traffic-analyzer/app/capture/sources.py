@@ -0,0 +1,157 @@
+import socket
+import struct
+import time
+import logging
+from app.capture.decoder import LINKTYPE_ETHERNET
+
+logger = logging.getLogger(__name__)
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER = 0x1A2B3C4D
+PCAPNG_IDB = 0x00000001
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+
+ETH_P_ALL = 0x0003
+
+RAW_SOCKET_AVAILABLE = hasattr(socket, 'AF_PACKET')
+
+
+def read_pcap_raw(path):
+    """
+    Lit un fichier pcap ou pcapng sans Scapy
+
+    Yields:
+        (timestamp, trame brute, linktype)
+    """
+    with open(path, 'rb') as f:
+        head = f.read(4)
+        if len(head) < 4:
+            return
+        f.seek(0)
+
+        if struct.unpack('<I', head)[0] == PCAPNG_SHB:
+            yield from _read_pcapng(f)
+        else:
+            yield from _read_pcap(f)
+
+
+def _read_pcap(f):
+    """Format pcap classique (µs ou ns, little/big endian)"""
+    header = f.read(24)
+    magic = struct.unpack('<I', header[:4])[0]
+
+    if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        endian = '<'
+    else:
+        magic = struct.unpack('>I', header[:4])[0]
+        if magic not in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            raise ValueError("Fichier pcap invalide (magic inconnu)")
+        endian = '>'
+
+    resolution = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+    linktype = struct.unpack(endian + 'I', header[20:24])[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + 'IIII')
+
+    while True:
+        rec = f.read(16)
+        if len(rec) < 16:
+            return
+        ts_sec, ts_frac, incl_len, _ = record.unpack(rec)
+        data = f.read(incl_len)
+        if len(data) < incl_len:
+            return
+        yield ts_sec + ts_frac * resolution, data, linktype
+
+
+def _read_pcapng(f):
+    """Format pcapng (blocs SHB / IDB / EPB / SPB)"""
+    endian = '<'
+    interfaces = []  # (linktype, résolution) par interface
+    last_ts = 0.0
+
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+
+        block_type = struct.unpack(endian + 'I', head[:4])[0]
+        if block_type == PCAPNG_SHB:
+            # L'ordre des octets est donné par le byte-order magic de chaque section
+            body_start = f.read(4)
+            endian = '<' if struct.unpack('<I', body_start)[0] == PCAPNG_BYTE_ORDER else '>'
+            block_len = struct.unpack(endian + 'I', head[4:8])[0]
+            f.read(block_len - 12)
+            interfaces = []
+            continue
+
+        block_len = struct.unpack(endian + 'I', head[4:8])[0]
+        body = f.read(block_len - 8)
+        if len(body) < block_len - 8:
+            return
+        body = body[:-4]  # longueur de fin de bloc
+
+        if block_type == PCAPNG_IDB:
+            linktype = struct.unpack(endian + 'H', body[:2])[0]
+            interfaces.append((linktype, _pcapng_tsresol(body[8:], endian)))
+
+        elif block_type == PCAPNG_EPB:
+            iface, ts_high, ts_low, cap_len, _ = struct.unpack(endian + 'IIIII', body[:20])
+            linktype, resolution = interfaces[iface] if iface < len(interfaces) else (LINKTYPE_ETHERNET, 1e-6)
+            last_ts = ((ts_high << 32) | ts_low) * resolution
+            yield last_ts, body[20:20 + cap_len], linktype
+
+        elif block_type == PCAPNG_SPB:
+            linktype = interfaces[0][0] if interfaces else LINKTYPE_ETHERNET
+            orig_len = struct.unpack(endian + 'I', body[:4])[0]
+            yield last_ts, body[4:4 + orig_len], linktype
+
+
+def _pcapng_tsresol(options, endian):
+    """Résolution des timestamps d'une interface (option if_tsresol, défaut µs)"""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack(endian + 'HH', options[offset:offset + 4])
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = options[offset + 4]
+            return 2 ** -(value & 0x7F) if value & 0x80 else 10 ** -value
+        offset += 4 + ((length + 3) & ~3)
+    return 1e-6
+
+
+def read_raw_socket(interface=None, is_active=lambda: True, bufsize=65535):
+    """
+    Capture live via socket AF_PACKET (Linux, nécessite root / CAP_NET_RAW)
+
+    Le même buffer est réutilisé pour chaque trame: le consommateur doit
+    décoder la trame avant de demander la suivante.
+
+    Yields:
+        (timestamp, memoryview de la trame, LINKTYPE_ETHERNET), ou None
+        après une seconde sans trafic
+    """
+    if not RAW_SOCKET_AVAILABLE:
+        raise OSError("AF_PACKET indisponible sur cette plateforme")
+
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.ntohs(ETH_P_ALL))
+    try:
+        if interface:
+            sock.bind((interface, 0))
+        sock.settimeout(1.0)  # Permet de vérifier is_active régulièrement
+
+        buffer = bytearray(bufsize)
+        view = memoryview(buffer)
+
+        while is_active():
+            try:
+                n = sock.recv_into(buffer)
+            except socket.timeout:
+                yield None  # Aucun paquet: rendre la main (balayage des flows)
+                continue
+            yield time.time(), view[:n], LINKTYPE_ETHERNET
+    finally:
+        sock.close()
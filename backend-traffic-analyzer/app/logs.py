@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import weakref
+import threading
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+from app.metrics import metrics
+
+# Format texte historique des logs de l'application
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributs standard d'un LogRecord (le reste = champs structurés passés via extra=)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed'}
+
+LOG_RECORDS_DROPPED = metrics.counter(
+    'traffic_log_records_dropped_total', "Logs perdus (file de logs asynchrone pleine)")
+LOG_RECORDS_SUPPRESSED = metrics.counter(
+    'traffic_log_records_suppressed_total', "Logs supprimés par la limitation de débit")
+
+
+# ==================== Formats ====================
+class TextFormatter(logging.Formatter):
+    """Format texte historique, avec le nombre de messages similaires supprimés"""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" (+{suppressed} messages similaires supprimés)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Un objet JSON par ligne: ts, level, logger, message, thread, champs
+    passés via extra= (ex: logger.info("Flow analysé", extra={'flow_id': ...}))
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ==================== Limitation de débit ====================
+class RateLimitFilter(logging.Filter):
+    """
+    Limite chaque message à `burst` occurrences par période de `period` s
+
+    La clé d'un message est (logger, ligne, gabarit): avec le formatage
+    paresseux (logger.error("Erreur paquet: %s", e)) toutes les erreurs
+    d'une même ligne de code partagent la clé, quel que soit l'argument.
+    Les occurrences supprimées sont comptées et signalées sur le premier
+    message accepté de la période suivante (champ `suppressed`).
+    """
+
+    def __init__(self, burst=20, period=10.0):
+        super().__init__()
+        self.burst = int(burst)
+        self.period = float(period)
+        self._windows = {}  # clé -> [début de période, acceptés, supprimés]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # Décision unique par log, même s'il traverse plusieurs handlers
+        allowed = getattr(record, '_rate_allowed', None)
+        if allowed is None:
+            allowed = record._rate_allowed = self._allow(record)
+        return allowed
+
+    def _allow(self, record):
+        key = (record.name, record.lineno, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= 10000:
+                    self._windows.clear()  # clés éphémères (messages f-string): borner la mémoire
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+
+        LOG_RECORDS_SUPPRESSED.inc()
+        return False
+
+
+# ==================== File asynchrone ====================
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler non bloquant, sans formatage dans le thread appelant
+
+    Le message est formaté par le thread du QueueListener (formatage
+    paresseux); si la file est pleine, le log est perdu et compté plutôt
+    que de bloquer le thread de capture.
+    """
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class LogPipeline:
+    """Handlers de sortie (console, fichier) derrière une file et un thread d'écriture"""
+
+    def __init__(self, handlers, queue_size=10000, rate_filter=None):
+        self.handlers = handlers
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.handler = AsyncQueueHandler(self.queue)
+        if rate_filter is not None:
+            self.handler.addFilter(rate_filter)
+        self.listener = None
+
+        # Le thread d'écriture ne survit pas à fork() (workers gunicorn préchargés)
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def start(self):
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Écrit les logs en attente puis arrête le thread d'écriture"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _after_fork(self):
+        if self.listener is not None:
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.handler.queue = self.queue
+            self.start()
+
+
+# ==================== Configuration ====================
+_pipeline = None
+
+
+def configure_logging(level='INFO', fmt='text', async_logging=True, log_file=None,
+                      rate_limit=20, rate_period=10.0, queue_size=10000, text_format=TEXT_FORMAT):
+    """
+    Configure le logger racine (remplace la configuration de basicConfig)
+
+    Args:
+        level: Niveau minimal (DEBUG, INFO, WARNING...)
+        fmt: 'text' (format historique) ou 'json' (un objet par ligne)
+        async_logging: Écriture par un thread dédié (file bornée, jamais bloquante)
+        log_file: Fichier de logs en plus de la console (optionnel)
+        rate_limit: Occurrences max d'un même message par période (0: illimité)
+        rate_period: Durée de la période de limitation (secondes)
+        queue_size: Logs en attente max avant perte (mode asynchrone)
+        text_format: Format des lignes en mode texte
+    """
+    global _pipeline
+
+    formatter = JsonFormatter() if fmt == 'json' else TextFormatter(text_format)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    rate_filter = RateLimitFilter(rate_limit, rate_period) if rate_limit > 0 else None
+
+    root = logging.getLogger()
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    if async_logging:
+        _pipeline = LogPipeline(handlers, queue_size, rate_filter)
+        _pipeline.start()
+        root.addHandler(_pipeline.handler)
+    else:
+        for handler in handlers:
+            if rate_filter is not None:
+                handler.addFilter(rate_filter)
+            root.addHandler(handler)
+
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+
+def shutdown_logging():
+    """Vide la file de logs asynchrone (arrêt du processus)"""
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,417 @@
+import time
+import threading
+import logging
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Type MIME de l'exposition texte Prometheus
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bornes des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bornes des histogrammes de taille de lot (lignes)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+
+# ==================== Valeurs ====================
+class _Value:
+    """Valeur d'un compteur / jauge pour une combinaison de labels"""
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _Buckets:
+    """Observations d'un histogramme pour une combinaison de labels"""
+
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # non cumulés, dernier = +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        """Chronomètre un bloc `with` (durée observée en secondes)"""
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Timer:
+    __slots__ = ('target', 'start')
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.target.observe(time.perf_counter() - self.start)
+
+
+# ==================== Métriques ====================
+class Metric:
+    """
+    Métrique nommée, éventuellement déclinée par labels
+
+    Les appels sans label (metric.inc(), metric.observe()) portent sur la
+    série par défaut; metric.labels('numpy') retourne la série d'une
+    combinaison de labels (à conserver par l'appelant sur les chemins chauds).
+    Une métrique peut aussi être calculée à la lecture (`function`):
+    la fonction retourne une valeur, ou un dict {valeur(s) de label: valeur}.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._series = {}
+        self._lock = threading.Lock()
+        self._default = self._new_series() if not self.labelnames else None
+
+    def labels(self, *values):
+        """Série de la combinaison de labels `values` (créée au premier appel)"""
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {key}")
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def set_function(self, function):
+        """Calcule la métrique à la lecture (remplace la fonction précédente)"""
+        self.function = function
+
+    def _new_series(self):
+        return _Value()
+
+    def collect(self):
+        """Échantillons [(suffixe, labels, valeur)] de la métrique"""
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                logger.error(f"❌ Métrique {self.name}: {e}")
+                return []
+            if isinstance(value, dict):
+                return [('', self._label_dict(k), v) for k, v in value.items()]
+            return [('', {}, value)]
+
+        samples = []
+        if self._default is not None:
+            samples.append(('', {}, self._default.value))
+        for key, series in list(self._series.items()):
+            samples.append(('', dict(zip(self.labelnames, key)), series.value))
+        return samples
+
+    def _label_dict(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        return dict(zip(self.labelnames, (str(k) for k in key)))
+
+
+class Counter(Metric):
+    """Compteur monotone (suffixe _total par convention)"""
+
+    type = 'counter'
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    """Valeur instantanée (profondeur de file, taille de table...)"""
+
+    type = 'gauge'
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+
+class Histogram(Metric):
+    """Distribution d'observations (latences en secondes, tailles de lots)"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_series(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        """Chronomètre un bloc `with` sur la série par défaut"""
+        return self._default.time()
+
+    def collect(self):
+        series = [({}, self._default)] if self._default is not None else []
+        series += [(dict(zip(self.labelnames, key)), s) for key, s in list(self._series.items())]
+
+        samples = []
+        for labels, buckets in series:
+            counts, total = buckets.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+# ==================== Registre ====================
+class MetricsRegistry:
+    """
+    Registre des métriques du processus, exposé par GET /metrics
+
+    Les métriques sont déclarées une fois (counter / gauge / histogram
+    retournent la métrique existante si le nom est déjà enregistré). Avec
+    plusieurs workers gunicorn, chaque worker a son propre registre.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labels=(), function=None):
+        return self._register(Counter, name, documentation, labels, function=function)
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        return self._register(Gauge, name, documentation, labels, function=function)
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def _register(self, cls, name, documentation, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà enregistrée ({metric.type})")
+            elif kwargs.get('function') is not None:
+                metric.set_function(kwargs['function'])
+            return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Exposition au format texte Prometheus"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.collect()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + '}'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    value = float(value)
+    if value == float('inf'):
+        return '+Inf'
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# ==================== Débit glissant ====================
+class RateMeter:
+    """
+    Débit sur une fenêtre glissante (compteurs par seconde)
+
+    Remplace la moyenne depuis le démarrage: mark() est O(1) et
+    per_minute() reflète l'activité des `window` dernières secondes.
+    """
+
+    def __init__(self, window=60):
+        self.window = int(window)
+        self._counts = [0] * self.window
+        self._seconds = [0] * self.window
+        self._started = time.monotonic()
+
+    def mark(self, count=1):
+        second = int(time.monotonic())
+        i = second % self.window
+        if self._seconds[i] != second:
+            self._seconds[i] = second
+            self._counts[i] = 0
+        self._counts[i] += count
+
+    def per_minute(self):
+        now = time.monotonic()
+        second = int(now)
+        total = sum(c for c, s in zip(self._counts, self._seconds) if second - s < self.window)
+        # Fenêtre pas encore pleine au démarrage: extrapoler sur le temps écoulé
+        elapsed = min(self.window, max(1.0, now - self._started))
+        return round(total * 60 / elapsed, 2)
+
+    def reset(self):
+        self._counts = [0] * self.window
+        self._seconds = [0] * self.window
+        self._started = time.monotonic()
+
+
+# ==================== Catalogue ====================
+# Registre global du processus
+metrics = MetricsRegistry()
+
+# Scoring de fichiers (/predict, /jobs)
+CSV_PARSE_SECONDS = metrics.histogram(
+    'traffic_file_parse_seconds', "Lecture et parsing d'un chunk de fichier (CSV, Parquet, Arrow)")
+ROWS_SCORED = metrics.counter('traffic_rows_scored_total', "Lignes de fichiers scorées")
+
+# Modèle
+PREPROCESS_SECONDS = metrics.histogram(
+    'traffic_preprocess_seconds', "Prétraitement (projection + normalisation) par appel", labels=('source',))
+INFERENCE_SECONDS = metrics.histogram(
+    'traffic_inference_seconds', "Appel du moteur d'inférence par lot", labels=('engine',))
+INFERENCE_ROWS = metrics.counter('traffic_inference_rows_total', "Lignes prédites par le modèle", labels=('engine',))
+INFERENCE_BATCH_ROWS = metrics.histogram(
+    'traffic_inference_batch_rows', "Lignes par lot de la file d'inférence", buckets=BATCH_BUCKETS)
+INFERENCE_QUEUE_DEPTH = metrics.gauge('traffic_inference_queue_depth', "Lignes en attente dans la file d'inférence")
+PREDICTION_CACHE_LOOKUPS = metrics.counter(
+    'traffic_prediction_cache_lookups_total', "Consultations du cache de prédictions", labels=('result',))
+PREDICTION_CACHE_SIZE = metrics.gauge('traffic_prediction_cache_entries', "Entrées du cache de prédictions")
+
+# Temps réel
+PACKETS = metrics.counter('traffic_packets_total', "Paquets comptabilisés par le constructeur de flows")
+PACKET_ERRORS = metrics.counter('traffic_packet_errors_total', "Paquets en erreur (décodage, mise à jour du flow)")
+PACKETS_DROPPED = metrics.counter(
+    'traffic_packets_dropped_total', "Paquets perdus avant traitement (files des shards pleines)")
+FLOW_TABLE_SIZE = metrics.gauge('traffic_flow_table_flows', "Flows actifs dans la table de flows")
+FEATURE_SECONDS = metrics.histogram(
+    'traffic_feature_extraction_seconds', "Extraction des features d'un flow terminé")
+FLOWS_CLASSIFIED = metrics.counter('traffic_flows_classified_total', "Flows classifiés", labels=('risk',))
+
+# Émission Socket.IO
+EMIT_SECONDS = metrics.histogram('traffic_emit_seconds', "Construction et envoi d'une trame real_time_batch")
+EMITTER_PENDING = metrics.gauge('traffic_emitter_pending', "Prédictions en attente de la prochaine trame")
+EMITTER_EVENTS = metrics.counter(
+    'traffic_emitter_events_total', "Prédictions par devenir dans l'émetteur", labels=('outcome',))
+
+# Historique des flows (SQLite)
+HISTORY_WRITE_SECONDS = metrics.histogram('traffic_history_write_seconds', "Insertion d'un lot dans l'historique")
+HISTORY_PENDING = metrics.gauge('traffic_history_pending', "Flows en attente d'écriture dans l'historique")
+HISTORY_ROWS = metrics.counter(
+    'traffic_history_rows_total', "Flows par devenir dans l'historique", labels=('outcome',))
+
+
+def watch_inference_queue(queue):
+    """Profondeur de la file d'inférence lue à chaque exposition"""
+    INFERENCE_QUEUE_DEPTH.set_function(lambda: queue.depth)
+
+
+def watch_prediction_cache(cache):
+    """Compteurs du PredictionCache lus à chaque exposition"""
+    def lookups():
+        stats = cache.get_stats()
+        return {'hit': stats['hits'], 'miss': stats['misses'], 'expired': stats['expired']}
+
+    PREDICTION_CACHE_LOOKUPS.set_function(lookups)
+    PREDICTION_CACHE_SIZE.set_function(lambda: cache.get_stats()['size'])
+
+
+def watch_emitter(emitter):
+    """File et compteurs du PredictionEmitter lus à chaque exposition"""
+    EMITTER_PENDING.set_function(lambda: emitter.get_stats()['pending'])
+    EMITTER_EVENTS.set_function(lambda: {
+        outcome: emitter.counters[outcome] for outcome in ('published', 'emitted', 'summarized', 'dropped')
+    })
+
+
+def watch_history_store(store):
+    """File et compteurs du HistoryStore lus à chaque exposition"""
+    HISTORY_PENDING.set_function(lambda: store.pending)
+    HISTORY_ROWS.set_function(lambda: {
+        outcome: store.counters[outcome] for outcome in ('written', 'dropped', 'failed', 'expired')
+    })
+
+
+# ==================== Instrumentation ====================
+def timed_predict(predict_fn, engine):
+    """Fonction de prédiction instrumentée (latence et lignes par moteur)"""
+    seconds = INFERENCE_SECONDS.labels(engine)
+    rows = INFERENCE_ROWS.labels(engine)
+
+    def predict(X):
+        start = time.perf_counter()
+        result = predict_fn(X)
+        seconds.observe(time.perf_counter() - start)
+        rows.inc(len(X))
+        return result
+    return predict
+
+
+def timed_iter(iterable, histogram):
+    """Itère en observant la durée de production de chaque élément (ex: parsing d'un chunk)"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        histogram.observe(time.perf_counter() - start)
+        yield item
@@ -0,0 +1,358 @@
+import json
+import os
+import struct
+import zipfile
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('auto', 'numpy', 'onnx', 'keras')
+
+# Format du fichier de poids exporté (voir export_weights)
+WEIGHTS_FORMAT_VERSION = 1
+
+# Répertoire des modèles: model/model (stage.py lancé depuis model/), MODEL_DIR pour le changer
+DEFAULT_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'model', 'model'
+)
+
+
+def model_dir():
+    """Répertoire des modèles partagé par create_app(), app.py et export_model.py"""
+    return os.getenv('MODEL_DIR', DEFAULT_MODEL_DIR)
+
+
+# ==================== Export ====================
+def export_weights(model, path):
+    """
+    Exporte un modèle Keras (LSTM empilés + Dense) vers un fichier .npz
+
+    Le fichier contient l'architecture (JSON) et les poids de chaque couche,
+    sans dépendance à TensorFlow pour le rechargement. Les couches Dropout
+    sont ignorées (identité en inférence).
+
+    Args:
+        model: Modèle Keras chargé (ex: traffic_classifier_model.h5)
+        path: Fichier .npz de destination
+
+    Returns:
+        Architecture exportée (liste de dicts)
+    """
+    layers = []
+    arrays = {}
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+
+        if kind == 'Dropout':
+            continue
+
+        index = len(layers)
+        weights = layer.get_weights()
+
+        if kind == 'LSTM':
+            kernel, recurrent_kernel = weights[0], weights[1]
+            bias = weights[2] if config.get('use_bias', True) else np.zeros(kernel.shape[1])
+            layers.append({
+                'type': 'lstm',
+                'units': int(config['units']),
+                'activation': config.get('activation', 'tanh'),
+                'recurrent_activation': config.get('recurrent_activation', 'sigmoid'),
+                'return_sequences': bool(config.get('return_sequences', False))
+            })
+            arrays[f'layer{index}_kernel'] = kernel
+            arrays[f'layer{index}_recurrent_kernel'] = recurrent_kernel
+            arrays[f'layer{index}_bias'] = bias
+
+        elif kind == 'Dense':
+            kernel = weights[0]
+            bias = weights[1] if config.get('use_bias', True) else np.zeros(kernel.shape[1])
+            layers.append({
+                'type': 'dense',
+                'units': int(config['units']),
+                'activation': config.get('activation', 'linear')
+            })
+            arrays[f'layer{index}_kernel'] = kernel
+            arrays[f'layer{index}_bias'] = bias
+
+        else:
+            raise ValueError(f"Couche non supportée pour l'export: {kind}")
+
+    architecture = {'version': WEIGHTS_FORMAT_VERSION, 'layers': layers}
+    arrays = {k: np.asarray(v, dtype=np.float32) for k, v in arrays.items()}
+    np.savez(path, architecture=np.array(json.dumps(architecture)), **arrays)
+
+    logger.info(f"✅ Poids exportés: {path} ({len(layers)} couches)")
+    return layers
+
+
+def export_onnx(model, path, n_features):
+    """Exporte le modèle Keras en ONNX (nécessite tf2onnx)"""
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None, 1, n_features), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=path)
+    logger.info(f"✅ Modèle ONNX exporté: {path}")
+
+
+# ==================== Chargement mappé ====================
+def load_weights_mmap(path):
+    """
+    Mappe en mémoire les tableaux d'un .npz non compressé (np.savez)
+
+    Chaque membre est ouvert en np.memmap lecture seule à son offset dans
+    l'archive: les pages sont partagées via le cache du système entre tous
+    les processus qui mappent le même fichier (workers gunicorn), au lieu
+    d'une copie désérialisée par processus.
+
+    Returns:
+        Dict nom -> array (memmap, ou array pour les scalaires)
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Membre compressé, mappage impossible: {info.filename}")
+
+            # En-tête local ZIP (30 octets + nom + extra) puis en-tête .npy
+            f.seek(info.header_offset)
+            local = f.read(30)
+            name_len, extra_len = struct.unpack('<HH', local[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if dtype.hasobject:
+                raise ValueError(f"Membre objet non supporté: {name}")
+            if not shape or dtype.kind == 'U':
+                # Scalaires / chaînes (architecture): lecture directe
+                count = int(np.prod(shape)) if shape else 1
+                arrays[name] = np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype).reshape(shape)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                         shape=shape, order='F' if fortran else 'C')
+    return arrays
+
+
+# ==================== Activations ====================
+def _sigmoid(x):
+    # Forme tanh: numériquement stable, sans overflow de exp
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'softmax': _softmax
+}
+
+
+# ==================== Moteurs ====================
+class NumpyEngine:
+    """
+    Passe avant LSTM -> LSTM -> Dense en NumPy vectorisé
+
+    Reproduit les couches Keras: portes dans l'ordre i, f, c, o,
+    activation récurrente sigmoid par défaut. La projection d'entrée est
+    calculée pour tous les pas de temps en une multiplication; avec une
+    séquence de longueur 1 (cas du modèle), l'état initial est nul et le
+    terme récurrent est omis.
+    """
+
+    name = 'numpy'
+    fork_safe = True  # Aucun thread ni état natif: partageable après fork()
+
+    def __init__(self, weights_path, mmap=False):
+        """
+        Args:
+            weights_path: Poids exportés (.npz)
+            mmap: Mapper les poids en mémoire (lecture seule, partagés entre processus)
+        """
+        if mmap:
+            data = load_weights_mmap(weights_path)
+        else:
+            with np.load(weights_path, allow_pickle=False) as archive:
+                data = {k: archive[k] for k in archive.files}
+        self.mmap = mmap
+
+        architecture = json.loads(str(data['architecture']))
+        if architecture.get('version') != WEIGHTS_FORMAT_VERSION:
+            raise ValueError(f"Version de poids non supportée: {architecture.get('version')}")
+
+        self.layers = []
+        for index, layer in enumerate(architecture['layers']):
+            prefix = f'layer{index}_'
+            params = {k[len(prefix):]: v for k, v in data.items() if k.startswith(prefix)}
+            for key in ('activation', 'recurrent_activation'):
+                if key in layer and layer[key] not in ACTIVATIONS:
+                    raise ValueError(f"Activation non supportée: {layer[key]}")
+            self.layers.append((layer, params))
+
+        self.n_features = int(self.layers[0][1]['kernel'].shape[0])
+        self.n_classes = int(self.layers[-1][1]['kernel'].shape[1])
+
+    def predict(self, X):
+        """
+        Args:
+            X: [samples, timesteps, features] (ou [samples, features])
+
+        Returns:
+            Probabilités [samples, classes] (comme model.predict)
+        """
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, np.newaxis, :]
+
+        for layer, params in self.layers:
+            if layer['type'] == 'lstm':
+                x = self._lstm(x, layer, params)
+            else:
+                x = ACTIVATIONS[layer['activation']](x @ params['kernel'] + params['bias'])
+
+        return x
+
+    @staticmethod
+    def _lstm(x, layer, params):
+        units = layer['units']
+        activation = ACTIVATIONS[layer['activation']]
+        recurrent_activation = ACTIVATIONS[layer['recurrent_activation']]
+        recurrent_kernel = params['recurrent_kernel']
+
+        n, timesteps, _ = x.shape
+        projected = x @ params['kernel'] + params['bias']  # [n, T, 4*units]
+
+        h = c = None
+        outputs = []
+        for t in range(timesteps):
+            z = projected[:, t]
+            if h is not None:
+                z = z + h @ recurrent_kernel
+
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+
+            c = i * g if c is None else f * c + i * g
+            h = o * activation(c)
+            outputs.append(h)
+
+        if layer['return_sequences']:
+            return np.stack(outputs, axis=1)
+        return h
+
+
+class OnnxEngine:
+    """Inférence via ONNX Runtime (modèle exporté par export_onnx)"""
+
+    name = 'onnx'
+    fork_safe = False  # Pool de threads interne: recharger après fork()
+
+    def __init__(self, onnx_path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, np.newaxis, :]
+        return self.session.run(None, {self.input_name: x})[0]
+
+
+class KerasEngine:
+    """Modèle Keras d'origine (import TensorFlow différé au chargement)"""
+
+    name = 'keras'
+    fork_safe = False  # Runtime TensorFlow non réutilisable après fork()
+
+    def __init__(self, model_path):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(model_path)
+
+    def predict(self, X):
+        return self.model.predict(X, verbose=0)
+
+
+def _onnxruntime_available():
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_engine(engine, model_path, weights_path=None, onnx_path=None, mmap=False):
+    """
+    Charge le moteur d'inférence demandé
+
+    Args:
+        engine: 'numpy', 'onnx', 'keras' ou 'auto' (ONNX si le modèle et
+            onnxruntime sont disponibles, sinon NumPy si les poids exportés
+            existent, sinon Keras)
+        model_path: Modèle Keras (.h5)
+        weights_path: Poids exportés (.npz)
+        onnx_path: Modèle ONNX (.onnx)
+        mmap: Mapper les poids NumPy en mémoire (partagés entre workers)
+
+    Returns:
+        Objet exposant predict(X) -> probabilités [samples, classes]
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur d'inférence inconnu: {engine} (attendu: {', '.join(ENGINES)})")
+
+    has_weights = bool(weights_path) and os.path.exists(weights_path)
+    has_onnx = bool(onnx_path) and os.path.exists(onnx_path)
+
+    if engine == 'auto':
+        if has_onnx and _onnxruntime_available():
+            engine = 'onnx'
+        elif has_weights:
+            engine = 'numpy'
+        else:
+            engine = 'keras'
+
+    if engine == 'numpy':
+        if not has_weights:
+            raise FileNotFoundError(
+                f"Poids exportés introuvables: {weights_path} (exécutez export_model.py)"
+            )
+        loaded = NumpyEngine(weights_path, mmap=mmap)
+        source = weights_path
+    elif engine == 'onnx':
+        if not has_onnx:
+            raise FileNotFoundError(
+                f"Modèle ONNX introuvable: {onnx_path} (exécutez export_model.py --onnx)"
+            )
+        loaded = OnnxEngine(onnx_path)
+        source = onnx_path
+    else:
+        loaded = KerasEngine(model_path)
+        source = model_path
+
+    logger.info(f"   ✓ Moteur d'inférence '{loaded.name}' chargé: {source}")
+    return loaded
@@ -1,8 +1,11 @@
+import time
 import numpy as np
-import pandas as pd
 import joblib
-from tensorflow.keras.models import load_model
 import logging
+from app.models.engine import load_engine
+from app.models.schema import FeatureSchema
+from app.models import risk
+from app import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +14,8 @@ class TrafficPredictor:
     """
     Prédicteur de trafic réseau
     Utilise les modèles entraînés par stage.py:
-    - traffic_classifier_model.h5 (LSTM)
+    - traffic_classifier_model.h5 (LSTM), ou ses poids exportés par
+      export_model.py (.npz / .onnx) pour éviter TensorFlow
     - scaler.pkl (MinMaxScaler)
     - label_encoder.pkl (LabelEncoder)
     """
@@ -20,9 +24,15 @@ class TrafficPredictor:
         self.model = None
         self.scaler = None
         self.label_encoder = None
+        self.engine = None
+        self.schema = None  # FeatureSchema compilé depuis le scaler
+        self.classes = None  # Labels de l'encodeur (index de classe -> label)
+        self.dangerous = None  # Masque des classes dangereuses (niveau de risque)
         self.is_loaded = False
+        self.load_timings = {}  # secondes par étape de chargement
     
-    def load(self, model_path, scaler_path, encoder_path):
+    def load(self, model_path, scaler_path, encoder_path, engine='auto',
+             weights_path=None, onnx_path=None, mmap=False):
         """
         Charge les modèles générés par stage.py
         
@@ -30,25 +40,44 @@ class TrafficPredictor:
             model_path: Chemin vers le modèle LSTM (.h5)
             scaler_path: Chemin vers le scaler (.pkl)
             encoder_path: Chemin vers le label encoder (.pkl)
+            engine: Moteur d'inférence ('auto', 'numpy', 'onnx', 'keras')
+            weights_path: Poids exportés (.npz) pour le moteur NumPy
+            onnx_path: Modèle exporté (.onnx) pour ONNX Runtime
+            mmap: Mapper les poids NumPy en mémoire (partagés entre workers)
         """
         try:
             logger.info("📦 Chargement des modèles...")
             
-            # Modèle LSTM
-            self.model = load_model(model_path)
-            logger.info(f"   ✓ Modèle LSTM chargé: {model_path}")
+            # Modèle LSTM (moteur d'inférence)
+            start = time.perf_counter()
+            self._engine_args = (engine, model_path, weights_path, onnx_path, mmap)
+            self.model = load_engine(*self._engine_args)
+            self.engine = self.model.name
+            self.load_timings['engine'] = time.perf_counter() - start
             
             # Scaler MinMax
+            start = time.perf_counter()
             self.scaler = joblib.load(scaler_path)
+            self.load_timings['scaler'] = time.perf_counter() - start
             logger.info(f"   ✓ Scaler chargé: {scaler_path}")
             
+            # Schéma compilé: ordre des colonnes + normalisation fusionnée
+            try:
+                self.schema = FeatureSchema.from_scaler(self.scaler)
+                logger.info(f"   ✓ Schéma de features compilé ({self.schema.n_features} colonnes)")
+            except TypeError as e:
+                logger.warning(f"   ⚠️  {e}, prétraitement DataFrame conservé")
+            
             # Label Encoder
+            start = time.perf_counter()
             self.label_encoder = joblib.load(encoder_path)
+            self.load_timings['encoder'] = time.perf_counter() - start
             logger.info(f"   ✓ Label Encoder chargé: {encoder_path}")
             
             # Afficher les classes détectées
-            classes = self.label_encoder.classes_
-            logger.info(f"   ✓ Classes: {list(classes)}")
+            self.classes = np.asarray(self.label_encoder.classes_)
+            self.dangerous = risk.dangerous_classes(self.classes)
+            logger.info(f"   ✓ Classes: {list(self.classes)}")
             
             self.is_loaded = True
             logger.info("✅ Tous les modèles chargés avec succès")
@@ -61,10 +90,54 @@ class TrafficPredictor:
             logger.error(f"❌ Erreur chargement: {e}")
             raise
     
+    def reload_engine(self):
+        """Recharge le moteur d'inférence (processus enfant après fork)"""
+        self.model = load_engine(*self._engine_args)
+        self.engine = self.model.name
+    
     def preprocess(self, df):
         """
         Prétraite les données EXACTEMENT comme dans stage.py
         
+        Colonnes projetées et ordonnées selon le schéma compilé du scaler,
+        inf/NaN -> 0, colonnes textuelles -> codes de catégorie, puis
+        normalisation MinMax fusionnée (X * scale + min) en float32.
+        
+        Args:
+            df: DataFrame avec colonnes de trafic réseau
+            
+        Returns:
+            X reshaped pour LSTM [samples, timesteps, features]
+        """
+        if self.schema is None:
+            return self._preprocess_dataframe(df)
+        
+        with metrics.PREPROCESS_SECONDS.labels('dataframe').time():
+            X_scaled = self.schema.transform(df)
+        
+        # Reshape pour LSTM [samples, timesteps=1, features]
+        return X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+    
+    def preprocess_records(self, records):
+        """
+        Prétraite des enregistrements bruts (dict, liste de dicts ou array)
+        sans passer par un DataFrame; les colonnes absentes valent 0
+        
+        Returns:
+            X reshaped pour LSTM [samples, timesteps, features]
+        """
+        if self.schema is None:
+            import pandas as pd
+            return self._preprocess_dataframe(pd.DataFrame([records] if isinstance(records, dict) else records))
+        
+        with metrics.PREPROCESS_SECONDS.labels('records').time():
+            X_scaled = self.schema.transform(records, strict=False)
+        return X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+    
+    def _preprocess_dataframe(self, df):
+        """
+        Prétraitement DataFrame d'origine (scaler sans scale_/min_)
+        
         Args:
             df: DataFrame avec colonnes de trafic réseau
             
@@ -106,60 +179,105 @@ class TrafficPredictor:
             labels: Classes prédites (array)
             confidences: Scores de confiance (array)
         """
+        class_indices, confidences = self.predict_indices(X)
+        
+        # Décoder les labels (équivalent à label_encoder.inverse_transform)
+        return self.classes[class_indices], confidences
+    
+    def predict_indices(self, X):
+        """
+        Prédiction sans décodage des labels
+        
+        Returns:
+            class_indices: Indices de classe (voir self.classes)
+            confidences: Scores de confiance float32
+        """
         if not self.is_loaded:
             raise RuntimeError("Modèle non chargé. Exécutez stage.py d'abord.")
         
         # Prédiction avec le modèle LSTM
-        predictions = self.model.predict(X, verbose=0)
+        start = time.perf_counter()
+        predictions = self.model.predict(X)
+        metrics.INFERENCE_SECONDS.labels(self.engine).observe(time.perf_counter() - start)
+        metrics.INFERENCE_ROWS.labels(self.engine).inc(len(X))
         
         # Classe avec probabilité max
-        predicted_classes = np.argmax(predictions, axis=1)
-        confidences = np.max(predictions, axis=1)
-        
-        # Décoder les labels
-        labels = self.label_encoder.inverse_transform(predicted_classes)
+        class_indices = np.argmax(predictions, axis=1)
+        confidences = predictions[np.arange(len(class_indices)), class_indices].astype(np.float32)
         
-        return labels, confidences
+        return class_indices, confidences
     
-    def predict_batch(self, df, flow_id_col='Flow ID'):
+    def predict_codes(self, df, flow_id_col='Flow ID', id_offset=0):
         """
-        Prédiction sur un DataFrame complet
+        Prédiction sur un DataFrame, résultats en colonnes codées
         
         Args:
             df: DataFrame avec colonnes de trafic
             flow_id_col: Nom de la colonne Flow ID
+            id_offset: Index de la première ligne (lecture par chunks)
             
         Returns:
-            Liste de dictionnaires avec résultats
+            (flow_ids, class_indices, confidences, risk_codes): arrays de même
+            longueur; labels via self.classes, risques via risk.RISK_LEVELS
         """
         # Sauvegarder Flow IDs
         if flow_id_col in df.columns:
-            flow_ids = df[flow_id_col].tolist()
+            flow_ids = df[flow_id_col].astype(str).to_numpy()
         else:
-            flow_ids = [f'flow_{i}' for i in range(len(df))]
+            flow_ids = np.array([f'flow_{i}' for i in range(id_offset, id_offset + len(df))])
         
-        # Prétraitement
-        X = self.preprocess(df)
+        # Prétraitement + prédiction
+        class_indices, confidences = self.predict_indices(self.preprocess(df))
+        
+        # Niveaux de risque par masques (classe dangereuse x seuils de confiance)
+        risk_codes = risk.risk_codes(class_indices, confidences, self.dangerous)
+        
+        return flow_ids, class_indices, confidences, risk_codes
+    
+    def predict_arrays(self, df, flow_id_col='Flow ID', id_offset=0):
+        """
+        Prédiction sur un DataFrame, résultats en colonnes décodées
+        
+        Returns:
+            (flow_ids, labels, confidences, risks): arrays de même longueur
+        """
+        flow_ids, class_indices, confidences, risk_codes = self.predict_codes(df, flow_id_col, id_offset)
+        return flow_ids, self.classes[class_indices], confidences, risk.risk_names(risk_codes)
+    
+    def predict_batch(self, df, flow_id_col='Flow ID', id_offset=0):
+        """
+        Prédiction sur un DataFrame complet
         
-        # Prédiction
-        labels, confidences = self.predict(X)
+        Args:
+            df: DataFrame avec colonnes de trafic
+            flow_id_col: Nom de la colonne Flow ID
+            id_offset: Index de la première ligne (lecture par chunks)
+            
+        Returns:
+            Liste de dictionnaires avec résultats
+        """
+        return self.rows_to_dicts(*self.predict_arrays(df, flow_id_col, id_offset), id_offset=id_offset)
+    
+    @staticmethod
+    def rows_to_dicts(flow_ids, labels, confidences, risks, id_offset=0, limit=None):
+        """Formate (une partie de) résultats colonnaires en dictionnaires"""
+        n = len(labels) if limit is None else min(limit, len(labels))
         
-        # Formater résultats
         results = []
-        for i, (label, conf, flow_id) in enumerate(zip(labels, confidences, flow_ids)):
+        for i in range(n):
             results.append({
-                'id': i + 1,
-                'flow_id': str(flow_id),
-                'prediction': str(label),
-                'confidence': float(conf),
-                'risk': self._calculate_risk(label, conf)
+                'id': id_offset + i + 1,
+                'flow_id': str(flow_ids[i]),
+                'prediction': str(labels[i]),
+                'confidence': float(confidences[i]),
+                'risk': str(risks[i])
             })
         
         return results
     
     def _calculate_risk(self, label, confidence):
         """
-        Calcule le niveau de risque
+        Calcule le niveau de risque (voir app.models.risk)
         
         Classes dangereuses:
         - DDoS, DoS: Déni de service
@@ -167,17 +285,5 @@ class TrafficPredictor:
         - Bot: Botnet
         - PortScan: Scan de ports
         """
-        high_risk_keywords = ['ddos', 'dos', 'infiltration', 'bot', 'portscan']
-        
-        label_lower = str(label).lower()
-        is_dangerous = any(keyword in label_lower for keyword in high_risk_keywords)
-        
-        if is_dangerous:
-            if confidence > 0.8:
-                return 'High'
-            elif confidence > 0.6:
-                return 'Medium'
-            else:
-                return 'Low'
-        else:
-            return 'Low'
+        return risk.risk_level(label, confidence)
+
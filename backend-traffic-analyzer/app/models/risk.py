@@ -0,0 +1,58 @@
+import numpy as np
+
+# Niveaux de risque, dans l'ordre des codes (0 = Low, 1 = Medium, 2 = High)
+RISK_LEVELS = ('Low', 'Medium', 'High')
+RISK_CODES = {name: i for i, name in enumerate(RISK_LEVELS)}
+
+# Classes dangereuses (sous-chaînes du label, insensible à la casse)
+# DDoS / DoS: déni de service, Infiltration: intrusion, Bot: botnet, PortScan: scan de ports
+HIGH_RISK_KEYWORDS = ('ddos', 'dos', 'infiltration', 'bot', 'portscan')
+
+# Seuils de confiance des classes dangereuses
+HIGH_CONFIDENCE = 0.8
+MEDIUM_CONFIDENCE = 0.6
+
+_RISK_NAMES = np.array(RISK_LEVELS)
+
+
+def dangerous_classes(classes):
+    """Masque booléen des classes dangereuses (une entrée par classe de l'encodeur)"""
+    return np.array([
+        any(keyword in str(label).lower() for keyword in HIGH_RISK_KEYWORDS)
+        for label in classes
+    ], dtype=bool)
+
+
+def risk_codes(class_indices, confidences, dangerous):
+    """
+    Niveaux de risque vectorisés (codes int8)
+
+    Args:
+        class_indices: Indices de classe prédits [samples]
+        confidences: Confiances [samples]
+        dangerous: Masque des classes dangereuses (dangerous_classes)
+
+    Returns:
+        Codes de risque int8 [samples] (voir RISK_LEVELS)
+    """
+    confidences = np.asarray(confidences)
+    codes = (confidences > MEDIUM_CONFIDENCE).astype(np.int8)
+    codes += confidences > HIGH_CONFIDENCE
+    codes *= dangerous[np.asarray(class_indices)]
+    return codes
+
+
+def risk_names(codes):
+    """Codes de risque -> noms ('Low', 'Medium', 'High')"""
+    return _RISK_NAMES[np.asarray(codes)]
+
+
+def risk_level(label, confidence):
+    """Niveau de risque d'une prédiction isolée"""
+    if not dangerous_classes([label])[0]:
+        return 'Low'
+    if confidence > HIGH_CONFIDENCE:
+        return 'High'
+    if confidence > MEDIUM_CONFIDENCE:
+        return 'Medium'
+    return 'Low'
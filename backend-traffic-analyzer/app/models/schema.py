@@ -0,0 +1,158 @@
+import numpy as np
+
+# Colonnes supprimées avant normalisation (comme dans stage.py)
+DROP_COLUMNS = ("Flow ID", "Src IP", "Dst IP", "Timestamp", "Label", "Label.1")
+
+
+class FeatureSchema:
+    """
+    Schéma de features compilé à partir du scaler entraîné par stage.py
+
+    Contient l'ordre des colonnes (scaler.feature_names_in_), la table
+    colonne -> index et les vecteurs du MinMaxScaler fusionnés en une
+    transformation affine float32: X * scale + offset. Les enregistrements
+    bruts (dicts, arrays, DataFrames) sont convertis en une seule passe en
+    matrice contiguë [samples, features], sans DataFrame intermédiaire.
+    """
+
+    def __init__(self, columns, scale, offset, clip_range=None):
+        """
+        Args:
+            columns: Noms des features dans l'ordre du modèle (ou None: positionnel)
+            scale: Facteur multiplicatif par feature (MinMaxScaler.scale_)
+            offset: Terme additif par feature (MinMaxScaler.min_)
+            clip_range: (min, max) si le scaler a été entraîné avec clip=True
+        """
+        self.scale = np.ascontiguousarray(scale, dtype=np.float32)
+        self.offset = np.ascontiguousarray(offset, dtype=np.float32)
+        self.n_features = self.scale.shape[0]
+        self.columns = list(columns) if columns is not None else None
+        self.index = {name: i for i, name in enumerate(self.columns)} if self.columns else {}
+        self.clip_range = clip_range
+
+    @classmethod
+    def from_scaler(cls, scaler):
+        """Compile le schéma d'un MinMaxScaler ajusté"""
+        if not (hasattr(scaler, 'scale_') and hasattr(scaler, 'min_')):
+            raise TypeError(f"Scaler non supporté: {type(scaler).__name__} (MinMaxScaler attendu)")
+
+        columns = getattr(scaler, 'feature_names_in_', None)
+        clip_range = scaler.feature_range if getattr(scaler, 'clip', False) else None
+        return cls(columns, scaler.scale_, scaler.min_, clip_range)
+
+    # ==================== Transformation ====================
+    def transform(self, data, strict=True):
+        """
+        Enregistrements bruts -> matrice normalisée float32 [samples, features]
+
+        Args:
+            data: DataFrame, dict, liste de dicts ou array [samples, features]
+            strict: Refuser les colonnes manquantes (sinon remplies à 0).
+                Un array doit toujours avoir la largeur du scaler: ses
+                colonnes ne sont pas nommées, elles ne sont jamais complétées
+        """
+        X = self.to_matrix(data, strict)
+        X *= self.scale
+        X += self.offset
+        if self.clip_range is not None:
+            np.clip(X, self.clip_range[0], self.clip_range[1], out=X)
+        return X
+
+    def to_matrix(self, data, strict=True):
+        """Matrice brute float32 [samples, features], valeurs non finies -> 0"""
+        if isinstance(data, dict):
+            X = self._from_records([data], strict)
+        elif isinstance(data, (list, tuple)) and data and isinstance(data[0], dict):
+            X = self._from_records(data, strict)
+        elif hasattr(data, 'columns') and hasattr(data, 'dtypes'):
+            X = self._from_dataframe(data, strict)
+        else:
+            X = self._from_array(data)
+
+        X[~np.isfinite(X)] = 0.0
+        return X
+
+    # ==================== Sources ====================
+    def _from_array(self, data):
+        X = np.array(data, dtype=np.float32, order='C')  # copie: modifiée sur place
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim == 3:
+            X = X.reshape(X.shape[0], -1)
+
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"{X.shape[1]} features reçues, {self.n_features} attendues")
+        return X
+
+    def _from_records(self, records, strict):
+        self._require_columns()
+        X = np.zeros((len(records), self.n_features), dtype=np.float32)
+        seen = set()
+        index = self.index
+
+        for i, record in enumerate(records):
+            for name, value in record.items():
+                j = index.get(name)
+                if j is None:
+                    continue
+                if isinstance(value, str):
+                    value = 0.0  # Colonne catégorielle: code recalculé ci-dessous
+                X[i, j] = value if value is not None else 0.0
+                seen.add(name)
+
+        self._check_missing(seen, strict)
+
+        # Colonnes textuelles: codes de catégorie (ordre trié, comme cat.codes)
+        for name in seen:
+            j = index[name]
+            values = [r.get(name) for r in records]
+            if any(isinstance(v, str) for v in values):
+                X[:, j] = self._category_codes(np.array(values, dtype=object))
+        return X
+
+    def _from_dataframe(self, df, strict):
+        if self.columns is None:
+            kept = [c for c in df.columns if c not in DROP_COLUMNS]
+            return self._from_array(df[kept].to_numpy(dtype=np.float32))
+
+        kinds = {c: dtype.kind for c, dtype in df.dtypes.items()}
+        present = [c for c in self.columns if c in kinds]
+        self._check_missing(present, strict)
+
+        numeric = [c for c in present if kinds[c] in 'biuf']
+        if len(numeric) == self.n_features:
+            # Cas courant: toutes les colonnes présentes et numériques, une seule conversion
+            X = np.ascontiguousarray(df[numeric].to_numpy(dtype=np.float32))
+            if X.base is not None:
+                X = X.copy()
+            return X
+
+        X = np.zeros((len(df), self.n_features), dtype=np.float32)
+        if numeric:
+            X[:, [self.index[c] for c in numeric]] = df[numeric].to_numpy(dtype=np.float32)
+
+        for c in present:
+            if kinds[c] not in 'biuf':
+                X[:, self.index[c]] = self._category_codes(df[c].to_numpy(dtype=object))
+        return X
+
+    # ==================== Utilitaires ====================
+    @staticmethod
+    def _category_codes(values):
+        """Codes de catégorie (valeurs triées), manquants -> 0 comme fillna(0)"""
+        missing = np.array([v is None or (isinstance(v, float) and v != v) for v in values])
+        values = np.where(missing, 0, values)
+        _, codes = np.unique(values.astype(str), return_inverse=True)
+        return codes
+
+    def _require_columns(self):
+        if self.columns is None:
+            raise ValueError("Scaler sans feature_names_in_: seuls les arrays sont acceptés")
+
+    def _check_missing(self, present, strict):
+        if strict and len(present) != self.n_features:
+            missing = [c for c in self.columns if c not in set(present)]
+            raise ValueError(
+                f"{len(missing)} colonnes manquantes: {', '.join(missing[:5])}"
+                + ('...' if len(missing) > 5 else '')
+            )
@@ -0,0 +1,96 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from app.services.profiler import get_profiler, ProfilerBusy
+import hmac
+import logging
+
+bp = Blueprint('debug', __name__, url_prefix='/debug')
+logger = logging.getLogger(__name__)
+
+# Sans DEBUG_TOKEN configuré, seules les requêtes locales sont acceptées
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def _profiler():
+    """Profileur configuré depuis l'application"""
+    return get_profiler(
+        max_seconds=current_app.config.get('DEBUG_PROFILE_MAX_SECONDS', 60),
+        default_interval=current_app.config.get('DEBUG_PROFILE_INTERVAL', 0.01)
+    )
+
+
+def _authorized():
+    """Jeton X-Debug-Token si DEBUG_TOKEN est défini, sinon requête locale uniquement"""
+    token = current_app.config.get('DEBUG_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Debug-Token', ''), token)
+    return request.remote_addr in LOCAL_ADDRESSES
+
+
+@bp.before_request
+def check_access():
+    if not current_app.config.get('DEBUG_PROFILE_ENABLED', True):
+        return jsonify({'error': 'Endpoints de debug désactivés'}), 404
+    if not _authorized():
+        logger.warning(f"⚠️  Accès debug refusé: {request.remote_addr}")
+        return jsonify({'error': 'Accès refusé'}), 403
+
+
+@bp.route('/profile', methods=['POST'])
+def run_profile():
+    """
+    Profilage par échantillonnage de tous les threads du processus
+
+    POST /debug/profile?seconds=30&interval_ms=10&top=30&idle=0&format=collapsed
+
+    La requête bloque pendant `seconds` secondes. Avec plusieurs workers
+    gunicorn, seul le worker qui sert la requête est profilé (voir pid).
+
+    Returns:
+        JSON avec top (fonctions les plus chaudes), collapsed (piles
+        repliées pour flamegraph.pl / speedscope) et overhead_pct;
+        format=collapsed renvoie directement le fichier de piles repliées.
+        409 si un profilage est déjà en cours.
+    """
+    try:
+        seconds = request.args.get('seconds', 10, type=float)
+        interval_ms = request.args.get('interval_ms', type=float)
+        top = min(max(1, request.args.get('top', 30, type=int)), 500)
+        include_idle = request.args.get('idle', '0') == '1'
+
+        result = _profiler().profile(
+            seconds,
+            interval=interval_ms / 1000 if interval_ms else None,
+            include_idle=include_idle,
+            top=top
+        )
+
+        if request.args.get('format') == 'collapsed':
+            return Response(
+                result['collapsed'],
+                mimetype='text/plain',
+                headers={'Content-Disposition': f"attachment; filename=profile-{result['pid']}.collapsed"}
+            )
+        return jsonify(result), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"❌ Erreur POST /debug/profile: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/profile', methods=['GET'])
+def profile_status():
+    """
+    État du profileur et résumé du dernier profilage
+
+    GET /debug/profile
+    """
+    profiler = _profiler()
+    return jsonify({
+        'busy': profiler.busy,
+        'max_seconds': profiler.max_seconds,
+        'last_run': profiler.last_run
+    }), 200
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify
 from app.services import prediction_service
+from app.startup import startup_timer
 import logging
+import os
 import sys
 
 bp = Blueprint('health', __name__)
@@ -18,17 +20,41 @@ def health_check():
         JSON avec status du serveur et des modèles
     """
     try:
+        load_status = prediction_service.get_load_status()
+        if load_status['status'] in ('pending', 'loading'):
+            # Serveur opérationnel, modèles pas encore prêts
+            return jsonify({
+                'status': 'STARTING',
+                'message': 'Chargement des modèles en cours',
+                'ready': False,
+                'model_loaded': False,
+                'model_status': load_status,
+                'startup': startup_timer.report(),
+                'version': '1.0.0',
+                'timestamp': __import__('datetime').datetime.now().isoformat()
+            }), 200
+        
         predictor = prediction_service.get_predictor()
         
         model_loaded = predictor.is_loaded if predictor else False
         classes = list(predictor.label_encoder.classes_) if model_loaded else []
+        inference_queue = prediction_service.get_inference_queue() if model_loaded else None
+        prediction_cache = prediction_service.get_prediction_cache()
         
         response = {
             'status': 'OK',
             'message': 'Backend opérationnel',
+            'ready': model_loaded,
             'model_loaded': model_loaded,
+            'model_status': load_status,
+            'startup': startup_timer.report(),
             'model_source': 'stage.py',
+            'inference_engine': predictor.engine if model_loaded else None,
+            'weights_mmap': getattr(predictor.model, 'mmap', False) if model_loaded else False,
+            'worker_pid': os.getpid(),
             'classes': classes,
+            'inference_queue': inference_queue.get_stats() if inference_queue else None,
+            'prediction_cache': prediction_cache.get_stats() if prediction_cache else None,
             'version': '1.0.0',
             'python_version': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
             'timestamp': __import__('datetime').datetime.now().isoformat()
@@ -42,7 +68,9 @@ def health_check():
         return jsonify({
             'status': 'ERROR',
             'message': str(e),
+            'ready': False,
             'model_loaded': False,
+            'model_status': prediction_service.get_load_status(),
             'help': 'Exécutez stage.py pour générer les modèles',
             'version': '1.0.0',
             'timestamp': __import__('datetime').datetime.now().isoformat()
@@ -0,0 +1,92 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.services.history_store import get_history_store, history_config, parse_time, parse_cursor
+import logging
+
+bp = Blueprint('history', __name__, url_prefix='/history')
+logger = logging.getLogger(__name__)
+
+# Nombre de flows maximal par page (?limit=)
+MAX_PAGE_SIZE = 1000
+
+
+def store():
+    """Historique configuré depuis l'application (None si désactivé)"""
+    if not current_app.config.get('HISTORY_ENABLED', True):
+        return None
+    return get_history_store(**history_config(current_app.config))
+
+
+def _list_arg(name):
+    """Paramètre liste séparé par des virgules (?label=DDoS,PortScan)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def _filters():
+    """Filtres communs: période [start, end[ (epoch ou ISO 8601), labels, risques, confiance"""
+    return {
+        'start': parse_time(request.args.get('start')),
+        'end': parse_time(request.args.get('end')),
+        'labels': _list_arg('label'),
+        'risks': _list_arg('risk'),
+        'min_confidence': request.args.get('min_confidence', type=float)
+    }
+
+
+@bp.route('', methods=['GET'])
+def query_history():
+    """
+    Flows classifiés sur une période, du plus récent au plus ancien
+
+    GET /history?start=2024-05-01T08:00:00&end=1714557600&label=DDoS,PortScan
+        &risk=High&min_confidence=0.9&limit=100&cursor=1714557000.25:1234
+
+    Returns:
+        JSON avec items et next_cursor (à passer en `cursor` pour la page suivante)
+    """
+    history = store()
+    if history is None:
+        return jsonify({'error': 'Historique désactivé (HISTORY_ENABLED=0)'}), 404
+
+    try:
+        filters = _filters()
+        cursor = parse_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre de date ou curseur invalide: {e}'}), 400
+
+    try:
+        limit = min(max(1, request.args.get('limit', 100, type=int)), MAX_PAGE_SIZE)
+        page = history.query(limit=limit, cursor=cursor, **filters)
+        return jsonify(dict(page, limit=limit)), 200
+    except Exception as e:
+        logger.error(f"❌ Erreur /history: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/summary', methods=['GET'])
+def history_summary():
+    """
+    Nombre de flows par label et niveau de risque sur une période
+
+    GET /history/summary?start=...&end=...&label=...&risk=...
+
+    Returns:
+        JSON avec total, groups et les statistiques de l'historique
+    """
+    history = store()
+    if history is None:
+        return jsonify({'error': 'Historique désactivé (HISTORY_ENABLED=0)'}), 404
+
+    try:
+        filters = _filters()
+    except ValueError as e:
+        return jsonify({'error': f'Paramètre de date invalide: {e}'}), 400
+
+    try:
+        summary = history.summary(**filters)
+        return jsonify(dict(summary, store=history.get_stats())), 200
+    except Exception as e:
+        logger.error(f"❌ Erreur /history/summary: {e}")
+        return jsonify({'error': str(e)}), 500
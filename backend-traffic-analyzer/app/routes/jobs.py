@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import socketio
+from app.routes.prediction import validate_csv_file
+from app.services.job_service import get_job_service
+from app.services import prediction_service
+from app.routes import results
+import logging
+
+bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+logger = logging.getLogger(__name__)
+
+
+def _service():
+    """Service de jobs configuré depuis l'application"""
+    return get_job_service(
+        socketio,
+        max_workers=current_app.config.get('JOB_WORKERS', 2),
+        chunksize=current_app.config.get('PREDICT_CHUNKSIZE', 50000),
+        upload_dir=current_app.config.get('JOB_UPLOAD_DIR'),
+        result_store=results.store()
+    )
+
+
+@bp.route('', methods=['POST'])
+def create_job():
+    """
+    Crée un job de scoring asynchrone
+
+    POST /jobs
+    Content-Type: multipart/form-data
+    Body: file (CSV, Parquet ou Arrow IPC avec colonnes de trafic réseau)
+
+    Returns:
+        202 + JSON avec job_id (progression via Socket.IO 'job_progress')
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({
+                'error': 'Aucun fichier fourni',
+                'help': 'Envoyez un fichier CSV via form-data'
+            }), 400
+
+        file = request.files['file']
+
+        is_valid, error_msg = validate_csv_file(file)
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+
+        if not prediction_service.is_ready():
+            return jsonify({'error': 'Modèles non disponibles', 'model_status': prediction_service.get_load_status()}), 503
+
+        job = _service().submit(file)
+
+        return jsonify({
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'message': 'Job de scoring planifié'
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Erreur POST /jobs: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Statut d'un job de scoring
+
+    GET /jobs/<id>
+
+    Returns:
+        JSON avec status, progression et statistiques finales
+    """
+    job = _service().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+
+    return jsonify(job), 200
+
+
+@bp.route('', methods=['GET'])
+def list_jobs():
+    """
+    Liste des jobs de scoring
+
+    GET /jobs
+    """
+    return jsonify({'jobs': _service().list()}), 200
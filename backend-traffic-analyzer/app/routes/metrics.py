@@ -0,0 +1,20 @@
+from flask import Blueprint, Response
+from app.metrics import metrics, CONTENT_TYPE
+import logging
+
+bp = Blueprint('metrics', __name__)
+logger = logging.getLogger(__name__)
+
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Métriques du processus au format texte Prometheus
+    
+    GET /metrics
+    
+    Latences (prétraitement, inférence, parsing, émission), compteurs de
+    lignes / paquets / flows et profondeurs de files. Avec plusieurs
+    workers gunicorn, chaque réponse couvre le worker qui la sert.
+    """
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
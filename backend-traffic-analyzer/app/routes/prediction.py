@@ -1,5 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.services import prediction_service
+from app.services.ingestion import SUPPORTED_EXTENSIONS
+from app.routes import results
+from app.services import encoding
 import logging
 
 bp = Blueprint('prediction', __name__)
@@ -7,12 +10,12 @@ logger = logging.getLogger(__name__)
 
 
 def validate_csv_file(file):
-    """Validation du fichier CSV"""
+    """Validation du fichier (CSV, Parquet ou Arrow IPC)"""
     if not file or file.filename == '':
         return False, "Aucun fichier fourni"
     
-    if not file.filename.lower().endswith('.csv'):
-        return False, "Le fichier doit être un CSV"
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return False, f"Le fichier doit être un CSV, Parquet ou Arrow ({', '.join(SUPPORTED_EXTENSIONS)})"
     
     return True, None
 
@@ -24,10 +27,13 @@ def predict():
     
     POST /predict
     Content-Type: multipart/form-data
-    Body: file (CSV avec colonnes de trafic réseau)
+    Body: file (CSV, Parquet ou Arrow IPC avec colonnes de trafic réseau)
+    Query: layout=columnar (prédictions en colonnes), format=msgpack
+           (ou Accept: application/msgpack) pour une réponse binaire
     
     Returns:
-        JSON avec prédictions, statistiques et résumé
+        JSON avec les 100 premières prédictions, statistiques, résumé et
+        result_id (toutes les prédictions via GET /results/<result_id>)
     """
     try:
         # Vérifier présence du fichier
@@ -46,12 +52,28 @@ def predict():
         
         logger.info(f"📤 Fichier reçu: {file.filename}")
         
-        # Prédiction
-        result = prediction_service.predict_from_file(file)
+        # Prédiction (streaming par chunks sauf si ?stream=0)
+        streaming = current_app.config.get('PREDICT_STREAMING', True)
+        streaming = request.args.get('stream', '1' if streaming else '0') != '0'
+        
+        if streaming:
+            result = prediction_service.predict_from_file_stream(
+                file,
+                chunksize=current_app.config.get('PREDICT_CHUNKSIZE', 50000),
+                store=results.store(),
+                layout=encoding.requested_layout()
+            )
+        else:
+            result = prediction_service.predict_from_file(file, store=results.store(),
+                                                          layout=encoding.requested_layout())
         
         logger.info(f"✅ Prédiction réussie")
         
-        return jsonify(result), 200
+        return encoding.make_response(result, 200)
+        
+    except prediction_service.ModelNotReadyError as e:
+        logger.warning(f"⏳ /predict refusé: {e}")
+        return jsonify({'error': str(e)}), 503
         
     except Exception as e:
         logger.error(f"❌ Erreur /predict: {e}")
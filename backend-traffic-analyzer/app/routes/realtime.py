@@ -1,12 +1,28 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from app import socketio
 from app.services.realtime_service import get_realtime_service
+from app.services.emitter import get_emitter, emitter_config
+from app.services.history_store import get_history_store, history_config
 import logging
 
 bp = Blueprint('realtime', __name__, url_prefix='/real-time')
 logger = logging.getLogger(__name__)
 
 
+def _service():
+    """
+    Service temps réel, avec émission groupée si SOCKET_EMIT_INTERVAL > 0
+    et historique des flows si HISTORY_ENABLED
+    """
+    emitter = None
+    if current_app.config.get('SOCKET_EMIT_INTERVAL', 0) > 0:
+        emitter = get_emitter(socketio, **emitter_config(current_app.config))
+    history = None
+    if current_app.config.get('HISTORY_ENABLED', True):
+        history = get_history_store(**history_config(current_app.config))
+    return get_realtime_service(socketio, emitter, history)
+
+
 @bp.route('/start', methods=['POST'])
 def start_realtime():
     """
@@ -22,7 +38,7 @@ def start_realtime():
         data = request.get_json() or {}
         interval = data.get('interval', 1.0)
         
-        service = get_realtime_service(socketio)
+        service = _service()
         success = service.start(interval)
         
         if success:
@@ -53,7 +69,7 @@ def stop_realtime():
         JSON avec status
     """
     try:
-        service = get_realtime_service(socketio)
+        service = _service()
         success = service.stop()
         
         if success:
@@ -83,13 +99,19 @@ def get_stats():
         JSON avec statistiques
     """
     try:
-        service = get_realtime_service(socketio)
+        service = _service()
         stats = service.get_stats()
         
-        return jsonify({
+        response = {
             'status': 'running' if service.is_running else 'stopped',
             'stats': stats
-        }), 200
+        }
+        if service.emitter is not None:
+            response['emitter'] = service.emitter.get_stats()
+        if service.history is not None:
+            response['history'] = service.history.get_stats()
+        
+        return jsonify(response), 200
         
     except Exception as e:
         logger.error(f"❌ Erreur /real-time/stats: {e}")
@@ -0,0 +1,73 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.services.result_store import get_result_store
+from app.services import encoding
+import logging
+
+bp = Blueprint('results', __name__, url_prefix='/results')
+logger = logging.getLogger(__name__)
+
+# Taille de page maximale acceptée (?limit=)
+MAX_PAGE_SIZE = 1000
+
+
+def store():
+    """Stockage de résultats configuré depuis l'application"""
+    return get_result_store(
+        current_app.config.get('RESULTS_DIR'),
+        max_results=current_app.config.get('RESULTS_MAX', 50)
+    )
+
+
+def _list_arg(name):
+    """Paramètre liste séparé par des virgules (?risk=High,Medium)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+@bp.route('', methods=['GET'])
+def list_results():
+    """
+    Liste des jeux de résultats conservés
+
+    GET /results
+    """
+    return jsonify({'results': store().list()}), 200
+
+
+@bp.route('/<result_id>', methods=['GET'])
+def get_results(result_id):
+    """
+    Page de résultats d'un scoring (/predict ou /jobs)
+
+    GET /results/<id>?offset=0&limit=100&risk=High,Medium&label=DDoS
+        &min_confidence=0.9&max_confidence=1&flow_id=192.168.1.
+        &layout=columnar&format=msgpack
+
+    Returns:
+        JSON avec total (lignes filtrées), offset, limit et items
+    """
+    try:
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = min(max(1, request.args.get('limit', 100, type=int)), MAX_PAGE_SIZE)
+
+        page = store().query(
+            result_id,
+            offset=offset,
+            limit=limit,
+            risk=_list_arg('risk'),
+            label=_list_arg('label'),
+            min_confidence=request.args.get('min_confidence', type=float),
+            max_confidence=request.args.get('max_confidence', type=float),
+            flow_id=request.args.get('flow_id'),
+            layout=encoding.requested_layout()
+        )
+        if page is None:
+            return jsonify({'error': 'Résultats introuvables'}), 404
+
+        return encoding.make_response(page, 200)
+
+    except Exception as e:
+        logger.error(f"❌ Erreur GET /results/{result_id}: {e}")
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,379 @@
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from app.services.subscriptions import BatchView
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Événement Socket.IO des trames groupées
+BATCH_EVENT = 'real_time_batch'
+
+
+class ClientChannel:
+    """File d'envoi d'un client Socket.IO (trames en attente + fenêtre d'acquittement)"""
+
+    def __init__(self, sid, max_frames):
+        self.sid = sid
+        self.frames = deque()
+        self.max_frames = max_frames
+        self.inflight = 0  # trames envoyées non acquittées
+        self.acks_seen = False  # le client acquitte les trames (fenêtre active)
+        self.last_send = 0.0
+        self.full_stats = True  # première trame: statistiques complètes
+        self.merged = 0  # trames fusionnées faute de place (client lent)
+        self.subscription = None  # Subscription (événement 'subscribe'), None = tout recevoir
+
+
+class PredictionEmitter:
+    """
+    Couche d'émission des prédictions temps réel
+
+    Le thread de capture appelle publish() (ajout en O(1) sous verrou, sans
+    I/O); un thread dédié regroupe les prédictions en trames périodiques
+    `real_time_batch` (toutes les `interval` secondes) contenant:
+    - predictions: prédictions de la période (sans le dict de features)
+    - summarized: nombre d'événements Low résumés par label sous charge
+    - stats: champs des statistiques modifiés depuis la trame précédente
+    - dropped: prédictions perdues (file pleine) depuis la trame précédente
+
+    Chaque client a sa propre file de trames. Un client qui acquitte les
+    trames (callback Socket.IO) a au plus `window` trames en vol; au-delà
+    ses trames s'accumulent puis sont fusionnées (Low résumés), si bien
+    qu'un dashboard lent ne bloque ni la capture ni les autres clients.
+
+    Un client peut s'abonner avec un filtre (voir Subscription): la trame
+    est filtrée une fois par filtre distinct et partagée par les clients
+    ayant le même abonnement.
+    """
+
+    def __init__(self, socketio, interval=0.25, max_batch=200, max_pending=10000, client_queue=8,
+                 window=2, ack_timeout=5.0, send_features=False, stats_source=None):
+        """
+        Args:
+            socketio: Instance Flask-SocketIO
+            interval: Secondes entre deux trames
+            max_batch: Prédictions détaillées par trame (au-delà: seuls les Low sont résumés)
+            max_pending: Prédictions en attente max (au-delà: Low résumés dès publish)
+            client_queue: Trames en attente max par client (au-delà: fusion)
+            window: Trames non acquittées max par client
+            ack_timeout: Secondes avant de considérer une trame non acquittée comme perdue
+            send_features: Inclure le dict de features de chaque flow
+            stats_source: Fonction retournant les statistiques courantes (dict)
+        """
+        self.socketio = socketio
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.client_queue = client_queue
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.send_features = send_features
+        self.stats_source = stats_source
+
+        self.clients = {}
+        self._pending = deque()
+        self._summarized = {}
+        self._dropped = 0
+        self._last_stats = {}
+        self._seq = 0
+        self._samplers = {}  # clé de filtre -> accumulateur d'échantillonnage
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        self.counters = {
+            'published': 0,
+            'emitted': 0,
+            'summarized': 0,
+            'dropped': 0,
+            'frames': 0,
+            'merged_frames': 0
+        }
+
+    # ==================== Cycle de vie ====================
+    def start(self):
+        """Démarre le thread d'émission (idempotent)"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='prediction-emitter')
+        self._thread.start()
+        logger.info(f"📡 Émission groupée démarrée ({self.interval * 1000:.0f} ms par trame)")
+
+    def stop(self):
+        """Arrête le thread d'émission après une dernière trame"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.flush()
+
+    # ==================== Clients ====================
+    def add_client(self, sid):
+        """Enregistre un client connecté"""
+        with self._lock:
+            self.clients[sid] = ClientChannel(sid, self.client_queue)
+
+    def remove_client(self, sid):
+        """Oublie un client déconnecté (trames en attente abandonnées)"""
+        with self._lock:
+            self.clients.pop(sid, None)
+
+    def subscribe(self, sid, subscription):
+        """
+        Applique un filtre aux trames d'un client (None: tout recevoir)
+
+        Returns:
+            False si le client est inconnu
+        """
+        with self._lock:
+            channel = self.clients.get(sid)
+            if channel is None:
+                return False
+            channel.subscription = subscription
+            return True
+
+    # ==================== Publication ====================
+    def publish(self, prediction):
+        """
+        Ajoute une prédiction à la prochaine trame (appelé par le thread de capture)
+
+        Args:
+            prediction: Dict avec au moins prediction, confidence, risk
+        """
+        with self._lock:
+            self.counters['published'] += 1
+            if len(self._pending) >= self.max_pending:
+                if prediction.get('risk') == 'Low':
+                    self._summarize(prediction)
+                    return
+                # File saturée: libérer la plus ancienne (résumée si Low, perdue sinon)
+                oldest = self._pending.popleft()
+                if oldest.get('risk') == 'Low':
+                    self._summarize(oldest)
+                else:
+                    self._dropped += 1
+                    self.counters['dropped'] += 1
+            self._pending.append(prediction)
+
+    def flush(self):
+        """Construit la trame de la période et la distribue aux clients"""
+        start = time.perf_counter()
+        with self._lock:
+            batch, self._pending = self._pending, deque()
+            summarized, self._summarized = self._summarized, {}
+            dropped, self._dropped = self._dropped, 0
+            stats, changed = self._stats_delta()
+            if not self.clients:
+                return
+            if not (batch or summarized or dropped or changed):
+                frame = None
+            else:
+                frame = self._build_frame(batch, summarized, dropped, changed)
+            channels = list(self.clients.values())
+            frames = self._filter_frames(frame, channels)
+
+        for channel in channels:
+            key = channel.subscription.key if channel.subscription else None
+            self._enqueue(channel, frames.get(key), stats)
+            self._send(channel)
+
+        if frame is not None:
+            metrics.EMIT_SECONDS.observe(time.perf_counter() - start)
+
+    # ==================== Trames ====================
+    def _build_frame(self, batch, summarized, dropped, stats):
+        """Trame de la période: Low résumés au-delà de max_batch prédictions"""
+        if len(batch) > self.max_batch:
+            # Sous charge: événements à risque tous conservés, Low résumés par label
+            risky = []
+            for prediction in batch:
+                if prediction.get('risk') == 'Low':
+                    self._count(summarized, prediction)
+                else:
+                    risky.append(prediction)
+            batch = risky
+
+        self._seq += 1
+        predictions = [self._strip(p) for p in batch]
+        self.counters['emitted'] += len(predictions)
+        self.counters['frames'] += 1
+
+        return {
+            'seq': self._seq,
+            'timestamp': datetime.now().isoformat(),
+            'predictions': predictions,
+            'summarized': summarized,
+            'dropped': dropped,
+            'stats': stats
+        }
+
+    def _filter_frames(self, frame, channels):
+        """Trame filtrée par abonnement distinct (calculée une fois par filtre)"""
+        frames = {None: frame}
+        subscriptions = {c.subscription.key: c.subscription for c in channels if c.subscription}
+        self._samplers = {key: self._samplers.get(key, [0.0]) for key in subscriptions}
+        if frame is None or not subscriptions:
+            return frames
+
+        view = BatchView(frame['predictions'])
+        for key, subscription in subscriptions.items():
+            selected = subscription.select(view, self._samplers[key])
+            summarized = {label: n for label, n in frame['summarized'].items()
+                          if subscription.allows_label(label)}
+            if not (selected or summarized or frame['stats'] or frame['dropped']):
+                frames[key] = None
+                continue
+            frames[key] = dict(
+                frame,
+                predictions=[frame['predictions'][i] for i in selected],
+                summarized=summarized
+            )
+        return frames
+
+    def _stats_delta(self):
+        """Statistiques courantes et champs modifiés depuis la dernière trame"""
+        if self.stats_source is None:
+            return {}, {}
+        stats = dict(self.stats_source())
+        changed = {k: v for k, v in stats.items() if self._last_stats.get(k) != v}
+        self._last_stats = stats
+        return stats, changed
+
+    def _strip(self, prediction):
+        if self.send_features or 'features' not in prediction:
+            return prediction
+        return {k: v for k, v in prediction.items() if k != 'features'}
+
+    def _summarize(self, prediction):
+        self._count(self._summarized, prediction)
+
+    def _count(self, summarized, prediction):
+        label = str(prediction.get('prediction'))
+        summarized[label] = summarized.get(label, 0) + 1
+        self.counters['summarized'] += 1
+
+    # ==================== Files par client ====================
+    def _enqueue(self, channel, frame, stats):
+        with self._lock:
+            if channel.full_stats:
+                # Nouveau client: statistiques complètes dans sa première trame
+                base = frame or {'seq': self._seq, 'timestamp': datetime.now().isoformat(),
+                                 'predictions': [], 'summarized': {}, 'dropped': 0, 'stats': {}}
+                frame = dict(base, stats=dict(stats))
+                channel.full_stats = False
+            if frame is None:
+                return
+
+            channel.frames.append(frame)
+            while len(channel.frames) > channel.max_frames:
+                # Client en retard: fusionner les deux plus anciennes trames
+                oldest = channel.frames.popleft()
+                channel.frames[0] = self._merge(oldest, channel.frames[0])
+                channel.merged += 1
+                self.counters['merged_frames'] += 1
+
+    def _merge(self, older, newer):
+        """Fusionne deux trames: événements à risque conservés, Low résumés"""
+        summarized = dict(newer['summarized'])
+        for label, count in older['summarized'].items():
+            summarized[label] = summarized.get(label, 0) + count
+
+        kept = []
+        for prediction in older['predictions']:
+            if prediction.get('risk') == 'Low':
+                self._count(summarized, prediction)
+            else:
+                kept.append(prediction)
+
+        return dict(
+            newer,
+            predictions=kept + newer['predictions'],
+            summarized=summarized,
+            dropped=older['dropped'] + newer['dropped'],
+            stats={**older['stats'], **newer['stats']}
+        )
+
+    def _send(self, channel):
+        """Envoie les trames du client dans la limite de sa fenêtre d'acquittement"""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not channel.frames:
+                    return
+                if channel.acks_seen and channel.inflight >= self.window:
+                    if now - channel.last_send < self.ack_timeout:
+                        return
+                    channel.inflight = 0  # acquittements perdus: rouvrir la fenêtre
+                frame = channel.frames.popleft()
+                if channel.acks_seen:
+                    channel.inflight += 1
+                channel.last_send = now
+
+            try:
+                self.socketio.emit(BATCH_EVENT, frame, to=channel.sid,
+                                   callback=lambda *args, c=channel: self._on_ack(c))
+            except Exception as e:
+                logger.error("❌ Erreur émission vers %s: %s", channel.sid, e)
+                return
+
+    def _on_ack(self, channel):
+        with self._lock:
+            channel.acks_seen = True
+            channel.inflight = max(0, channel.inflight - 1)
+        self._send(channel)
+
+    # ==================== Boucle ====================
+    def _run(self):
+        while self._running:
+            started = time.monotonic()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("❌ Erreur émission groupée: %s", e)
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def get_stats(self):
+        """Compteurs d'émission et état des files clients"""
+        with self._lock:
+            return {
+                **self.counters,
+                'pending': len(self._pending),
+                'clients': {
+                    sid: {
+                        'queued_frames': len(c.frames),
+                        'inflight': c.inflight,
+                        'merged_frames': c.merged,
+                        'subscription': c.subscription.to_dict() if c.subscription else None
+                    }
+                    for sid, c in self.clients.items()
+                }
+            }
+
+
+def emitter_config(config):
+    """Paramètres de l'émetteur depuis la configuration Flask (SOCKET_*)"""
+    return {
+        'interval': config.get('SOCKET_EMIT_INTERVAL', 0.25),
+        'max_batch': config.get('SOCKET_MAX_BATCH', 200),
+        'client_queue': config.get('SOCKET_CLIENT_QUEUE', 8),
+        'send_features': config.get('SOCKET_SEND_FEATURES', False)
+    }
+
+
+# Instance globale
+_emitter = None
+
+
+def get_emitter(socketio, **kwargs):
+    """Récupère l'émetteur de prédictions (créé et démarré au premier appel)"""
+    global _emitter
+    if _emitter is None:
+        _emitter = PredictionEmitter(socketio, **kwargs)
+        _emitter.start()
+        metrics.watch_emitter(_emitter)
+    return _emitter
@@ -0,0 +1,91 @@
+import json
+import logging
+from importlib.util import find_spec
+import numpy as np
+from flask import Response, request
+from app.models.risk import RISK_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Encodeurs optionnels: orjson (JSON rapide, arrays NumPy natifs) et MessagePack (binaire)
+ORJSON_AVAILABLE = find_spec('orjson') is not None
+MSGPACK_AVAILABLE = find_spec('msgpack') is not None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+if ORJSON_AVAILABLE:
+    import orjson
+if MSGPACK_AVAILABLE:
+    import msgpack
+
+
+def columnar_payload(ids, flow_ids, label_codes, confidences, risk_codes, labels):
+    """
+    Résultats en colonnes: une liste par champ au lieu d'un dict par ligne
+
+    `label` et `risk` sont des index dans `labels` et `risk_levels`: les
+    chaînes ne sont envoyées qu'une fois, et la sérialisation se fait en
+    quelques tolist() au lieu d'un dict Python par prédiction.
+
+    Returns:
+        Dict {format, count, labels, risk_levels, id, flow_id, label, confidence, risk}
+    """
+    return {
+        'format': 'columnar',
+        'count': len(ids),
+        'labels': [str(label) for label in labels],
+        'risk_levels': list(RISK_LEVELS),
+        'id': np.asarray(ids).tolist(),
+        'flow_id': np.asarray(flow_ids).astype(str).tolist(),
+        'label': np.asarray(label_codes).tolist(),
+        'confidence': np.round(np.asarray(confidences, dtype=np.float64), 6).tolist(),
+        'risk': np.asarray(risk_codes).tolist()
+    }
+
+
+def requested_layout():
+    """Disposition demandée des prédictions: 'rows' (défaut) ou 'columnar' (?layout=columnar)"""
+    return 'columnar' if request.args.get('layout') == 'columnar' else 'rows'
+
+
+def requested_format():
+    """Encodage demandé: 'msgpack' (?format=msgpack ou Accept) si disponible, sinon 'json'"""
+    fmt = request.args.get('format')
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+        fmt = 'msgpack' if best in MSGPACK_MIMETYPES else 'json'
+
+    if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+        logger.warning("⚠️  MessagePack demandé mais msgpack n'est pas installé, réponse JSON")
+        return 'json'
+    return 'msgpack' if fmt == 'msgpack' else 'json'
+
+
+def encode(payload, fmt='json'):
+    """
+    Sérialise une réponse
+
+    Returns:
+        (bytes, mimetype)
+    """
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, default=_to_builtin), 'application/msgpack'
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY), 'application/json'
+    return json.dumps(payload, default=_to_builtin, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8'), 'application/json'
+
+
+def make_response(payload, status=200, fmt=None):
+    """Réponse Flask encodée au format demandé par le client (voir requested_format)"""
+    body, mimetype = encode(payload, fmt or requested_format())
+    return Response(body, status=status, mimetype=mimetype)
+
+
+def _to_builtin(value):
+    """Types NumPy restants -> types Python"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
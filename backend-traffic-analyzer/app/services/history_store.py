@@ -0,0 +1,416 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import tempfile
+import threading
+import logging
+from contextlib import closing
+from datetime import datetime
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Features conservées par flow: capture réseau (app.py) et colonnes CIC (service temps réel)
+KEY_FEATURES = (
+    'flow_duration', 'total_fwd_packets', 'total_backward_packets', 'flow_bytes_s', 'flow_packets_s',
+    'average_packet_size', 'syn_flag_count', 'fin_flag_count', 'rst_flag_count',
+    'Src Port', 'Dst Port', 'Protocol', 'Flow Duration', 'Tot Fwd Pkts', 'Tot Bwd Pkts',
+    'Flow Byts/s', 'Flow Pkts/s'
+)
+
+RETENTION_INTERVAL = 60.0  # secondes entre deux purges
+DELETE_CHUNK = 10000  # lignes supprimées par transaction (purge)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS flows (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        flow_id TEXT,
+        label TEXT NOT NULL,
+        confidence REAL,
+        risk TEXT,
+        packets INTEGER,
+        bytes INTEGER,
+        duration REAL,
+        features TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_flows_ts ON flows (ts)",
+    "CREATE INDEX IF NOT EXISTS idx_flows_label_ts ON flows (label, ts)"
+)
+
+_INSERT = ("INSERT INTO flows (ts, flow_id, label, confidence, risk, packets, bytes, duration, features) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+_COLUMNS = ('id', 'ts', 'flow_id', 'label', 'confidence', 'risk', 'packets', 'bytes', 'duration', 'features')
+
+
+def parse_time(value):
+    """
+    Instant d'un paramètre de requête: epoch en secondes ou ISO 8601
+
+    Raises:
+        ValueError: Format non reconnu
+    """
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_cursor(value):
+    """
+    Curseur de pagination "ts:id" (next_cursor d'une page précédente)
+
+    Raises:
+        ValueError: Format non reconnu
+    """
+    if value is None or value == '':
+        return None
+    ts, _, row_id = value.rpartition(':')
+    return float(ts), int(row_id)
+
+
+def _json_default(value):
+    """Scalaires NumPy (features du service temps réel)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class HistoryStore:
+    """
+    Historique persistant des flows classifiés (SQLite en mode WAL)
+
+    Le thread de capture appelle record() (ajout en O(1) sous verrou, sans
+    I/O); un thread d'écriture insère les lignes en attente par lots, une
+    transaction par lot, toutes les `flush_interval` secondes ou dès que
+    `batch_size` lignes sont en attente. Si l'écriture prend du retard au-
+    delà de `max_pending` lignes, les nouvelles lignes sont perdues et
+    comptées plutôt que de ralentir la capture.
+
+    Chaque ligne contient l'instant, le flow, le label, la confiance, le
+    risque, les compteurs du flow et les features clés (JSON). Les index
+    (ts) et (label, ts) servent les requêtes par période et par label; le
+    mode WAL permet de les lire pendant les écritures. Une purge périodique
+    applique la rétention (âge max et nombre de lignes max).
+    """
+
+    def __init__(self, path=None, retention_hours=168.0, max_rows=5000000, batch_size=500,
+                 flush_interval=1.0, max_pending=50000, key_features=KEY_FEATURES):
+        """
+        Args:
+            path: Fichier SQLite (défaut: répertoire temporaire)
+            retention_hours: Âge max des lignes en heures (0: illimité)
+            max_rows: Nombre de lignes max, les plus anciennes sont purgées (0: illimité)
+            batch_size: Lignes en attente déclenchant une écriture immédiate
+            flush_interval: Délai max avant écriture des lignes en attente (secondes)
+            max_pending: Lignes en attente max (au-delà: perdues)
+            key_features: Features conservées pour chaque flow
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), 'traffic-history.sqlite3')
+        self.retention_hours = retention_hours
+        self.max_rows = max_rows
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.key_features = tuple(key_features)
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.counters = {
+            'recorded': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'expired': 0
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        # WAL: fsync au checkpoint seulement (une coupure peut perdre le dernier lot)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ==================== Cycle de vie ====================
+    def start(self):
+        """Démarre le thread d'écriture (idempotent)"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='history-writer')
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"📦 Historique des flows: {self.path}")
+
+    def stop(self):
+        """Arrête le thread d'écriture après avoir écrit les lignes en attente"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ==================== Écriture ====================
+    def record(self, prediction, features=None):
+        """
+        Ajoute un flow classifié à l'historique (appelé par le thread de capture)
+
+        Args:
+            prediction: Dict avec flow_id, prediction, confidence, risk et
+                optionnellement features et flow_stats
+            features: Features du flow si absentes de prediction
+
+        Returns:
+            False si la ligne est perdue (écriture en retard)
+        """
+        if features is None:
+            features = prediction.get('features')
+        flow_stats = prediction.get('flow_stats') or {}
+        row = (
+            time.time(),
+            prediction.get('flow_id'),
+            str(prediction['prediction']),
+            float(prediction['confidence']),
+            prediction.get('risk'),
+            flow_stats.get('packets'),
+            flow_stats.get('bytes'),
+            flow_stats.get('duration'),
+            {name: features[name] for name in self.key_features if name in features} if features else None
+        )
+
+        with self._cond:
+            self.counters['recorded'] += 1
+            if len(self._pending) >= self.max_pending:
+                self.counters['dropped'] += 1
+                return False
+            self._pending.append(row)
+            if len(self._pending) == self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self):
+        """Écrit immédiatement les lignes en attente (hors thread d'écriture: tests, arrêt)"""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if batch:
+            with closing(self._connect()) as conn:
+                self._write(conn, batch)
+
+    def _run(self):
+        conn = self._connect()
+        next_retention = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    if self._running and len(self._pending) < self.batch_size:
+                        self._cond.wait(self.flush_interval)
+                    batch, self._pending = self._pending, []
+                    running = self._running
+
+                if batch:
+                    self._write(conn, batch)
+
+                if time.monotonic() >= next_retention:
+                    self._apply_retention(conn)
+                    next_retention = time.monotonic() + RETENTION_INTERVAL
+
+                if not running:
+                    break
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        """Insère un lot dans une transaction"""
+        start = time.perf_counter()
+        try:
+            rows = [
+                row[:8] + (json.dumps(row[8], default=_json_default) if row[8] else None,)
+                for row in batch
+            ]
+            with conn:
+                conn.executemany(_INSERT, rows)
+        except Exception as e:
+            self.counters['failed'] += len(batch)
+            logger.error("❌ Erreur écriture historique (%d lignes perdues): %s", len(batch), e)
+            return
+        self.counters['written'] += len(batch)
+        metrics.HISTORY_WRITE_SECONDS.observe(time.perf_counter() - start)
+
+    # ==================== Rétention ====================
+    def _apply_retention(self, conn):
+        """Purge par âge puis par nombre de lignes, par tranches (transactions courtes)"""
+        try:
+            if self.retention_hours > 0:
+                cutoff = time.time() - self.retention_hours * 3600
+                self._delete(conn, "SELECT id FROM flows WHERE ts < ? ORDER BY ts LIMIT ?", (cutoff,))
+            if self.max_rows > 0:
+                last_id = conn.execute("SELECT MAX(id) FROM flows").fetchone()[0]
+                if last_id is not None and last_id > self.max_rows:
+                    # id croissant avec l'insertion: les max_rows derniers ids sont conservés
+                    self._delete(conn, "SELECT id FROM flows WHERE id <= ? ORDER BY id LIMIT ?",
+                                 (last_id - self.max_rows,))
+        except Exception as e:
+            logger.error("❌ Erreur purge historique: %s", e)
+
+    def _delete(self, conn, select, params):
+        while True:
+            with conn:
+                deleted = conn.execute(
+                    f"DELETE FROM flows WHERE id IN ({select})", params + (DELETE_CHUNK,)
+                ).rowcount
+            self.counters['expired'] += deleted
+            if deleted < DELETE_CHUNK:
+                return
+
+    # ==================== Lecture ====================
+    @staticmethod
+    def _where(start, end, labels, risks, min_confidence):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if labels:
+            clauses.append(f"label IN ({', '.join('?' * len(labels))})")
+            params.extend(labels)
+        if risks:
+            clauses.append(f"risk IN ({', '.join('?' * len(risks))})")
+            params.extend(risks)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, start=None, end=None, labels=None, risks=None, min_confidence=None, limit=100,
+              cursor=None):
+        """
+        Flows de la période [start, end[, du plus récent au plus ancien
+
+        Args:
+            start, end: Bornes en secondes epoch (None: non bornée)
+            labels: Labels acceptés (None: tous)
+            risks: Niveaux de risque acceptés (None: tous)
+            min_confidence: Confiance minimale
+            limit: Nombre de flows max
+            cursor: (ts, id) du dernier flow de la page précédente
+
+        Returns:
+            Dict avec items et next_cursor ("ts:id" à repasser en `cursor`
+            pour la page suivante, None si la période est épuisée)
+        """
+        where, params = self._where(start, end, labels, risks, min_confidence)
+        if cursor is not None:
+            # Tri (ts, id): les flows de même ts ne sont ni sautés ni répétés entre deux pages
+            where += (' AND ' if where else ' WHERE ') + "(ts, id) < (?, ?)"
+            params.extend(cursor)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM flows{where} ORDER BY ts DESC, id DESC LIMIT ?"
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+
+        items = []
+        for row in rows:
+            item = dict(zip(_COLUMNS, row))
+            item['timestamp'] = datetime.fromtimestamp(item['ts']).isoformat()
+            item['prediction'] = item.pop('label')
+            item['features'] = json.loads(item['features']) if item['features'] else None
+            items.append(item)
+
+        last = items[-1] if len(items) == limit else None
+        return {
+            'items': items,
+            'next_cursor': f"{last['ts']!r}:{last['id']}" if last else None
+        }
+
+    def summary(self, start=None, end=None, labels=None, risks=None, min_confidence=None):
+        """Nombre de flows et confiance moyenne par label et niveau de risque sur la période"""
+        where, params = self._where(start, end, labels, risks, min_confidence)
+        sql = (f"SELECT label, risk, COUNT(*), AVG(confidence), MIN(ts), MAX(ts) FROM flows{where} "
+               "GROUP BY label, risk ORDER BY COUNT(*) DESC")
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return {
+            'total': sum(row[2] for row in rows),
+            'groups': [
+                {
+                    'prediction': label,
+                    'risk': risk,
+                    'count': count,
+                    'avg_confidence': round(avg, 4) if avg is not None else None,
+                    'first_ts': first,
+                    'last_ts': last
+                }
+                for label, risk, count, avg, first, last in rows
+            ]
+        }
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def get_stats(self):
+        """Compteurs, lignes en attente et taille des fichiers de la base"""
+        size = 0
+        for suffix in ('', '-wal'):
+            try:
+                size += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {
+            'path': self.path,
+            'pending': self.pending,
+            'size_bytes': size,
+            'retention_hours': self.retention_hours,
+            'max_rows': self.max_rows,
+            **self.counters
+        }
+
+
+def history_config(config):
+    """Paramètres de l'historique depuis la configuration Flask (HISTORY_*)"""
+    return {
+        'path': config.get('HISTORY_PATH'),
+        'retention_hours': config.get('HISTORY_RETENTION_HOURS', 168.0),
+        'max_rows': config.get('HISTORY_MAX_ROWS', 5000000),
+        'batch_size': config.get('HISTORY_BATCH_SIZE', 500),
+        'flush_interval': config.get('HISTORY_FLUSH_INTERVAL', 1.0),
+        'max_pending': config.get('HISTORY_MAX_PENDING', 50000),
+        'key_features': config.get('HISTORY_FEATURES') or KEY_FEATURES
+    }
+
+
+# Instance globale
+_history_store = None
+
+
+def get_history_store(**kwargs):
+    """Récupère l'historique des flows (créé et démarré au premier appel)"""
+    global _history_store
+    if _history_store is None:
+        _history_store = HistoryStore(**kwargs)
+        _history_store.start()
+        metrics.watch_history_store(_history_store)
+    return _history_store
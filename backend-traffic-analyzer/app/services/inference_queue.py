@@ -0,0 +1,225 @@
+import os
+import threading
+import queue
+import time
+import weakref
+import logging
+from concurrent.futures import Future
+import numpy as np
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueue:
+    """
+    File d'attente de micro-batching devant le modèle
+
+    Les appelants soumettent des lignes de features et récupèrent un Future.
+    Un thread worker regroupe les lignes et appelle la fonction de prédiction
+    une seule fois par lot, dès que le lot atteint `max_batch_size` lignes
+    ou que `max_delay` secondes se sont écoulées depuis la première ligne.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_delay=0.005):
+        """
+        Args:
+            predict_fn: Fonction appelée avec un lot [samples, ...]. Elle
+                retourne un array ou un tuple d'arrays indexés par échantillon
+                (ex: TrafficPredictor.predict -> (labels, confidences))
+            max_batch_size: Nombre maximum de lignes par lot
+            max_delay: Délai maximum (secondes) avant de vider un lot incomplet
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay = max(0.0, float(max_delay))
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending_rows = 0
+        self._outstanding = 0  # requêtes soumises non encore résolues
+        self._thread = None
+        self._running = False
+
+        self.stats = {
+            'batches': 0,
+            'rows': 0,
+            'max_batch_rows': 0,
+            'errors': 0
+        }
+
+        # Les threads ne survivent pas à fork() (workers gunicorn préchargés):
+        # le worker est recréé dans le processus enfant
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    # ==================== Cycle de vie ====================
+    def start(self):
+        """Démarre le thread worker"""
+        if self._running:
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._worker, name='inference-queue', daemon=True
+        )
+        self._thread.start()
+
+        logger.info(
+            f"✅ File d'inférence démarrée (batch={self.max_batch_size}, "
+            f"délai={self.max_delay * 1000:.1f} ms)"
+        )
+        return True
+
+    def stop(self, timeout=2):
+        """Arrête le worker après avoir vidé les requêtes en attente"""
+        if not self._running:
+            return False
+
+        self._running = False
+        self._queue.put(None)  # Réveiller le worker
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+        logger.info("🛑 File d'inférence arrêtée")
+        return True
+
+    def _after_fork(self):
+        """Réinitialise l'état de synchronisation dans l'enfant et relance le worker"""
+        was_running = self._running
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending_rows = 0
+        self._outstanding = 0
+        self._thread = None
+        self._running = False
+
+        if was_running:
+            self.start()
+
+    @property
+    def is_running(self):
+        return self._running
+
+    # ==================== API publique ====================
+    def submit(self, X):
+        """
+        Soumet une ou plusieurs lignes pour prédiction
+
+        Args:
+            X: Lignes prétraitées [samples, ...] (une ligne 1D est acceptée)
+
+        Returns:
+            Future résolu avec le résultat de predict_fn pour ces lignes
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        future = Future()
+
+        if not self._running:
+            # Pas de worker: exécution synchrone
+            self._run_batch([(X, future)])
+            return future
+
+        with self._lock:
+            self._pending_rows += X.shape[0]
+            self._outstanding += 1
+        self._queue.put((X, future))
+        return future
+
+    def predict(self, X, timeout=None):
+        """Soumet X et attend le résultat (remplacement direct de predict_fn)"""
+        return self.submit(X).result(timeout=timeout)
+
+    def wait_idle(self, timeout=None):
+        """Attend que toutes les requêtes soumises soient résolues"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout=timeout)
+
+    @property
+    def depth(self):
+        """Nombre de lignes en attente dans la file"""
+        return self._pending_rows
+
+    def get_stats(self):
+        """Retourne les statistiques de la file"""
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'depth': self.depth,
+            'avg_batch_rows': round(self.stats['rows'] / batches, 2) if batches else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_delay_ms': self.max_delay * 1000
+        }
+
+    # ==================== Worker ====================
+    def _worker(self):
+        """Boucle du worker: regroupe les requêtes puis prédit par lot"""
+        while self._running or not self._queue.empty():
+            item = self._queue.get()
+            if item is None:
+                continue
+
+            batch = [item]
+            rows = item[0].shape[0]
+            deadline = time.monotonic() + self.max_delay
+
+            # Compléter le lot jusqu'à la taille max ou l'échéance
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                batch.append(item)
+                rows += item[0].shape[0]
+
+            with self._lock:
+                self._pending_rows -= rows
+
+            self._run_batch(batch)
+
+            with self._idle:
+                self._outstanding -= len(batch)
+                if self._outstanding == 0:
+                    self._idle.notify_all()
+
+    def _run_batch(self, batch):
+        """Exécute predict_fn sur un lot et répartit les résultats"""
+        futures = [f for _, f in batch]
+        sizes = [x.shape[0] for x, _ in batch]
+
+        try:
+            X = batch[0][0] if len(batch) == 1 else np.concatenate([x for x, _ in batch], axis=0)
+            result = self.predict_fn(X)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error("❌ Erreur inférence par lot (%d lignes): %s", sum(sizes), e)
+            for f in futures:
+                f.set_exception(e)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['rows'] += sum(sizes)
+        self.stats['max_batch_rows'] = max(self.stats['max_batch_rows'], sum(sizes))
+        metrics.INFERENCE_BATCH_ROWS.observe(sum(sizes))
+
+        # Découper le résultat par requête
+        start = 0
+        for f, size in zip(futures, sizes):
+            end = start + size
+            if isinstance(result, tuple):
+                f.set_result(tuple(r[start:end] for r in result))
+            else:
+                f.set_result(result[start:end])
+            start = end
@@ -0,0 +1,183 @@
+import io
+import os
+import logging
+from importlib.util import find_spec
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Formats acceptés pour /predict et /jobs
+CSV_EXTENSIONS = ('.csv',)
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+# Colonnes conservées en plus des features (identifiant des résultats)
+ID_COLUMNS = ('Flow ID',)
+
+# pyarrow (optionnel) est importé à la première lecture
+PYARROW_AVAILABLE = find_spec('pyarrow') is not None
+
+
+def detect_format(source):
+    """Format d'un upload (FileStorage) ou d'un chemin, d'après son extension"""
+    name = getattr(source, 'filename', None) or (source if isinstance(source, str) else '')
+    ext = os.path.splitext(str(name).lower())[1]
+
+    if ext in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if ext in ARROW_EXTENSIONS:
+        return 'arrow'
+    return 'csv'
+
+
+def iter_table(source, columns=None, chunksize=50000, engine='auto'):
+    """
+    Lit un upload CSV / Parquet / Arrow IPC par chunks de DataFrames
+
+    Seules les colonnes utiles sont lues (features du scaler + Flow ID),
+    avec les features typées float32 dès le parsing. Parquet et Arrow IPC
+    évitent entièrement le parsing texte.
+
+    Args:
+        source: FileStorage Flask, chemin ou fichier binaire
+        columns: Features attendues (None: toutes les colonnes, sans typage)
+        chunksize: Lignes par chunk (approximatif pour le lecteur pyarrow)
+        engine: 'auto' (pyarrow si installé), 'pyarrow' ou 'c' (lecteur pandas)
+
+    Yields:
+        DataFrames contenant les colonnes projetées présentes dans le fichier
+    """
+    fmt = detect_format(source)
+    wanted = None if columns is None else list(columns) + [c for c in ID_COLUMNS if c not in columns]
+    stream = open(source, 'rb') if isinstance(source, str) else _binary_stream(source)
+
+    try:
+        if fmt == 'parquet':
+            yield from _iter_parquet(stream, wanted, chunksize)
+        elif fmt == 'arrow':
+            yield from _iter_arrow(stream, wanted)
+        elif engine == 'pyarrow' or (engine == 'auto' and PYARROW_AVAILABLE):
+            yield from _iter_csv_pyarrow(stream, wanted, columns, chunksize)
+        else:
+            yield from _iter_csv_pandas(stream, wanted, columns, chunksize)
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+
+def read_table(source, columns=None, engine='auto'):
+    """Lit tout l'upload en un DataFrame (voir iter_table)"""
+    import pandas as pd
+
+    chunks = list(iter_table(source, columns, chunksize=1_000_000, engine=engine))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns or []))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+# ==================== CSV ====================
+def _iter_csv_pandas(stream, wanted, columns, chunksize):
+    """Lecteur C de pandas: usecols + dtypes déclarés"""
+    import pandas as pd
+
+    kwargs = {}
+    if wanted is not None:
+        wanted_set = set(wanted)
+        kwargs['usecols'] = lambda c: c in wanted_set
+        kwargs['dtype'] = {c: np.float32 for c in columns}
+
+    try:
+        yield from pd.read_csv(stream, chunksize=chunksize, **kwargs)
+    except ValueError as e:
+        if 'dtype' not in kwargs:
+            raise
+        raise ValueError(f"Valeur non numérique dans une colonne de features: {e}") from e
+
+
+def _iter_csv_pyarrow(stream, wanted, columns, chunksize):
+    """Lecteur CSV pyarrow en streaming (multi-thread, colonnes projetées et typées)"""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    header = _read_csv_header(stream)
+
+    convert = {}
+    if wanted is not None:
+        present = [c for c in header if c in set(wanted)]
+        convert['include_columns'] = present
+        convert['column_types'] = {c: pa.float32() for c in present if c in set(columns)}
+
+    # Le lecteur découpe en blocs d'octets: ~200 octets par ligne de flow
+    block_size = max(1 << 20, min(chunksize * 200, 256 << 20))
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, **convert)
+    )
+    for batch in reader:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _read_csv_header(stream):
+    """Noms des colonnes (première ligne), puis retour au début du flux"""
+    import csv
+
+    start = stream.tell()
+    line = stream.readline().decode('utf-8-sig')
+    stream.seek(start)
+    return next(csv.reader([line]), [])
+
+
+# ==================== Parquet / Arrow ====================
+def _iter_parquet(stream, wanted, chunksize):
+    _require_pyarrow('Parquet')
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(stream)
+    present = None
+    if wanted is not None:
+        names = set(parquet.schema_arrow.names)
+        present = [c for c in wanted if c in names]
+
+    for batch in parquet.iter_batches(batch_size=chunksize, columns=present):
+        yield batch.to_pandas()
+
+
+def _iter_arrow(stream, wanted):
+    _require_pyarrow('Arrow IPC')
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # Format fichier (Feather v2) ou flux IPC
+    start = stream.tell()
+    try:
+        reader = ipc.open_file(stream)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        names = reader.schema.names
+    except pa.ArrowInvalid:
+        stream.seek(start)
+        reader = ipc.open_stream(stream)
+        batches = iter(reader)
+        names = reader.schema.names
+
+    present = None if wanted is None else [c for c in wanted if c in set(names)]
+    for batch in batches:
+        if present is not None:
+            batch = batch.select(present)
+        yield batch.to_pandas()
+
+
+# ==================== Utilitaires ====================
+def _binary_stream(source):
+    """Flux binaire seekable depuis un FileStorage ou un fichier"""
+    stream = getattr(source, 'stream', source)
+    if not (hasattr(stream, 'seekable') and stream.seekable()):
+        stream = io.BytesIO(stream.read())
+    return stream
+
+
+def _require_pyarrow(fmt):
+    if not PYARROW_AVAILABLE:
+        raise ValueError(f"Format {fmt} non supporté: installez pyarrow")
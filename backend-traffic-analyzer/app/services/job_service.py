@@ -0,0 +1,174 @@
+import os
+import time
+import uuid
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.services import prediction_service
+
+logger = logging.getLogger(__name__)
+
+
+class JobService:
+    """
+    Service de jobs de scoring asynchrones
+
+    Un upload CSV est enregistré sur disque puis scoré par chunks dans un pool
+    de workers. La progression est diffusée via Socket.IO (`job_progress`,
+    `job_completed`, `job_failed`) et consultable via GET /jobs/<id>; les
+    résultats complets sont écrits dans le ResultStore (GET /results/<id>).
+    """
+
+    def __init__(self, socketio, max_workers=2, chunksize=50000, upload_dir=None, max_jobs=100,
+                 result_store=None):
+        self.socketio = socketio
+        self.result_store = result_store
+        self.chunksize = chunksize
+        self.upload_dir = upload_dir or os.path.join(tempfile.gettempdir(), 'traffic-analyzer-jobs')
+        self.max_jobs = max_jobs
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scoring-job')
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_storage):
+        """
+        Enregistre le fichier et planifie le scoring
+
+        Returns:
+            Dict du job créé (status 'queued')
+        """
+        job_id = uuid.uuid4().hex
+        # Conserver l'extension: elle détermine le format (CSV / Parquet / Arrow)
+        ext = os.path.splitext(file_storage.filename or '')[1].lower() or '.csv'
+        path = os.path.join(self.upload_dir, f'{job_id}{ext}')
+        file_storage.save(path)
+
+        job = {
+            'job_id': job_id,
+            'filename': file_storage.filename,
+            'status': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'rows_done': 0,
+            'rows_per_s': 0,
+            'summary': {},
+            'stats': None,
+            'predictions': [],
+            'result_id': None,
+            'error': None
+        }
+
+        with self._lock:
+            self.jobs[job_id] = job
+            self._evict_finished()
+
+        self.executor.submit(self._run, job_id, path)
+
+        logger.info(f"📥 Job {job_id} planifié ({file_storage.filename})")
+        return dict(job)
+
+    def get(self, job_id):
+        """Retourne l'état d'un job (None si inconnu)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        """Liste les jobs connus (sans les prédictions)"""
+        with self._lock:
+            return [
+                {k: v for k, v in job.items() if k != 'predictions'}
+                for job in self.jobs.values()
+            ]
+
+    # ==================== Worker ====================
+    def _run(self, job_id, path):
+        """Score le fichier par chunks et publie la progression"""
+        job = self.jobs[job_id]
+        job['status'] = 'running'
+        job['started_at'] = datetime.now().isoformat()
+        start = time.monotonic()
+
+        def on_progress(counters):
+            elapsed = time.monotonic() - start
+            job['rows_done'] = counters.total_samples
+            job['rows_per_s'] = round(counters.total_samples / elapsed, 1) if elapsed > 0 else 0
+            job['summary'] = counters.summary()
+            job['stats'] = counters.stats()
+
+            self.socketio.emit('job_progress', {
+                'job_id': job_id,
+                'rows_done': job['rows_done'],
+                'rows_per_s': job['rows_per_s'],
+                'summary': job['summary'],
+                'stats': job['stats']
+            })
+
+        try:
+            result = prediction_service.predict_from_file_stream(
+                path,
+                chunksize=self.chunksize,
+                progress_callback=on_progress,
+                store=self.result_store
+            )
+
+            elapsed = time.monotonic() - start
+            job['summary'] = result['summary']
+            job['stats'] = result['stats']
+            job['predictions'] = result['predictions']
+            job['result_id'] = result.get('result_id')
+            job['rows_done'] = result['stats']['total_samples']
+            job['rows_per_s'] = round(job['rows_done'] / elapsed, 1) if elapsed > 0 else 0
+            job['status'] = 'completed'
+
+            logger.info(f"✅ Job {job_id} terminé: {job['rows_done']} lignes en {elapsed:.1f}s")
+            self.socketio.emit('job_completed', {
+                'job_id': job_id,
+                'rows_done': job['rows_done'],
+                'rows_per_s': job['rows_per_s'],
+                'summary': job['summary'],
+                'stats': job['stats'],
+                'result_id': job['result_id']
+            })
+
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+
+            logger.error(f"❌ Job {job_id} échoué: {e}")
+            self.socketio.emit('job_failed', {'job_id': job_id, 'error': str(e)})
+
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ==================== Utilitaires ====================
+    def _evict_finished(self):
+        """Oublie les plus anciens jobs terminés au-delà de max_jobs"""
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]['status'] in ('completed', 'failed'):
+                del self.jobs[job_id]
+
+
+# Instance globale
+_job_service = None
+
+
+def get_job_service(socketio, **kwargs):
+    """Récupère l'instance du service de jobs"""
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService(socketio, **kwargs)
+    return _job_service
@@ -0,0 +1,132 @@
+import time
+import threading
+import logging
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL des prédictions, devant la fonction de prédiction
+
+    La clé d'une ligne est son vecteur de features normalisé, quantifié au
+    pas `precision` (round(x / precision) en entiers) puis sérialisé en
+    octets: les flows quasi identiques (keepalives, requêtes DNS, sondes de
+    santé) partagent la même entrée. Seules les lignes absentes (ou
+    expirées) sont envoyées au modèle, une fois par clé distincte du lot.
+    """
+
+    def __init__(self, max_size=10000, ttl=300.0, precision=1e-3):
+        """
+        Args:
+            max_size: Nombre maximum d'entrées (éviction LRU au-delà)
+            ttl: Durée de vie d'une entrée en secondes (0: sans expiration)
+            precision: Pas de quantification des features normalisées
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl)
+        self.precision = float(precision)
+        self._scale = 1.0 / self.precision
+        self._entries = OrderedDict()  # clé -> (résultat de la ligne, instant d'insertion)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+    # ==================== API publique ====================
+    def wrap(self, predict_fn):
+        """Fonction de prédiction servie par le cache (même signature que predict_fn)"""
+        return lambda X: self.predict(predict_fn, X)
+
+    def predict(self, predict_fn, X):
+        """
+        Prédit un lot en ne calculant que les lignes absentes du cache
+
+        Args:
+            predict_fn: Fonction lot -> array ou tuple d'arrays indexés par ligne
+                (ex: TrafficPredictor.predict -> (labels, confidences))
+            X: Lot prétraité [samples, ...]
+
+        Returns:
+            Même structure que predict_fn(X)
+        """
+        X = np.asarray(X)
+        if len(X) == 0:
+            return predict_fn(X)
+        keys = self.keys(X)
+        rows = [None] * len(keys)
+        misses = {}  # clé -> indices des lignes du lot
+        now = time.monotonic()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and (self.ttl <= 0 or now - entry[1] <= self.ttl):
+                    self._entries.move_to_end(key)
+                    rows[i] = entry[0]
+                    self.stats['hits'] += 1
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                    self.stats['expired'] += 1
+                misses.setdefault(key, []).append(i)
+
+        if misses:
+            first = [indices[0] for indices in misses.values()]
+            computed = self._split_rows(predict_fn(X[first]))
+
+            with self._lock:
+                self.stats['misses'] += len(misses)
+                # Doublons du lot: servis par la même inférence
+                self.stats['hits'] += len(keys) - len(first) - sum(r is not None for r in rows)
+                for (key, indices), row in zip(misses.items(), computed):
+                    self._entries[key] = (row, now)
+                    self._entries.move_to_end(key)
+                    for i in indices:
+                        rows[i] = row
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+
+        if isinstance(rows[0], tuple):
+            return tuple(np.array(column) for column in zip(*rows))
+        return np.stack(rows)
+
+    def keys(self, X):
+        """Clés de cache des lignes de X (features quantifiées, en octets)"""
+        flat = X.reshape(len(X), -1)
+        quantized = np.rint(flat * self._scale)
+        np.clip(quantized, -2 ** 62, 2 ** 62, out=quantized)
+        quantized = np.ascontiguousarray(quantized, dtype=np.int64)
+        return [row.tobytes() for row in quantized]
+
+    def clear(self):
+        """Vide le cache (et recrée le verrou, ex: processus enfant après fork)"""
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_stats(self):
+        """Compteurs hits / misses, taux de succès et taille"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_size'] = self.max_size
+        stats['ttl'] = self.ttl
+        stats['precision'] = self.precision
+        return stats
+
+    # ==================== Utilitaires ====================
+    @staticmethod
+    def _split_rows(output):
+        """Résultat d'un lot -> une valeur par ligne (tuple si predict_fn retourne un tuple)"""
+        if isinstance(output, tuple):
+            return list(zip(*output))
+        return list(output)
@@ -1,96 +1,389 @@
 from app.models.predictor import TrafficPredictor
-import pandas as pd
+from app.services.inference_queue import InferenceQueue
+from app.services.prediction_cache import PredictionCache
+from app.services import ingestion
+from app.services.encoding import columnar_payload
+from app.models.risk import RISK_LEVELS, risk_names
+from app.startup import startup_timer
+from app import metrics
+import threading
+import time
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 # Instance globale du prédicteur
 _predictor = None
 
+# File de micro-batching partagée devant predictor.predict
+_inference_queue = None
 
-def initialize(model_path, scaler_path, encoder_path):
-    """Initialise le prédicteur avec les modèles de stage.py"""
-    global _predictor
+# Cache des prédictions temps réel (features quantifiées), None si désactivé
+_prediction_cache = None
+
+# Lecteur CSV: auto (pyarrow si installé) | pyarrow | c
+_csv_engine = 'auto'
+
+# État du chargement des modèles: pending | loading | ready | failed
+_load_state = {'status': 'pending', 'error': None, 'duration_ms': None}
+_load_lock = threading.Lock()
+
+
+class ModelNotReadyError(RuntimeError):
+    """Les modèles sont encore en cours de chargement (ou ont échoué)"""
+
+
+def initialize(model_path, scaler_path, encoder_path, batch_size=256, batch_delay=0.005,
+               engine='auto', weights_path=None, onnx_path=None, mmap=False, csv_engine='auto',
+               cache_size=10000, cache_ttl=300.0, cache_precision=1e-3):
+    """
+    Initialise le prédicteur avec les modèles de stage.py
     
-    if _predictor is None:
-        _predictor = TrafficPredictor()
-        _predictor.load(model_path, scaler_path, encoder_path)
+    La file d'inférence (flows temps réel) passe par un PredictionCache de
+    `cache_size` entrées (0: désactivé). Le scoring de fichiers (/predict,
+    /jobs) appelle le prédicteur directement, hors file et hors cache: ses
+    totaux ne dépendent pas des approximations du cache (de même dans app.py,
+    dont /predict utilise batch_predict).
+    """
+    global _predictor, _inference_queue, _csv_engine, _prediction_cache
+    
+    _csv_engine = csv_engine
+    
+    _set_load_state('loading')
+    start = time.perf_counter()
+    
+    try:
+        if _predictor is None:
+            predictor = TrafficPredictor()
+            predictor.load(model_path, scaler_path, encoder_path,
+                           engine=engine, weights_path=weights_path, onnx_path=onnx_path,
+                           mmap=mmap)
+            for name, seconds in predictor.load_timings.items():
+                startup_timer.record(f'model.{name}', seconds)
+            _predictor = predictor
+        
+        if _inference_queue is None:
+            predict_fn = _predictor.predict
+            if cache_size > 0:
+                _prediction_cache = PredictionCache(cache_size, ttl=cache_ttl, precision=cache_precision)
+                predict_fn = _prediction_cache.wrap(predict_fn)
+                metrics.watch_prediction_cache(_prediction_cache)
+            _inference_queue = InferenceQueue(
+                predict_fn,
+                max_batch_size=batch_size,
+                max_delay=batch_delay
+            )
+            _inference_queue.start()
+            metrics.watch_inference_queue(_inference_queue)
+    
+    except Exception as e:
+        _set_load_state('failed', error=str(e), duration=time.perf_counter() - start)
+        raise
+    
+    _set_load_state('ready', duration=time.perf_counter() - start)
+
+
+def initialize_async(*args, **kwargs):
+    """
+    Charge les modèles dans un thread d'arrière-plan
+    
+    Le serveur répond immédiatement (/ping, /health); l'avancement est
+    exposé par get_load_status(). Mêmes arguments que initialize().
+    """
+    def load():
+        try:
+            initialize(*args, **kwargs)
+            startup_timer.log("Démarrage (modèles prêts)")
+        except Exception as e:
+            logger.error(f"❌ Erreur chargement modèles (arrière-plan): {e}")
+    
+    _set_load_state('loading')
+    thread = threading.Thread(target=load, name='model-loader', daemon=True)
+    thread.start()
+    return thread
+
+
+def after_fork():
+    """
+    À appeler dans chaque worker après fork() (hook post_fork de gunicorn)
+    
+    Le scaler, l'encodeur et les poids NumPy chargés par le master restent
+    partagés (copy-on-write / mmap). Les moteurs liés à un runtime natif
+    (Keras, ONNX Runtime) ne survivent pas au fork et sont rechargés.
+    La file d'inférence redémarre d'elle-même (os.register_at_fork).
+    """
+    if _prediction_cache is not None:
+        _prediction_cache.clear()
+    
+    if _predictor is None or getattr(_predictor.model, 'fork_safe', False):
+        return
+    
+    start = time.perf_counter()
+    _predictor.reload_engine()
+    logger.info(f"🔁 Moteur '{_predictor.engine}' rechargé après fork ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def mark_failed(error):
+    """
+    Signale que les modèles ne seront pas chargés (fichiers absents, erreur au démarrage)
+    
+    /health rapporte alors l'échec au lieu d'attendre un chargement qui n'arrivera pas.
+    """
+    _set_load_state('failed', error=str(error))
+
+
+def _set_load_state(status, error=None, duration=None):
+    with _load_lock:
+        _load_state['status'] = status
+        _load_state['error'] = error
+        if duration is not None:
+            _load_state['duration_ms'] = round(duration * 1000, 1)
+
+
+def get_load_status():
+    """État du chargement des modèles (status, error, duration_ms)"""
+    with _load_lock:
+        return dict(_load_state)
+
+
+def is_ready():
+    """Vrai quand le prédicteur et la file d'inférence sont disponibles"""
+    return _load_state['status'] == 'ready'
 
 
 def get_predictor():
     """Récupère l'instance du prédicteur"""
     if _predictor is None:
+        status = get_load_status()
+        if status['status'] == 'loading':
+            raise ModelNotReadyError("Modèles en cours de chargement, réessayez dans quelques secondes")
+        if status['status'] == 'failed':
+            raise ModelNotReadyError(f"Échec du chargement des modèles: {status['error']}")
         raise RuntimeError("Prédicteur non initialisé")
     return _predictor
 
 
-def predict_from_file(file_storage):
+def get_prediction_cache():
+    """Récupère le cache de prédictions (None si désactivé)"""
+    return _prediction_cache
+
+
+def get_inference_queue():
+    """Récupère la file d'inférence partagée"""
+    if _inference_queue is None:
+        raise RuntimeError("File d'inférence non initialisée")
+    return _inference_queue
+
+
+def predict_from_file(file_storage, store=None, layout='rows'):
     """
-    Fait une prédiction à partir d'un fichier CSV
+    Fait une prédiction à partir d'un fichier CSV, Parquet ou Arrow IPC
     
     Args:
         file_storage: Objet FileStorage de Flask
+        store: ResultStore où conserver tous les résultats (optionnel)
+        layout: 'rows' (un dict par prédiction) ou 'columnar' (voir columnar_payload)
         
     Returns:
-        Dict avec predictions, summary, stats
+        Dict avec predictions, summary, stats (+ result_id si store)
     """
     try:
-        # Lire le CSV
-        df = pd.read_csv(file_storage)
-        logger.info(f"📊 CSV chargé: {len(df)} lignes, {len(df.columns)} colonnes")
-        
-        # Prédiction
         predictor = get_predictor()
-        results = predictor.predict_batch(df)
         
-        logger.info(f"✅ {len(results)} prédictions effectuées")
+        # Lire le fichier (colonnes du scaler uniquement, typées float32)
+        df = ingestion.read_table(file_storage, _feature_columns(predictor), engine=_csv_engine)
+        logger.info(f"📊 Fichier chargé: {len(df)} lignes, {len(df.columns)} colonnes")
         
-        # Statistiques
-        stats = calculate_stats(results, len(df))
-        summary = calculate_summary(results)
+        result = _score_chunks(predictor, [df], store=store, filename=getattr(file_storage, 'filename', None),
+                               layout=layout)
         
-        return {
-            'status': 'success',
-            'predictions': results[:100],  # Limiter pour performance
-            'summary': summary,
-            'stats': stats
-        }
+        logger.info(f"✅ {result['stats']['processed_samples']} prédictions effectuées")
+        return result
         
     except Exception as e:
         logger.error(f"❌ Erreur prédiction: {e}")
         raise
 
 
-def calculate_stats(results, total_samples):
-    """Calcule les statistiques globales"""
-    high_risk = sum(1 for r in results if r['risk'] == 'High')
-    medium_risk = sum(1 for r in results if r['risk'] == 'Medium')
-    low_risk = sum(1 for r in results if r['risk'] == 'Low')
+def predict_from_file_stream(file_storage, chunksize=50000, preview_size=100, progress_callback=None,
+                             store=None, layout='rows'):
+    """
+    Prédiction en streaming: lit le fichier (CSV, Parquet, Arrow) par chunks
     
-    # Niveau de menace global
-    high_ratio = high_risk / len(results) if results else 0
+    Chaque chunk est prétraité et prédit puis libéré; seuls les compteurs
+    cumulés et les `preview_size` premières prédictions sont conservés,
+    la mémoire reste donc bornée quelle que soit la taille du fichier.
+    Avec un `store`, tous les résultats sont écrits en colonnes (un segment
+    par chunk) et consultables par pages via /results/<result_id>.
     
-    if high_ratio > 0.5:
-        threat_level = 'Élevé'
-    elif high_ratio > 0.2:
-        threat_level = 'Modéré'
-    else:
-        threat_level = 'Faible'
-    
-    return {
-        'total_samples': total_samples,
-        'processed_samples': len(results),
-        'high_risk_count': high_risk,
-        'medium_risk_count': medium_risk,
-        'low_risk_count': low_risk,
-        'threat_level': threat_level
+    Args:
+        file_storage: Objet FileStorage de Flask (ou chemin / fichier)
+        chunksize: Nombre de lignes lues par chunk
+        preview_size: Nombre de prédictions renvoyées dans la réponse
+        progress_callback: Appelé après chaque chunk avec les compteurs cumulés
+        store: ResultStore où conserver tous les résultats (optionnel)
+        layout: 'rows' (un dict par prédiction) ou 'columnar' (voir columnar_payload)
+        
+    Returns:
+        Dict avec predictions, summary, stats (totaux exacts sur tout le fichier)
+    """
+    try:
+        predictor = get_predictor()
+        chunks = ingestion.iter_table(file_storage, _feature_columns(predictor),
+                                      chunksize=chunksize, engine=_csv_engine)
+        
+        result = _score_chunks(predictor, chunks, preview_size, progress_callback,
+                               store=store, filename=getattr(file_storage, 'filename', None),
+                               layout=layout)
+        
+        logger.info(f"✅ {result['stats']['processed_samples']} prédictions effectuées (streaming)")
+        return result
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur prédiction streaming: {e}")
+        raise
+
+
+def _score_chunks(predictor, chunks, preview_size=100, progress_callback=None, store=None, filename=None,
+                  layout='rows'):
+    """Score des chunks en colonnes codées: compteurs, aperçu et segments du ResultStore"""
+    counters = PredictionCounters()
+    preview = []  # colonnes (flow_ids, classes, confiances, risques) des premières lignes
+    writer = store.create(filename, labels=predictor.classes) if store is not None else None
+    
+    try:
+        for chunk in metrics.timed_iter(chunks, metrics.CSV_PARSE_SECONDS):
+            if chunk.empty:
+                continue
+            
+            offset = counters.total_samples
+            columns = predictor.predict_codes(chunk, id_offset=offset)
+            counters.update_codes(columns[1], columns[3], predictor.classes, len(chunk))
+            metrics.ROWS_SCORED.inc(len(chunk))
+            
+            if writer is not None:
+                writer.append(*columns, start=offset)
+            
+            missing = preview_size - sum(len(c[0]) for c in preview)
+            if missing > 0:
+                preview.append(tuple(column[:missing] for column in columns))
+            
+            logger.info("   ↳ %d lignes traitées", counters.total_samples)
+            
+            if progress_callback:
+                progress_callback(counters)
+    
+    except Exception as e:
+        if writer is not None:
+            writer.fail(e)
+        raise
+    
+    result = {
+        'status': 'success',
+        'predictions': _format_preview(predictor, preview, layout),
+        'summary': counters.summary(),
+        'stats': counters.stats()
     }
+    
+    if writer is not None:
+        writer.close(result['stats'], result['summary'])
+        result['result_id'] = writer.result_id
+        result['results_url'] = f'/results/{writer.result_id}'
+    
+    return result
+
+
+def _format_preview(predictor, preview, layout):
+    """Aperçu des premières prédictions, en lignes (dicts) ou en colonnes"""
+    if preview:
+        flow_ids, class_indices, confidences, risk_codes = (np.concatenate(c) for c in zip(*preview))
+    else:
+        flow_ids, class_indices, confidences, risk_codes = (np.zeros(0, dtype=int),) * 4
+    
+    if layout == 'columnar':
+        ids = np.arange(1, len(class_indices) + 1)
+        return columnar_payload(ids, flow_ids, class_indices, confidences, risk_codes, predictor.classes)
+    
+    return predictor.rows_to_dicts(flow_ids, predictor.classes[class_indices], confidences,
+                                   risk_names(risk_codes))
+
+
+def _feature_columns(predictor):
+    """Colonnes à lire (features du scaler), None si le schéma est inconnu"""
+    schema = predictor.schema
+    return schema.columns if schema is not None else None
+
+
+class PredictionCounters:
+    """Compteurs cumulés pour calculate_stats / calculate_summary (lecture par chunks)"""
+    
+    def __init__(self):
+        self.total_samples = 0
+        self.processed_samples = 0
+        self.risk_counts = {'High': 0, 'Medium': 0, 'Low': 0}
+        self.label_counts = {}
+    
+    def update(self, results, n_rows=None):
+        """Ajoute les résultats d'un chunk"""
+        self.total_samples += len(results) if n_rows is None else n_rows
+        self.processed_samples += len(results)
+        for r in results:
+            self.risk_counts[r['risk']] = self.risk_counts.get(r['risk'], 0) + 1
+            pred = r['prediction']
+            self.label_counts[pred] = self.label_counts.get(pred, 0) + 1
+    
+    def update_codes(self, class_indices, risk_codes, classes, n_rows=None):
+        """Ajoute les résultats codés d'un chunk (comptage vectorisé par bincount)"""
+        self.total_samples += len(class_indices) if n_rows is None else n_rows
+        self.processed_samples += len(class_indices)
+        
+        risk_counts = np.bincount(risk_codes, minlength=len(RISK_LEVELS))
+        for name, count in zip(RISK_LEVELS, risk_counts.tolist()):
+            self.risk_counts[name] = self.risk_counts.get(name, 0) + count
+        
+        label_counts = np.bincount(class_indices, minlength=len(classes))
+        for k in np.flatnonzero(label_counts).tolist():
+            name = str(classes[k])
+            self.label_counts[name] = self.label_counts.get(name, 0) + int(label_counts[k])
+    
+    def stats(self):
+        """Statistiques globales (même format que calculate_stats)"""
+        high_risk = self.risk_counts.get('High', 0)
+        
+        # Niveau de menace global
+        high_ratio = high_risk / self.processed_samples if self.processed_samples else 0
+        
+        if high_ratio > 0.5:
+            threat_level = 'Élevé'
+        elif high_ratio > 0.2:
+            threat_level = 'Modéré'
+        else:
+            threat_level = 'Faible'
+        
+        return {
+            'total_samples': self.total_samples,
+            'processed_samples': self.processed_samples,
+            'high_risk_count': high_risk,
+            'medium_risk_count': self.risk_counts.get('Medium', 0),
+            'low_risk_count': self.risk_counts.get('Low', 0),
+            'threat_level': threat_level
+        }
+    
+    def summary(self):
+        """Résumé par classe de prédiction"""
+        return dict(self.label_counts)
+
+
+def calculate_stats(results, total_samples):
+    """Calcule les statistiques globales"""
+    counters = PredictionCounters()
+    counters.update(results, total_samples)
+    return counters.stats()
 
 
 def calculate_summary(results):
     """Résumé par classe de prédiction"""
-    summary = {}
-    for r in results:
-        pred = r['prediction']
-        summary[pred] = summary.get(pred, 0) + 1
-    return summary
+    counters = PredictionCounters()
+    counters.update(results)
+    return counters.summary()
@@ -0,0 +1,208 @@
+import os
+import sys
+import math
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bornes de sécurité (production)
+MIN_INTERVAL = 0.002  # 500 Hz maximum
+MAX_DEPTH = 128  # frames conservées par pile (les plus proches de la feuille)
+
+# Modules dont une frame feuille signifie un thread en attente (verrou, file, socket)
+IDLE_MODULES = frozenset({
+    'threading.py', 'queue.py', 'selectors.py', 'socket.py', 'socketserver.py',
+    'ssl.py', 'connection.py', 'popen_fork.py', 'subprocess.py'
+})
+
+
+class ProfilerBusy(RuntimeError):
+    """Un profilage est déjà en cours dans ce processus"""
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage des piles de tous les threads
+
+    Le thread appelant relève sys._current_frames() toutes les `interval`
+    secondes pendant la durée demandée: aucun hook n'est installé sur les
+    threads profilés (capture, service temps réel, requêtes), le coût est
+    celui du relevé lui-même, mesuré et renvoyé (`overhead_pct`). Un seul
+    profilage à la fois par processus.
+
+    Le résultat contient les piles repliées (format collapsed de
+    flamegraph.pl / speedscope: "thread;f1;f2 N") et une table des
+    fonctions les plus chaudes (self = en feuille, total = dans la pile).
+    """
+
+    def __init__(self, max_seconds=60.0, default_interval=0.01):
+        """
+        Args:
+            max_seconds: Durée maximale d'un profilage
+            default_interval: Intervalle d'échantillonnage par défaut (secondes)
+        """
+        self.max_seconds = max_seconds
+        self.default_interval = default_interval
+        self._lock = threading.Lock()
+        self.last_run = None  # résumé du dernier profilage (sans les piles)
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def profile(self, seconds, interval=None, include_idle=False, top=30):
+        """
+        Échantillonne les piles pendant `seconds` secondes (bloquant)
+
+        Args:
+            seconds: Durée (bornée à max_seconds)
+            interval: Intervalle d'échantillonnage en secondes (>= MIN_INTERVAL)
+            include_idle: Conserver les threads en attente (verrou, file, socket)
+            top: Nombre de fonctions de la table
+
+        Returns:
+            Dict avec collapsed (texte), top, samples, threads, overhead_pct
+
+        Raises:
+            ValueError: Durée ou intervalle non fini (nan, inf)
+            ProfilerBusy: Si un profilage est déjà en cours
+        """
+        seconds = float(seconds)
+        interval = float(interval or self.default_interval)
+        # nan échappe aux bornes min/max: profilage sans fin ou sans pause
+        if not (math.isfinite(seconds) and math.isfinite(interval)):
+            raise ValueError("seconds et interval_ms doivent être des nombres finis")
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = max(interval, MIN_INTERVAL)
+
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Profilage déjà en cours")
+
+        try:
+            logger.info(f"🔬 Profilage démarré ({seconds:.0f} s, {1 / interval:.0f} Hz)")
+            stacks, samples, sampling_time, elapsed = self._sample(seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+        result = {
+            'pid': os.getpid(),
+            'duration_s': round(elapsed, 3),
+            'interval_ms': round(interval * 1000, 3),
+            'samples': samples,
+            'stacks': sum(stacks.values()),
+            'threads': sorted({stack[0] for stack in stacks}),
+            'include_idle': include_idle,
+            'overhead_pct': round(sampling_time / elapsed * 100, 3) if elapsed else 0.0,
+            'top': self._top(stacks, top)
+        }
+        self.last_run = dict(result, finished_at=time.time())
+        result['collapsed'] = self.collapse(stacks)
+
+        logger.info(f"🔬 Profilage terminé: {samples} relevés, surcoût {result['overhead_pct']}%")
+        return result
+
+    # ==================== Échantillonnage ====================
+    def _sample(self, seconds, interval, include_idle):
+        """Relève les piles jusqu'à l'échéance; retourne {pile: occurrences}"""
+        own = threading.get_ident()
+        stacks = {}
+        labels = {}  # code -> libellé de frame (calculé une fois)
+        samples = 0
+        sampling_time = 0.0
+
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_tick = start
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            next_tick += interval
+
+            tick = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and self._is_idle(frame):
+                    continue
+                stack = self._walk(frame, labels)
+                key = (names.get(ident, f'thread-{ident}'),) + stack
+                stacks[key] = stacks.get(key, 0) + 1
+            samples += 1
+            sampling_time += time.perf_counter() - tick
+
+        return stacks, samples, sampling_time, time.perf_counter() - start
+
+    @staticmethod
+    def _walk(frame, labels):
+        """Pile de la racine vers la feuille (MAX_DEPTH frames au plus)"""
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = (
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                ).replace(';', ':')
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    @staticmethod
+    def _is_idle(frame):
+        return os.path.basename(frame.f_code.co_filename) in IDLE_MODULES
+
+    # ==================== Rapports ====================
+    @staticmethod
+    def collapse(stacks):
+        """Piles repliées: une ligne "thread;racine;...;feuille occurrences" par pile"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in
+                 sorted(stacks.items(), key=lambda item: item[1], reverse=True)]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    @staticmethod
+    def _top(stacks, limit):
+        """Fonctions les plus chaudes: self (feuille) et total (présente dans la pile)"""
+        self_counts = {}
+        total_counts = {}
+        total = sum(stacks.values())
+
+        for stack, count in stacks.items():
+            frames = stack[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+            for label in set(frames):  # récursion comptée une fois par pile
+                total_counts[label] = total_counts.get(label, 0) + count
+
+        ranked = sorted(total_counts, key=lambda label: (self_counts.get(label, 0), total_counts[label]),
+                        reverse=True)[:limit]
+        return [
+            {
+                'function': label,
+                'self': self_counts.get(label, 0),
+                'total': total_counts[label],
+                'self_pct': round(self_counts.get(label, 0) / total * 100, 2) if total else 0.0,
+                'total_pct': round(total_counts[label] / total * 100, 2) if total else 0.0
+            }
+            for label in ranked
+        ]
+
+
+# Instance globale
+_profiler = None
+
+
+def get_profiler(max_seconds=60.0, default_interval=0.01):
+    """Récupère le profileur du processus"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(max_seconds, default_interval)
+    return _profiler
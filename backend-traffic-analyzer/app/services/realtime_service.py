@@ -1,10 +1,10 @@
 import threading
 import time
 import logging
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from app.services import prediction_service
+from app import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +12,10 @@ logger = logging.getLogger(__name__)
 class RealtimeService:
     """Service de capture et prédiction en temps réel"""
     
-    def __init__(self, socketio):
+    def __init__(self, socketio, emitter=None, history=None):
         self.socketio = socketio
+        self.emitter = emitter  # PredictionEmitter (trames groupées) ou None
+        self.history = history  # HistoryStore (historique persistant) ou None
         self.is_running = False
         self.thread = None
         self.interval = 1.0
@@ -23,6 +25,9 @@ class RealtimeService:
             'start_time': None,
             'classifications_per_minute': 0
         }
+        self.rate = metrics.RateMeter(window=60)  # classifications sur la dernière minute
+        if emitter is not None and emitter.stats_source is None:
+            emitter.stats_source = self.public_stats
     
     def start(self, interval=1.0):
         """Démarre la capture temps réel"""
@@ -30,11 +35,16 @@ class RealtimeService:
             logger.warning("⚠️  Service déjà actif")
             return False
         
+        if not prediction_service.is_ready():
+            logger.warning("⚠️  Modèles non disponibles, capture non démarrée")
+            return False
+        
         self.interval = interval
         self.is_running = True
         self.stats['start_time'] = datetime.now()
         self.stats['packets_captured'] = 0
         self.stats['predictions_made'] = 0
+        self.rate.reset()
         
         self.thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.thread.start()
@@ -55,31 +65,30 @@ class RealtimeService:
         return True
     
     def get_stats(self):
-        """Retourne les statistiques"""
+        """Retourne les statistiques (débit sur la dernière minute glissante)"""
         if self.stats['start_time']:
-            elapsed = (datetime.now() - self.stats['start_time']).total_seconds()
-            if elapsed > 0:
-                self.stats['classifications_per_minute'] = round(
-                    (self.stats['predictions_made'] / elapsed) * 60, 2
-                )
+            self.stats['classifications_per_minute'] = self.rate.per_minute()
         
         return self.stats
     
+    def public_stats(self):
+        """Statistiques sérialisables diffusées aux clients (sans start_time)"""
+        stats = self.get_stats()
+        return {k: v for k, v in stats.items() if k != 'start_time'}
+    
     def _capture_loop(self):
         """Boucle de capture (simule capture réseau)"""
         predictor = prediction_service.get_predictor()
+        inference_queue = prediction_service.get_inference_queue()
         
         while self.is_running:
             try:
                 # Simuler un paquet réseau
                 packet_data = self._simulate_packet()
                 
-                # Créer DataFrame
-                df = pd.DataFrame([packet_data])
-                
-                # Prédiction
-                X = predictor.preprocess(df)
-                labels, confidences = predictor.predict(X)
+                # Prédiction (enregistrement converti directement, sans DataFrame)
+                X = predictor.preprocess_records(packet_data)
+                labels, confidences = inference_queue.predict(X)
                 
                 # Résultat
                 result = {
@@ -90,17 +99,27 @@ class RealtimeService:
                     'risk': predictor._calculate_risk(labels[0], confidences[0])
                 }
                 
-                # Émettre via Socket.IO
-                self.socketio.emit('real_time_prediction', {'prediction': result})
+                # Émettre via Socket.IO (trame groupée si émetteur configuré)
+                if self.emitter is not None:
+                    self.emitter.publish(result)
+                else:
+                    self.socketio.emit('real_time_prediction', {'prediction': result})
+                
+                # Historique persistant (écriture par lots dans un thread dédié)
+                if self.history is not None:
+                    self.history.record(result, features=packet_data)
                 
                 # MAJ stats
                 self.stats['packets_captured'] += 1
                 self.stats['predictions_made'] += 1
+                self.rate.mark()
+                metrics.PACKETS.inc()
+                metrics.FLOWS_CLASSIFIED.labels(result['risk']).inc()
                 
                 time.sleep(self.interval)
                 
             except Exception as e:
-                logger.error(f"❌ Erreur capture: {e}")
+                logger.error("❌ Erreur capture: %s", e)
                 time.sleep(1)
     
     def _simulate_packet(self):
@@ -125,9 +144,9 @@ class RealtimeService:
 _realtime_service = None
 
 
-def get_realtime_service(socketio):
+def get_realtime_service(socketio, emitter=None, history=None):
     """Récupère l'instance du service temps réel"""
     global _realtime_service
     if _realtime_service is None:
-        _realtime_service = RealtimeService(socketio)
+        _realtime_service = RealtimeService(socketio, emitter, history)
     return _realtime_service
@@ -0,0 +1,265 @@
+import os
+import json
+import uuid
+import shutil
+import tempfile
+import threading
+import logging
+from datetime import datetime
+import numpy as np
+from app.models.risk import RISK_LEVELS, RISK_CODES as _RISK_CODES
+from app.services.encoding import columnar_payload
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStore:
+    """
+    Stockage colonnaire des résultats de scoring
+
+    Chaque jeu de résultats est un répertoire de segments .npz (un par
+    chunk scoré) contenant des colonnes typées: flow_id, code de label
+    (int16), confiance (float32) et code de risque (int8), plus un
+    meta.json (labels, segments, statut). Les résultats complets restent
+    consultables par pages filtrées sans garder de dicts en mémoire.
+    """
+
+    def __init__(self, base_dir=None, max_results=50):
+        """
+        Args:
+            base_dir: Répertoire des résultats (défaut: répertoire temporaire)
+            max_results: Nombre de jeux conservés (les plus anciens sont supprimés)
+        """
+        self.base_dir = base_dir or os.path.join(tempfile.gettempdir(), 'traffic-results')
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    # ==================== Écriture ====================
+    def create(self, filename=None, labels=None):
+        """
+        Crée un jeu de résultats et retourne son writer
+
+        Args:
+            filename: Nom du fichier scoré
+            labels: Labels du modèle (index de classe -> label); permet
+                d'écrire directement les index de classe (voir append)
+        """
+        result_id = uuid.uuid4().hex
+        path = os.path.join(self.base_dir, result_id)
+
+        with self._lock:
+            self._evict()
+            os.makedirs(path)
+
+        return ResultWriter(result_id, path, filename, labels)
+
+    # ==================== Lecture ====================
+    def meta(self, result_id):
+        """Métadonnées d'un jeu de résultats (None si inconnu)"""
+        if not result_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.base_dir, result_id, 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def list(self):
+        """Jeux de résultats disponibles, du plus récent au plus ancien"""
+        metas = [self.meta(name) for name in os.listdir(self.base_dir)]
+        metas = [m for m in metas if m]
+        metas.sort(key=lambda m: m['created_at'], reverse=True)
+        return [{k: v for k, v in m.items() if k != 'segments'} for m in metas]
+
+    def query(self, result_id, offset=0, limit=100, risk=None, label=None,
+              min_confidence=None, max_confidence=None, flow_id=None, layout='rows'):
+        """
+        Page de résultats filtrés
+
+        Args:
+            result_id: Identifiant du jeu de résultats
+            offset, limit: Fenêtre sur les lignes filtrées
+            risk: Niveaux de risque acceptés (liste)
+            label: Labels acceptés (liste)
+            min_confidence, max_confidence: Bornes de confiance incluses
+            flow_id: Préfixe du Flow ID
+            layout: 'rows' (items = liste de dicts) ou 'columnar'
+                (items = colonnes, voir columnar_payload)
+
+        Returns:
+            Dict avec total (lignes filtrées), items, ou None si inconnu
+        """
+        meta = self.meta(result_id)
+        if meta is None:
+            return None
+
+        labels = meta['labels']
+        label_codes = None
+        if label:
+            label_codes = [i for i, name in enumerate(labels) if name in set(label)]
+        risk_codes = [_RISK_CODES[r] for r in risk if r in _RISK_CODES] if risk else None
+
+        total = 0
+        page = []  # colonnes (ids, flow_ids, labels, confiances, risques) par segment
+        returned = 0
+        path = os.path.join(self.base_dir, result_id)
+
+        for segment in meta['segments']:
+            with np.load(os.path.join(path, segment['file']), allow_pickle=False) as data:
+                confidence = data['confidence']
+                mask = np.ones(confidence.shape[0], dtype=bool)
+                if label_codes is not None:
+                    mask &= np.isin(data['label'], label_codes)
+                if risk_codes is not None:
+                    mask &= np.isin(data['risk'], risk_codes)
+                if min_confidence is not None:
+                    mask &= confidence >= min_confidence
+                if max_confidence is not None:
+                    mask &= confidence <= max_confidence
+                if flow_id:
+                    mask &= np.char.startswith(data['flow_id'], flow_id)
+
+                matched = np.flatnonzero(mask)
+
+                # Lignes de la page dans ce segment
+                if returned < limit and offset < total + len(matched):
+                    start = max(0, offset - total)
+                    rows = matched[start:start + limit - returned]
+                    page.append((segment['start'] + rows + 1, data['flow_id'][rows], data['label'][rows],
+                                 confidence[rows], data['risk'][rows]))
+                    returned += len(rows)
+
+                total += len(matched)
+
+        if page:
+            columns = [np.concatenate(c) for c in zip(*page)]
+        else:
+            columns = [np.zeros(0, dtype=int)] * 5
+        items = columnar_payload(*columns, labels)
+        if layout != 'columnar':
+            items = [
+                {
+                    'id': row_id,
+                    'flow_id': fid,
+                    'prediction': labels[code],
+                    'confidence': conf,
+                    'risk': RISK_LEVELS[risk_code]
+                }
+                for row_id, fid, code, conf, risk_code in zip(
+                    items['id'], items['flow_id'], items['label'], items['confidence'], items['risk'])
+            ]
+
+        return {
+            'result_id': result_id,
+            'status': meta['status'],
+            'rows': meta['rows'],
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'items': items
+        }
+
+    def _evict(self):
+        """Supprime les jeux les plus anciens au-delà de max_results"""
+        names = [n for n in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, n))]
+        if len(names) < self.max_results:
+            return
+        names.sort(key=lambda n: os.path.getmtime(os.path.join(self.base_dir, n)))
+        for name in names[:len(names) - self.max_results + 1]:
+            shutil.rmtree(os.path.join(self.base_dir, name), ignore_errors=True)
+
+
+class ResultWriter:
+    """Écrit les segments d'un jeu de résultats (un appel append par chunk)"""
+
+    def __init__(self, result_id, path, filename=None, labels=None):
+        self.result_id = result_id
+        self.path = path
+        labels = [str(label) for label in labels] if labels is not None else []
+        self.labels = {name: i for i, name in enumerate(labels)}  # label -> code
+        self.meta = {
+            'result_id': result_id,
+            'filename': filename,
+            'status': 'writing',
+            'created_at': datetime.now().isoformat(),
+            'rows': 0,
+            'labels': labels,
+            'segments': [],
+            'stats': None,
+            'summary': None,
+            'error': None
+        }
+        self._write_meta()
+
+    def append(self, flow_ids, labels, confidences, risks, start=None):
+        """
+        Ajoute un segment
+
+        Args:
+            flow_ids, labels, confidences, risks: Colonnes (arrays) du chunk.
+                labels: noms, ou index de classe si les labels du modèle ont
+                été fournis à create(); risks: noms ou codes (RISK_LEVELS)
+            start: Index de la première ligne (défaut: à la suite)
+        """
+        labels = np.asarray(labels)
+        if labels.dtype.kind in 'iu':
+            codes = labels.astype(np.int16)
+        else:
+            uniques, inverse = np.unique(labels.astype(str), return_inverse=True)
+            for name in uniques:
+                if name not in self.labels:
+                    self.labels[name] = len(self.labels)
+                    self.meta['labels'].append(name)
+            codes = np.array([self.labels[name] for name in uniques], dtype=np.int16)[inverse]
+
+        risks = np.asarray(risks)
+        if risks.dtype.kind in 'iu':
+            risk_codes = risks.astype(np.int8)
+        else:
+            risk_lookup = np.vectorize(lambda r: _RISK_CODES.get(r, 0), otypes=[np.int8])
+            risk_codes = risk_lookup(risks) if len(risks) else np.zeros(0, np.int8)
+
+        index = len(self.meta['segments'])
+        name = f'seg_{index:05d}.npz'
+        np.savez(
+            os.path.join(self.path, name),
+            flow_id=np.asarray(flow_ids).astype(str),
+            label=codes,
+            confidence=np.asarray(confidences, dtype=np.float32),
+            risk=risk_codes
+        )
+
+        start = self.meta['rows'] if start is None else start
+        self.meta['segments'].append({'file': name, 'start': start, 'rows': len(labels)})
+        self.meta['rows'] += len(labels)
+        self._write_meta()
+
+    def close(self, stats=None, summary=None):
+        """Marque le jeu comme complet"""
+        self.meta.update({'status': 'complete', 'stats': stats, 'summary': summary})
+        self._write_meta()
+
+    def fail(self, error):
+        """Marque le jeu comme incomplet (erreur de scoring)"""
+        self.meta.update({'status': 'failed', 'error': str(error)})
+        self._write_meta()
+
+    def _write_meta(self):
+        # Écriture atomique: les lecteurs ne voient jamais un meta.json partiel
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+
+# Instance globale
+_result_store = None
+
+
+def get_result_store(base_dir=None, max_results=50):
+    """Récupère le stockage de résultats (créé au premier appel)"""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore(base_dir, max_results)
+    return _result_store
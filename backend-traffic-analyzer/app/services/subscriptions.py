@@ -0,0 +1,133 @@
+import re
+import ipaddress
+from app.models.risk import RISK_LEVELS, RISK_CODES
+
+# Adresses IPv4 d'un Flow ID ("10.0.0.1:443<->10.0.0.2:5123_6" ou "10.0.0.1-10.0.0.2-443-5123-6")
+_IPV4 = re.compile(r'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])')
+
+
+class Subscription:
+    """
+    Filtre d'abonnement d'un client au flux temps réel
+
+    Envoyé par le client avec l'événement Socket.IO `subscribe`:
+        {"min_risk": "High", "labels": ["DDoS", "Bot"], "flow_id": "192.168.1.",
+         "subnet": "10.0.0.0/8", "sample_rate": 0.5}
+    Tous les champs sont optionnels; un événement doit satisfaire chacun
+    des critères fournis. Les clients ayant le même filtre partagent la
+    même trame filtrée (calculée une seule fois par période).
+    """
+
+    def __init__(self, min_risk='Low', labels=None, flow_id=None, subnets=(), sample_rate=1.0):
+        self.min_risk = RISK_CODES[min_risk]
+        self.labels = frozenset(labels) if labels else None
+        self.flow_id = flow_id or None
+        self.subnets = tuple(subnets)
+        self.sample_rate = sample_rate
+        self.key = (self.min_risk, self.labels, self.flow_id, self.subnets, self.sample_rate)
+
+    @classmethod
+    def from_request(cls, data):
+        """Valide le message `subscribe` (ValueError si invalide)"""
+        if not isinstance(data, dict):
+            raise ValueError("Abonnement invalide: objet JSON attendu")
+
+        unknown = set(data) - {'min_risk', 'labels', 'flow_id', 'subnet', 'sample_rate'}
+        if unknown:
+            raise ValueError(f"Champs inconnus: {', '.join(sorted(unknown))}")
+
+        min_risk = data.get('min_risk') or 'Low'
+        if min_risk not in RISK_CODES:
+            raise ValueError(f"min_risk invalide: {min_risk} (attendu: {', '.join(RISK_LEVELS)})")
+
+        labels = data.get('labels')
+        if isinstance(labels, str):
+            labels = [labels]
+        if labels is not None and not (isinstance(labels, list) and all(isinstance(l, str) for l in labels)):
+            raise ValueError("labels doit être une liste de chaînes")
+
+        flow_id = data.get('flow_id')
+        if flow_id is not None and not isinstance(flow_id, str):
+            raise ValueError("flow_id doit être un préfixe (chaîne)")
+
+        subnet = data.get('subnet')
+        subnets = [subnet] if isinstance(subnet, str) else (subnet or [])
+        try:
+            subnets = [ipaddress.ip_network(s, strict=False) for s in subnets]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"subnet invalide: {e}")
+
+        sample_rate = data.get('sample_rate', 1.0)
+        if not isinstance(sample_rate, (int, float)) or not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate doit être dans ]0, 1]")
+
+        return cls(min_risk, labels, flow_id, subnets, float(sample_rate))
+
+    def to_dict(self):
+        """Filtre normalisé (réponse `subscribed`)"""
+        return {
+            'min_risk': RISK_LEVELS[self.min_risk],
+            'labels': sorted(self.labels) if self.labels else None,
+            'flow_id': self.flow_id,
+            'subnet': [str(s) for s in self.subnets] or None,
+            'sample_rate': self.sample_rate
+        }
+
+    def allows_label(self, label):
+        """Un événement Low résumé de ce label concerne-t-il l'abonné ?"""
+        return self.min_risk == 0 and (self.labels is None or label in self.labels)
+
+    def select(self, view, sampler):
+        """
+        Indices des prédictions de la trame retenues par le filtre
+
+        Args:
+            view: BatchView de la trame (attributs calculés une fois par période)
+            sampler: Accumulateur d'échantillonnage du groupe de clients (list [float])
+        """
+        selected = []
+        for i in range(len(view)):
+            if view.risks[i] < self.min_risk:
+                continue
+            if self.labels is not None and view.labels[i] not in self.labels:
+                continue
+            if self.flow_id and not view.flow_ids[i].startswith(self.flow_id):
+                continue
+            if self.subnets and not any(ip in net for ip in view.ips(i) for net in self.subnets):
+                continue
+            if self.sample_rate < 1.0:
+                # Échantillonnage déterministe: 1 événement sur 1/sample_rate
+                sampler[0] += self.sample_rate
+                if sampler[0] < 1.0:
+                    continue
+                sampler[0] -= 1.0
+            selected.append(i)
+        return selected
+
+
+class BatchView:
+    """Attributs des prédictions d'une trame, extraits une seule fois pour tous les filtres"""
+
+    def __init__(self, predictions):
+        self.predictions = predictions
+        self.risks = [RISK_CODES.get(p.get('risk'), 0) for p in predictions]
+        self.labels = [str(p.get('prediction')) for p in predictions]
+        self.flow_ids = [str(p.get('flow_id', '')) for p in predictions]
+        self._ips = {}
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def ips(self, i):
+        """Adresses du flow i (src_ip / dst_ip, sinon extraites du Flow ID), mises en cache"""
+        if i not in self._ips:
+            p = self.predictions[i]
+            raw = [p[k] for k in ('src_ip', 'dst_ip') if p.get(k)] or _IPV4.findall(self.flow_ids[i])
+            addresses = []
+            for value in raw:
+                try:
+                    addresses.append(ipaddress.ip_address(value))
+                except ValueError:
+                    pass
+            self._ips[i] = addresses
+        return self._ips[i]
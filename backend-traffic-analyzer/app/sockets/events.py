@@ -1,4 +1,7 @@
+from flask import current_app, request
 from app import socketio
+from app.services.emitter import get_emitter, emitter_config
+from app.services.subscriptions import Subscription
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,17 +11,52 @@ logger = logging.getLogger(__name__)
 def handle_connect():
     """Client WebSocket connecté"""
     logger.info("🔌 Client WebSocket connecté")
+    if current_app.config.get('SOCKET_EMIT_INTERVAL', 0) > 0:
+        get_emitter(socketio, **emitter_config(current_app.config)).add_client(request.sid)
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Client WebSocket déconnecté"""
     logger.info("🔌 Client WebSocket déconnecté")
+    if current_app.config.get('SOCKET_EMIT_INTERVAL', 0) > 0:
+        get_emitter(socketio, **emitter_config(current_app.config)).remove_client(request.sid)
 
 
 @socketio.on('ping')
 def handle_ping(data):
     """Test de connexion WebSocket"""
-    logger.info(f"📡 Ping reçu: {data}")
+    logger.info("📡 Ping reçu: %s", data)
     socketio.emit('pong', {'message': 'Pong!', 'timestamp': data.get('timestamp')})
 
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """
+    Abonnement filtré au flux temps réel
+
+    data: {"min_risk": "High", "labels": [...], "flow_id": "préfixe",
+           "subnet": "10.0.0.0/8", "sample_rate": 0.5} (champs optionnels)
+    """
+    if current_app.config.get('SOCKET_EMIT_INTERVAL', 0) <= 0:
+        socketio.emit('subscription_error', {'error': 'Abonnements indisponibles (SOCKET_EMIT_INTERVAL=0)'},
+                      to=request.sid)
+        return
+    
+    try:
+        subscription = Subscription.from_request(data or {})
+    except ValueError as e:
+        socketio.emit('subscription_error', {'error': str(e)}, to=request.sid)
+        return
+    
+    get_emitter(socketio, **emitter_config(current_app.config)).subscribe(request.sid, subscription)
+    logger.info("📡 Abonnement %s: %s", request.sid, subscription.to_dict())
+    socketio.emit('subscribed', subscription.to_dict(), to=request.sid)
+
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe():
+    """Retour au flux complet"""
+    if current_app.config.get('SOCKET_EMIT_INTERVAL', 0) > 0:
+        get_emitter(socketio, **emitter_config(current_app.config)).subscribe(request.sid, None)
+    socketio.emit('subscribed', None, to=request.sid)
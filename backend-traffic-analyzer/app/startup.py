@@ -0,0 +1,69 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Mesure la durée de chaque phase du démarrage
+
+    Les phases peuvent être enregistrées depuis plusieurs threads (ex:
+    chargement des modèles en arrière-plan); le rapport est exposé par /health.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self._last_mark = self.started
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Chronomètre le bloc `with` sous le nom `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark(self, name=None):
+        """
+        Termine une phase séquentielle: enregistre le temps écoulé depuis la
+        marque précédente sous `name` (sans nom: repart de maintenant)
+        """
+        now = time.perf_counter()
+        if name:
+            self.record(name, now - self._last_mark)
+        self._last_mark = now
+
+    def record(self, name, seconds):
+        """Enregistre la durée (secondes) d'une phase"""
+        with self._lock:
+            self.phases[name] = round(seconds * 1000, 1)
+
+    def elapsed(self):
+        """Secondes depuis le début du démarrage"""
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Durées par phase (ms) et temps écoulé depuis le début du démarrage"""
+        with self._lock:
+            return {
+                'phases_ms': dict(self.phases),
+                'since_start_ms': round(self.elapsed() * 1000, 1)
+            }
+
+    def log(self, title="Démarrage"):
+        """Affiche la répartition par phase"""
+        with self._lock:
+            phases = dict(self.phases)
+        logger.info(f"⏱️  {title}: {self.elapsed() * 1000:.0f} ms")
+        for name, ms in phases.items():
+            logger.info(f"   {name:<20} {ms:>8.1f} ms")
+
+
+# Timer du processus (créé au premier import du package app)
+startup_timer = StartupTimer()
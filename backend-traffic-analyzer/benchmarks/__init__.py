@@ -0,0 +1 @@
+"""Benchmarks hors ligne (voir run_benchmarks.py)"""
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmarks hors ligne des chemins de scoring et temps réel
+
+    python benchmarks/run_benchmarks.py                     # suite complète -> benchmarks/results/
+    python benchmarks/run_benchmarks.py --quick             # tailles réduites (vérification rapide)
+    python benchmarks/run_benchmarks.py --save-baseline     # enregistre benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --fail-on-regression --threshold 0.15
+
+Mesures (données synthétiques, graine fixe, moteur NumPy):
+- POST /predict: lignes/s pour plusieurs tailles de CSV
+- TrafficPredictor: latence p50/p99 d'une ligne et d'un lot de 256
+- File d'inférence: latence p50/p99 d'un flow isolé
+- Pipeline temps réel (app.py): paquets/s et flows/s au travers du
+  constructeur de flows (replay d'un pcap), latence de classify_flow
+- Mémoire: RSS maximal après chaque section
+
+Le cache de prédictions est désactivé par défaut (les flows synthétiques
+se ressemblent et masqueraient une régression du modèle): --cache le garde.
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import joblib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+logger = logging.getLogger('benchmarks')
+
+
+class Results:
+    """Métriques collectées: {nom: {value, unit, better}}"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.skipped = {}
+
+    def add(self, name, value, unit, better):
+        self.metrics[name] = {'value': round(float(value), 4), 'unit': unit, 'better': better}
+        print(f"   {name:<42} {value:>14,.3f} {unit}")
+
+    def latencies(self, name, samples):
+        """p50 / p99 d'une série de durées (secondes)"""
+        samples_ms = np.asarray(samples) * 1000
+        self.add(f'{name}.p50_ms', np.percentile(samples_ms, 50), 'ms', 'lower')
+        self.add(f'{name}.p99_ms', np.percentile(samples_ms, 99), 'ms', 'lower')
+
+    def peak_rss(self, section):
+        self.add(f'memory.peak_rss_mb.{section}', peak_rss_mb(), 'MB', 'lower')
+
+
+def peak_rss_mb():
+    """RSS maximal du processus (ru_maxrss: Ko sous Linux, octets sous macOS)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def timed(fn, iterations, warmup=1):
+    """Durées (secondes) de `iterations` appels après `warmup` appels ignorés"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ==================== Sections ====================
+def bench_predict(results, workdir, model_dir, sizes, iterations):
+    """POST /predict (application factory) sur des CSV synthétiques"""
+    from app import create_app
+    from app.services import prediction_service
+    from benchmarks.synthetic import make_flow_csv
+
+    app = create_app()
+    _quiet()
+    prediction_service.initialize(
+        os.path.join(model_dir, 'traffic_classifier_model.h5'),
+        os.path.join(model_dir, 'scaler.pkl'),
+        os.path.join(model_dir, 'label_encoder.pkl'),
+        engine='numpy',
+        weights_path=os.path.join(model_dir, 'traffic_classifier_weights.npz'),
+        cache_size=app.config['PREDICTION_CACHE_SIZE']
+    )
+    client = app.test_client()
+    scaler = prediction_service.get_predictor().scaler
+
+    for size in sizes:
+        path = os.path.join(workdir, f'flows_{size}.csv')
+        csv_bytes = make_flow_csv(path, scaler, size, seed=size)
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        def post():
+            response = client.post('/predict', data={'file': (BytesIO(content), 'flows.csv')},
+                                   content_type='multipart/form-data')
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict a échoué ({response.status_code}): {response.get_data(as_text=True)[:200]}")
+
+        samples = timed(post, iterations if size < 100000 else max(1, iterations // 2))
+        median = float(np.median(samples))
+        results.add(f'predict.rows_per_s.{size}', size / median, 'rows/s', 'higher')
+        results.add(f'predict.mb_per_s.{size}', csv_bytes / median / 1e6, 'MB/s', 'higher')
+
+    results.peak_rss('predict')
+    return prediction_service
+
+
+def bench_inference(results, prediction_service, iterations):
+    """Latence du prédicteur (ligne isolée, lot de 256) et de la file d'inférence"""
+    predictor = prediction_service.get_predictor()
+    n_features = predictor.scaler.n_features_in_
+    rng = np.random.default_rng(1)
+
+    single = rng.random((1, 1, n_features), dtype=np.float32)
+    batch = rng.random((256, 1, n_features), dtype=np.float32)
+    count = max(200, iterations * 100)
+
+    results.latencies('predictor.single_row', timed(lambda: predictor.predict(single), count, warmup=10))
+    batch_samples = timed(lambda: predictor.predict(batch), max(50, iterations * 20), warmup=3)
+    results.latencies('predictor.batch_256', batch_samples)
+    results.add('predictor.batch_256.rows_per_s', 256 / float(np.median(batch_samples)), 'rows/s', 'higher')
+
+    queue = prediction_service.get_inference_queue()
+    rows = rng.random((count, 1, 1, n_features), dtype=np.float32)
+    position = iter(range(10 ** 9))
+    results.latencies('queue.single_row', timed(lambda: queue.predict(rows[next(position) % count]),
+                                                count, warmup=10))
+    results.peak_rss('inference')
+
+
+def bench_realtime(results, workdir, packets, iterations):
+    """Pipeline temps réel de app.py: replay d'un pcap synthétique"""
+    from benchmarks.synthetic import make_pcap
+
+    pcap = os.path.join(workdir, 'flows.pcap')
+    packets_per_flow = 10
+    written = make_pcap(pcap, max(1, packets // packets_per_flow), packets_per_flow)
+
+    # app.py charge ses modèles depuis MODEL_DIR (répertoire synthétique, voir main)
+    spec = importlib.util.spec_from_file_location('traffic_app', os.path.join(ROOT, 'app.py'))
+    legacy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(legacy)
+    _quiet()
+    if legacy.model is None:
+        raise RuntimeError("Modèle non chargé par app.py")
+
+    reports = [legacy.replay_capture(pcap) for _ in range(max(1, iterations))]
+    best = max(reports, key=lambda r: r['packets_per_s'])
+    results.add('realtime.packets_per_s', best['packets_per_s'], 'packets/s', 'higher')
+    results.add('realtime.flows_per_s', best['flows_per_s'], 'flows/s', 'higher')
+    logger.info(f"pcap: {written} paquets, {best['flows']} flows")
+
+    features = {name: float(i + 1) for i, name in enumerate(legacy.EXPECTED_FEATURES)}
+    results.latencies('realtime.classify_flow', timed(lambda: legacy.classify_flow(features),
+                                                      max(200, iterations * 100), warmup=10))
+    results.peak_rss('realtime')
+
+
+# ==================== Comparaison ====================
+def compare(current, baseline, threshold):
+    """
+    Compare deux jeux de métriques
+
+    Returns:
+        Liste de (nom, valeur de référence, valeur courante, variation, régression)
+    """
+    rows = []
+    for name, metric in current.items():
+        reference = baseline.get(name)
+        if not reference or not reference['value']:
+            continue
+        change = (metric['value'] - reference['value']) / reference['value']
+        if metric['better'] == 'higher':
+            regression = change < -threshold
+        else:
+            regression = change > threshold
+        rows.append((name, reference['value'], metric['value'], change, regression))
+    return rows
+
+
+def environment():
+    """Contexte de la mesure (pour comparer des résultats comparables)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def _quiet():
+    """Les logs INFO de l'application faussent les mesures: seuls les avertissements restent"""
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ('app', 'werkzeug', 'engineio.server', 'socketio.server'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne (scoring et temps réel)")
+    parser.add_argument('--out', help="Fichier de résultats JSON (défaut: benchmarks/results/<date>.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Référence à comparer")
+    parser.add_argument('--save-baseline', action='store_true', help="Enregistrer les résultats comme référence")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="Tailles de CSV pour /predict")
+    parser.add_argument('--iterations', type=int, default=5, help="Répétitions par mesure")
+    parser.add_argument('--packets', type=int, default=200000, help="Paquets du pcap synthétique")
+    parser.add_argument('--quick', action='store_true', help="Tailles réduites (1000,10000 lignes, 20000 paquets)")
+    parser.add_argument('--only', help="Sections à exécuter: predict,inference,realtime")
+    parser.add_argument('--cache', action='store_true', help="Garder le cache de prédictions actif")
+    parser.add_argument('--model-dir', default=os.path.join(ROOT, 'model', 'model'),
+                        help="Scaler / encodeur / poids à réutiliser (générés s'ils sont absents)")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Variation tolérée (0.10 = 10%%)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Code de sortie 1 si régression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    iterations = max(1, args.iterations)
+    packets = args.packets
+    if args.quick:
+        sizes, iterations, packets = [s for s in sizes if s <= 10000] or [1000], min(iterations, 2), 20000
+    sections = set((args.only or 'predict,inference,realtime').split(','))
+
+    workdir = tempfile.mkdtemp(prefix='traffic-bench-')
+
+    # Configuration lue par create_app() et app.py à l'import
+    os.environ.setdefault('LAZY_MODEL_LOAD', '0')
+    os.environ.setdefault('INFERENCE_ENGINE', 'numpy')
+    os.environ.setdefault('RESULTS_DIR', os.path.join(workdir, 'results'))
+    os.environ.setdefault('HISTORY_PATH', os.path.join(workdir, 'history.sqlite3'))
+    if not args.cache:
+        os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    warnings.filterwarnings('ignore')
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    logger.setLevel(logging.INFO)
+
+    from benchmarks.synthetic import prepare_model_dir
+    model_dir = prepare_model_dir(workdir, args.model_dir)
+    os.environ['MODEL_DIR'] = model_dir
+    os.environ.setdefault('MODEL_WEIGHTS_PATH', os.path.join(model_dir, 'traffic_classifier_weights.npz'))
+    scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+    print(f"📂 Données synthétiques: {workdir} ({scaler.n_features_in_} features)")
+
+    results = Results()
+    prediction_service = None
+
+    if 'predict' in sections or 'inference' in sections:
+        print("⏳ POST /predict")
+        prediction_service = bench_predict(results, workdir, model_dir,
+                                           sizes if 'predict' in sections else [1000], iterations)
+    if 'inference' in sections:
+        print("⏳ Latence d'inférence")
+        bench_inference(results, prediction_service, iterations)
+    if 'realtime' in sections:
+        print("⏳ Pipeline temps réel")
+        try:
+            bench_realtime(results, workdir, packets, iterations)
+        except Exception as e:
+            # app.py dépend de modules optionnels (psutil, flask_cors...): section ignorée
+            print(f"⚠️  Section temps réel ignorée: {e}")
+            results.skipped['realtime'] = str(e)
+
+    report = {
+        'environment': environment(),
+        'parameters': {'sizes': sizes, 'iterations': iterations, 'packets': packets,
+                       'cache': args.cache, 'features': int(scaler.n_features_in_)},
+        'metrics': results.metrics,
+        'skipped': results.skipped
+    }
+
+    out = args.out or os.path.join(DEFAULT_RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Résultats: {out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Référence enregistrée: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"📦 Pas de référence ({args.baseline}): --save-baseline pour en créer une")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results.metrics, baseline.get('metrics', {}), args.threshold)
+    regressions = [row for row in rows if row[4]]
+
+    print(f"\nComparaison avec {args.baseline} (commit {baseline.get('environment', {}).get('commit')}):")
+    for name, reference, value, change, regression in rows:
+        flag = '❌' if regression else '  '
+        print(f"{flag} {name:<42} {reference:>14,.3f} -> {value:>14,.3f} ({change:+.1%})")
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+        return 1 if args.fail_on_regression else 0
+    print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Données synthétiques des benchmarks: modèle, CSV de flows et pcap
+
+Tout est généré localement (graine fixe) pour que les mesures soient
+reproductibles hors ligne, sans TensorFlow ni capture réseau.
+"""
+import json
+import os
+import shutil
+import struct
+import numpy as np
+import pandas as pd
+import joblib
+from app.models.engine import WEIGHTS_FORMAT_VERSION
+
+# Architecture de stage.py: LSTM(64) -> LSTM(32) -> Dense(softmax)
+LSTM_UNITS = (64, 32)
+
+SCALER_FILE = 'scaler.pkl'
+ENCODER_FILE = 'label_encoder.pkl'
+WEIGHTS_FILE = 'traffic_classifier_weights.npz'
+
+
+# ==================== Modèle ====================
+def prepare_model_dir(workdir, source_dir=None, seed=0):
+    """
+    Prépare workdir/model/model (passé en MODEL_DIR à create_app() et app.py)
+
+    Le scaler et l'encodeur sont copiés depuis `source_dir` s'ils existent
+    (sinon générés); les poids NumPy sont copiés s'ils existent, sinon
+    tirés au hasard avec l'architecture de stage.py: les débits mesurés
+    sont ceux du vrai modèle, seules les classes prédites diffèrent.
+
+    Returns:
+        Chemin du répertoire de modèles
+    """
+    model_dir = os.path.join(workdir, 'model', 'model')
+    os.makedirs(model_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    for name in (SCALER_FILE, ENCODER_FILE, WEIGHTS_FILE):
+        source = os.path.join(source_dir, name) if source_dir else None
+        if source and os.path.exists(source):
+            shutil.copy(source, os.path.join(model_dir, name))
+
+    if not os.path.exists(os.path.join(model_dir, SCALER_FILE)):
+        _make_scaler(os.path.join(model_dir, SCALER_FILE), rng)
+    if not os.path.exists(os.path.join(model_dir, ENCODER_FILE)):
+        _make_encoder(os.path.join(model_dir, ENCODER_FILE))
+
+    if not os.path.exists(os.path.join(model_dir, WEIGHTS_FILE)):
+        scaler = joblib.load(os.path.join(model_dir, SCALER_FILE))
+        encoder = joblib.load(os.path.join(model_dir, ENCODER_FILE))
+        make_weights(os.path.join(model_dir, WEIGHTS_FILE), scaler.n_features_in_, len(encoder.classes_), rng)
+
+    return model_dir
+
+
+def make_weights(path, n_features, n_classes, rng):
+    """Poids aléatoires au format de export_weights (moteur NumPy)"""
+    layers = []
+    arrays = {}
+    inputs = n_features
+
+    for units in LSTM_UNITS:
+        index = len(layers)
+        layers.append({
+            'type': 'lstm',
+            'units': units,
+            'activation': 'tanh',
+            'recurrent_activation': 'sigmoid',
+            'return_sequences': index < len(LSTM_UNITS) - 1
+        })
+        arrays[f'layer{index}_kernel'] = rng.normal(0, 0.2, (inputs, 4 * units))
+        arrays[f'layer{index}_recurrent_kernel'] = rng.normal(0, 0.2, (units, 4 * units))
+        arrays[f'layer{index}_bias'] = np.zeros(4 * units)
+        inputs = units
+
+    index = len(layers)
+    layers.append({'type': 'dense', 'units': n_classes, 'activation': 'softmax'})
+    arrays[f'layer{index}_kernel'] = rng.normal(0, 1.0, (inputs, n_classes))
+    arrays[f'layer{index}_bias'] = np.zeros(n_classes)
+
+    architecture = {'version': WEIGHTS_FORMAT_VERSION, 'layers': layers}
+    arrays = {k: v.astype(np.float32) for k, v in arrays.items()}
+    np.savez(path, architecture=np.array(json.dumps(architecture)), **arrays)
+
+
+def _make_scaler(path, rng, n_features=79):
+    from sklearn.preprocessing import MinMaxScaler
+
+    columns = [f'Feature {i}' for i in range(n_features)]
+    data = pd.DataFrame(rng.lognormal(5, 2, (1000, n_features)), columns=columns)
+    joblib.dump(MinMaxScaler().fit(data), path)
+
+
+def _make_encoder(path):
+    from sklearn.preprocessing import LabelEncoder
+
+    joblib.dump(LabelEncoder().fit(['BENIGN', 'Bot', 'DDoS', 'DoS Hulk', 'PortScan']), path)
+
+
+# ==================== CSV de flows ====================
+def make_flow_csv(path, scaler, rows, seed=0):
+    """
+    CSV de flows aux colonnes du scaler (+ Flow ID), valeurs dans la plage
+    vue à l'entraînement
+
+    Returns:
+        Taille du fichier en octets
+    """
+    rng = np.random.default_rng(seed)
+    columns = list(getattr(scaler, 'feature_names_in_', [f'Feature {i}' for i in range(scaler.n_features_in_)]))
+    low, high = scaler.data_min_, scaler.data_max_
+
+    df = pd.DataFrame(rng.random((rows, len(columns))) * (high - low) + low, columns=columns)
+    df.insert(0, 'Flow ID', [f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}-192.168.1.1-443-{i % 60000}-6'
+                             for i in range(rows)])
+    df.to_csv(path, index=False, float_format='%.6g')
+    return os.path.getsize(path)
+
+
+# ==================== Pcap ====================
+_ETH = struct.Struct('!6s6sH')
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_TCP = struct.Struct('!HHIIBBHHH')
+_RECORD = struct.Struct('<IIII')
+
+
+def make_pcap(path, n_flows, packets_per_flow=10, seed=0):
+    """
+    Pcap Ethernet/IPv4/TCP: `n_flows` connexions entrelacées, chacune
+    ouverte par SYN et fermée par FIN dans les deux sens
+
+    Returns:
+        Nombre de paquets écrits
+    """
+    rng = np.random.default_rng(seed)
+    packets_per_flow = max(4, packets_per_flow)
+    ts = 1_700_000_000.0
+    count = 0
+
+    with open(path, 'wb') as f:
+        # En-tête pcap classique (µs, little endian, Ethernet)
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+
+        # Flows entrelacés par groupes de 64 pour exercer la table de flows
+        for group in range(0, n_flows, 64):
+            flows = range(group, min(group + 64, n_flows))
+            for step in range(packets_per_flow):
+                for flow in flows:
+                    forward = step % 2 == 0
+                    if step == 0:
+                        flags = 0x02  # SYN
+                    elif step >= packets_per_flow - 2:
+                        flags = 0x11  # FIN + ACK (un par sens)
+                    else:
+                        flags = 0x18  # PSH + ACK
+                    payload = int(rng.integers(0, 1400)) if 0 < step < packets_per_flow - 2 else 0
+                    frame = _tcp_frame(flow, forward, flags, payload)
+
+                    ts += float(rng.exponential(1e-4))
+                    seconds = int(ts)
+                    f.write(_RECORD.pack(seconds, int((ts - seconds) * 1e6), len(frame), len(frame)))
+                    f.write(frame)
+                    count += 1
+
+    return count
+
+
+def _tcp_frame(flow, forward, flags, payload):
+    client = bytes((10, (flow >> 16) & 255, (flow >> 8) & 255, flow & 255))
+    server = bytes((192, 168, 1, 1 + flow % 16))
+    client_port = 1024 + flow % 60000
+    server_port = (80, 443, 53, 22)[flow % 4]
+
+    src, dst = (client, server) if forward else (server, client)
+    sport, dport = (client_port, server_port) if forward else (server_port, client_port)
+
+    tcp = _TCP.pack(sport, dport, 0, 0, 5 << 4, flags, 65535, 0, 0)
+    ip = _IPV4.pack(0x45, 0, 20 + len(tcp) + payload, 0, 0, 64, 6, 0, src, dst)
+    eth = _ETH.pack(b'\x00\x11\x22\x33\x44\x55', b'\x66\x77\x88\x99\xaa\xbb', 0x0800)
+    return eth + ip + tcp + bytes(payload)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Exporte le modèle LSTM entraîné par stage.py pour l'inférence sans TensorFlow
+
+    python export_model.py                        # poids .npz (moteur NumPy)
+    python export_model.py --onnx                 # + modèle .onnx (nécessite tf2onnx)
+    python export_model.py --model /chemin/traffic_classifier_model.h5 --check
+
+Par défaut le modèle est lu dans le répertoire des modèles de l'application
+(MODEL_DIR, défaut: model/model) et les fichiers exportés y sont écrits.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from app.models.engine import export_weights, export_onnx, NumpyEngine, model_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du modèle LSTM (npz / onnx)")
+    parser.add_argument('--model', default=os.path.join(model_dir(), 'traffic_classifier_model.h5'),
+                        help="Modèle Keras (.h5), défaut: MODEL_DIR/traffic_classifier_model.h5")
+    parser.add_argument('--out', help="Fichier de poids (.npz), défaut: à côté du modèle")
+    parser.add_argument('--onnx', nargs='?', const='', help="Exporter aussi en ONNX (chemin optionnel)")
+    parser.add_argument('--check', action='store_true', help="Comparer les sorties NumPy et Keras")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    output_dir = os.path.dirname(args.model)
+    weights_path = args.out or os.path.join(output_dir, 'traffic_classifier_weights.npz')
+
+    model = load_model(args.model)
+    export_weights(model, weights_path)
+    print(f"✅ Poids exportés: {weights_path} ({os.path.getsize(weights_path) / 1024:.0f} Ko)")
+
+    n_features = model.input_shape[-1]
+
+    if args.onnx is not None:
+        onnx_path = args.onnx or os.path.join(output_dir, 'traffic_classifier_model.onnx')
+        export_onnx(model, onnx_path, n_features)
+        print(f"✅ Modèle ONNX exporté: {onnx_path}")
+
+    if args.check:
+        X = np.random.default_rng(0).random((512, 1, n_features), dtype=np.float32)
+        expected = model.predict(X, verbose=0)
+        actual = NumpyEngine(weights_path).predict(X)
+        diff = float(np.abs(expected - actual).max())
+        same_class = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+        print(f"🔍 Écart max NumPy/Keras: {diff:.2e}, classes identiques: {same_class:.1%}")
+        if diff > 1e-4:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
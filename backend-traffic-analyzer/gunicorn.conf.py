@@ -0,0 +1,59 @@
+"""
+Configuration gunicorn: un worker par défaut, modèles préchargés dans le master
+
+Avec preload_app, create_app() (et donc le chargement du scaler, de
+l'encodeur et du moteur d'inférence) s'exécute une seule fois dans le
+master avant fork().
+
+Un seul worker par défaut: les jobs (/jobs), les résultats, le service
+temps réel et le serveur Socket.IO sont en mémoire dans chaque processus.
+Avec plusieurs workers, GET /jobs/<id> peut arriver sur un autre worker
+que POST /jobs (404) et la poignée de main Socket.IO en long polling
+échoue (gunicorn ne fait pas de sessions collantes). La concurrence passe
+donc par les threads (GUNICORN_THREADS), et avec un seul worker le
+préchargement ne partage rien.
+
+Le partage des poids ne sert qu'avec GUNICORN_WORKERS > 1, dans un
+déploiement de scoring seul (POST /predict, sans jobs ni Socket.IO), et
+seulement avec le moteur NumPy: les workers héritent alors du scaler et de
+l'encodeur en copy-on-write et les poids exportés (.npz, voir
+export_model.py) sont mappés en lecture seule (MODEL_MMAP=1), une seule
+copie pour tous les workers. Sans poids exportés, INFERENCE_ENGINE=auto
+retombe sur Keras (ou ONNX Runtime), rechargé dans chaque worker par
+post_fork: la mémoire croît alors avec le nombre de workers.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5001)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+wsgi_app = 'wsgi:app'
+preload_app = True
+
+# Chargement synchrone dans le master: les modèles doivent être prêts avant fork()
+os.environ.setdefault('LAZY_MODEL_LOAD', '0')
+os.environ.setdefault('MODEL_MMAP', '1')
+
+
+def on_starting(server):
+    if workers > 1:
+        server.log.warning(
+            f"⚠️  {workers} workers: jobs et sessions Socket.IO ne sont pas partagés entre "
+            "workers (404 sur /jobs/<id>, échec du long polling). Voir gunicorn.conf.py"
+        )
+        from app.models.engine import model_dir
+        weights_path = os.getenv('MODEL_WEIGHTS_PATH', os.path.join(model_dir(), 'traffic_classifier_weights.npz'))
+        if os.getenv('INFERENCE_ENGINE', 'auto') not in ('auto', 'numpy') or not os.path.exists(weights_path):
+            server.log.warning(
+                f"⚠️  Poids non partagés entre les {workers} workers: moteur rechargé dans chaque "
+                f"worker (partage: moteur NumPy et {weights_path}, voir export_model.py)"
+            )
+
+
+def post_fork(server, worker):
+    """Recharge dans le worker les moteurs non partageables (Keras, ONNX Runtime)"""
+    from app.services import prediction_service
+    prediction_service.after_fork()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import os
+from importlib.util import find_spec
 
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -11,7 +12,12 @@ import logging
 logger = logging.getLogger(__name__)
 
 def check_dependencies():
-    """Vérifier que toutes les dépendances sont installées"""
+    """
+    Vérifier que toutes les dépendances sont installées
+    
+    find_spec localise les modules sans les importer (TensorFlow, sklearn
+    ne sont chargés qu'au chargement des modèles, en arrière-plan)
+    """
     required = [
         'flask',
         'flask_cors',
@@ -19,16 +25,14 @@ def check_dependencies():
         'pandas',
         'numpy',
         'sklearn',
-        'tensorflow',
         'joblib'
     ]
     
-    missing = []
-    for module in required:
-        try:
-            __import__(module)
-        except ImportError:
-            missing.append(module)
+    missing = [module for module in required if find_spec(module) is None]
+    
+    # TensorFlow n'est requis que pour le moteur Keras (INFERENCE_ENGINE=keras)
+    if os.getenv('INFERENCE_ENGINE', 'auto') == 'keras' and find_spec('tensorflow') is None:
+        missing.append('tensorflow')
     
     if missing:
         logger.error(f"❌ Dépendances manquantes: {', '.join(missing)}")
@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Les tests importent le package `app` du backend sans installation
+sys.path.insert(0, BACKEND_DIR)
+
+# Environnement du module app.py: chargement des modèles synchrone, sans historique ni logs asynchrones
+LEGACY_ENV = {
+    'LAZY_MODEL_LOAD': '0',
+    'HISTORY_ENABLED': '0',
+    'LOG_ASYNC': '0',
+    'SOCKET_EMIT_INTERVAL': '0',
+}
+
+
+@pytest.fixture(scope='session')
+def legacy_app():
+    """Module app.py (application historique), chargé une fois sous le nom legacy_app"""
+    spec = importlib.util.spec_from_file_location('legacy_app', os.path.join(BACKEND_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, LEGACY_ENV):
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,94 @@
+import socket
+import struct
+
+from app.capture.decoder import (
+    decode_frame, format_ip, LINKTYPE_ETHERNET, LINKTYPE_RAW, LINKTYPE_LINUX_SLL
+)
+from app.capture.flow_table import TCP_SYN, TCP_ACK
+
+SRC4, DST4 = '192.168.1.10', '10.0.0.1'
+SRC6, DST6 = '2001:db8::1', '2001:db8::2'
+
+
+def ipv4(protocol, payload, src=SRC4, dst=DST4, fragment=0, options=b''):
+    ihl = 5 + len(options) // 4
+    header = struct.pack(
+        '!BBHHHBBH4s4s', 0x40 | ihl, 0, 20 + len(options) + len(payload), 1, fragment, 64,
+        protocol, 0, socket.inet_aton(src), socket.inet_aton(dst)
+    )
+    return header + options + payload
+
+
+def ipv6(next_header, payload, src=SRC6, dst=DST6):
+    header = struct.pack('!IHBB', 6 << 28, len(payload), next_header, 64)
+    return header + socket.inet_pton(socket.AF_INET6, src) + socket.inet_pton(socket.AF_INET6, dst) + payload
+
+
+def tcp(src_port, dst_port, flags):
+    return struct.pack('!HHIIBBHHH', src_port, dst_port, 0, 0, 5 << 4, flags, 65535, 0, 0)
+
+
+def udp(src_port, dst_port, data=b''):
+    return struct.pack('!HHHH', src_port, dst_port, 8 + len(data), 0) + data
+
+
+def ethernet(ethertype, payload, vlans=()):
+    header = b'\xaa' * 6 + b'\xbb' * 6
+    for vlan in vlans:
+        header += struct.pack('!HH', 0x8100, vlan)
+    return header + struct.pack('!H', ethertype) + payload
+
+
+def test_ethernet_ipv4_tcp():
+    frame = ethernet(0x0800, ipv4(6, tcp(51000, 443, TCP_SYN | TCP_ACK)))
+    src, dst, protocol, sport, dport, flags = decode_frame(frame, LINKTYPE_ETHERNET)
+
+    assert (format_ip(src), format_ip(dst)) == (SRC4, DST4)
+    assert (protocol, sport, dport, flags) == (6, 51000, 443, TCP_SYN | TCP_ACK)
+
+
+def test_ipv4_options_shift_l4_header():
+    frame = ethernet(0x0800, ipv4(17, udp(53, 40000), options=b'\x01' * 8))
+    assert decode_frame(frame)[2:] == (17, 53, 40000, 0)
+
+
+def test_vlan_tags_are_skipped():
+    frame = ethernet(0x0800, ipv4(17, udp(5353, 5353)), vlans=(10, 20))
+    assert decode_frame(frame)[2:] == (17, 5353, 5353, 0)
+
+
+def test_ipv6_with_extension_header():
+    hop_by_hop = struct.pack('!BB6x', 6, 0)  # en-tête Hop-by-Hop de 8 octets vers TCP
+    frame = ethernet(0x86DD, ipv6(0, hop_by_hop + tcp(40000, 80, TCP_SYN)))
+    src, dst, protocol, sport, dport, flags = decode_frame(frame)
+
+    assert (format_ip(src), format_ip(dst)) == (SRC6, DST6)
+    assert (protocol, sport, dport, flags) == (6, 40000, 80, TCP_SYN)
+
+
+def test_ipv4_fragment_has_no_ports():
+    frame = ethernet(0x0800, ipv4(6, b'\x00' * 16, fragment=185))
+    assert decode_frame(frame)[2:] == (6, 0, 0, 0)
+
+
+def test_raw_and_sll_linktypes():
+    packet = ipv4(17, udp(123, 123))
+    sll = b'\x00' * 14 + struct.pack('!H', 0x0800)
+
+    assert decode_frame(packet, LINKTYPE_RAW)[2:] == (17, 123, 123, 0)
+    assert decode_frame(sll + packet, LINKTYPE_LINUX_SLL)[2:] == (17, 123, 123, 0)
+
+
+def test_non_ip_truncated_and_unknown_linktype():
+    assert decode_frame(ethernet(0x0806, b'\x00' * 28)) is None  # ARP
+    assert decode_frame(ethernet(0x0800, ipv4(6, tcp(1, 2, 0)))[:40]) is None
+    assert decode_frame(b'\x00' * 60, linktype=999) is None
+
+
+def test_memoryview_input():
+    frame = ethernet(0x0800, ipv4(6, tcp(1234, 22, TCP_ACK)))
+    assert decode_frame(memoryview(frame)) == decode_frame(frame)
+
+
+def test_format_ip_passthrough():
+    assert format_ip('10.0.0.1') == '10.0.0.1'
@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.models.engine import NumpyEngine, WEIGHTS_FORMAT_VERSION, load_engine
+
+N_FEATURES, UNITS, N_CLASSES = 5, (4, 3), 3
+
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+@pytest.fixture
+def weights(tmp_path):
+    """Poids aléatoires au format de export_weights: LSTM(4, séquences) -> LSTM(3) -> Dense(softmax)"""
+    rng = np.random.default_rng(0)
+    layers, arrays = [], {}
+    inputs = N_FEATURES
+    for index, units in enumerate(UNITS):
+        layers.append({'type': 'lstm', 'units': units, 'activation': 'tanh',
+                       'recurrent_activation': 'sigmoid', 'return_sequences': index == 0})
+        arrays[f'layer{index}_kernel'] = rng.normal(0, 0.5, (inputs, 4 * units))
+        arrays[f'layer{index}_recurrent_kernel'] = rng.normal(0, 0.5, (units, 4 * units))
+        arrays[f'layer{index}_bias'] = rng.normal(0, 0.1, 4 * units)
+        inputs = units
+    layers.append({'type': 'dense', 'units': N_CLASSES, 'activation': 'softmax'})
+    arrays['layer2_kernel'] = rng.normal(0, 0.5, (inputs, N_CLASSES))
+    arrays['layer2_bias'] = rng.normal(0, 0.1, N_CLASSES)
+
+    arrays = {k: v.astype(np.float32) for k, v in arrays.items()}
+    path = tmp_path / 'traffic_classifier_weights.npz'
+    architecture = {'version': WEIGHTS_FORMAT_VERSION, 'layers': layers}
+    np.savez(path, architecture=np.array(json.dumps(architecture)), **arrays)
+    return str(path), {k: v.astype(np.float64) for k, v in arrays.items()}
+
+
+def reference_lstm(sequence, kernel, recurrent_kernel, bias):
+    """Pas LSTM de Keras écrit à la main, un échantillon à la fois (portes i, f, c, o)"""
+    units = recurrent_kernel.shape[0]
+    h, c = np.zeros(units), np.zeros(units)
+    outputs = []
+    for x in sequence:
+        z = x @ kernel + h @ recurrent_kernel + bias
+        i = sigmoid(z[:units])
+        f = sigmoid(z[units:2 * units])
+        g = np.tanh(z[2 * units:3 * units])
+        o = sigmoid(z[3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        outputs.append(h)
+    return np.array(outputs)
+
+
+def reference_predict(arrays, X):
+    result = []
+    for sequence in X.astype(np.float64):
+        hidden = reference_lstm(sequence, arrays['layer0_kernel'], arrays['layer0_recurrent_kernel'],
+                                arrays['layer0_bias'])
+        last = reference_lstm(hidden, arrays['layer1_kernel'], arrays['layer1_recurrent_kernel'],
+                              arrays['layer1_bias'])[-1]
+        logits = last @ arrays['layer2_kernel'] + arrays['layer2_bias']
+        e = np.exp(logits - logits.max())
+        result.append(e / e.sum())
+    return np.array(result)
+
+
+@pytest.mark.parametrize('timesteps', [1, 4])
+@pytest.mark.parametrize('mmap', [False, True])
+def test_numpy_engine_matches_reference_lstm(weights, timesteps, mmap):
+    path, arrays = weights
+    X = np.random.default_rng(1).normal(size=(16, timesteps, N_FEATURES)).astype(np.float32)
+
+    engine = NumpyEngine(path, mmap=mmap)
+    probabilities = engine.predict(X)
+
+    assert (engine.n_features, engine.n_classes) == (N_FEATURES, N_CLASSES)
+    assert probabilities.shape == (16, N_CLASSES)
+    np.testing.assert_allclose(probabilities, reference_predict(arrays, X), rtol=1e-4, atol=1e-6)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_return_sequences_outputs_every_step(weights):
+    path, arrays = weights
+    X = np.random.default_rng(2).normal(size=(2, 3, N_FEATURES)).astype(np.float32)
+    layer, params = NumpyEngine(path).layers[0]
+
+    hidden = NumpyEngine._lstm(X, layer, params)
+
+    assert hidden.shape == (2, 3, UNITS[0])
+    for sample, sequence in zip(hidden, X):
+        expected = reference_lstm(sequence, arrays['layer0_kernel'], arrays['layer0_recurrent_kernel'],
+                                  arrays['layer0_bias'])
+        np.testing.assert_allclose(sample, expected, rtol=1e-4, atol=1e-6)
+
+
+def test_two_dimensional_input_is_one_timestep(weights):
+    path, _ = weights
+    engine = NumpyEngine(path)
+    X = np.random.default_rng(3).normal(size=(4, N_FEATURES)).astype(np.float32)
+
+    np.testing.assert_array_equal(engine.predict(X), engine.predict(X[:, np.newaxis, :]))
+
+
+def test_auto_engine_uses_exported_weights(weights, tmp_path):
+    path, _ = weights
+    engine = load_engine('auto', str(tmp_path / 'absent.h5'), weights_path=path,
+                         onnx_path=str(tmp_path / 'absent.onnx'))
+    assert engine.name == 'numpy'
+
+    with pytest.raises(FileNotFoundError):
+        load_engine('numpy', None, weights_path=str(tmp_path / 'absent.npz'))
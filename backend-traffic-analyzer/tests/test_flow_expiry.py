@@ -0,0 +1,178 @@
+import pytest
+
+from app.capture.flow_table import FlowTable, bidirectional_key, TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK
+from app.capture.flow_expiry import FlowExpiry
+
+CLIENT = ('10.0.0.2', 51000)
+SERVER = ('10.0.0.1', 443)
+
+
+def packet(table, expiry, src, dst, now, size=60, flags=0, protocol=6):
+    """Comptabilise un paquet comme la boucle de capture (ouvre et planifie le flow si besoin)"""
+    key, canonical = bidirectional_key(src[0], src[1], dst[0], dst[1], protocol)
+    slot = table.lookup(key)
+    if slot is None:
+        slot = table.open(key, now, canonical, (src[0], src[1], dst[0], dst[1], protocol))
+        expiry.schedule(key, slot)
+    return key, slot, table.update(slot, now, size, flags, canonical)
+
+
+# ==================== Fin de flow (FIN / RST) ====================
+def test_fin_must_be_seen_in_both_directions():
+    table = FlowTable()
+    expiry = FlowExpiry(table)
+    packet(table, expiry, CLIENT, SERVER, 0.0, flags=TCP_SYN)
+    assert not packet(table, expiry, CLIENT, SERVER, 0.1, flags=TCP_FIN | TCP_ACK)[2]
+    # FIN retransmis dans le même sens: toujours ouvert
+    assert not packet(table, expiry, CLIENT, SERVER, 0.2, flags=TCP_FIN | TCP_ACK)[2]
+
+    _, slot, done = packet(table, expiry, SERVER, CLIENT, 0.3, flags=TCP_FIN | TCP_ACK)
+    assert done
+    assert table.fin_count[slot] == 3
+
+
+def test_rst_terminates_immediately():
+    table = FlowTable()
+    expiry = FlowExpiry(table)
+    packet(table, expiry, CLIENT, SERVER, 0.0, flags=TCP_SYN)
+    _, slot, done = packet(table, expiry, SERVER, CLIENT, 0.01, flags=TCP_RST)
+
+    assert done
+    assert table.rst_count[slot] == 1
+
+
+def test_terminated_flow_is_not_expired_again():
+    """Un flow clos par FIN/RST puis libéré ne ressort pas du tas d'expiration"""
+    table = FlowTable()
+    expiry = FlowExpiry(table, idle_timeout=1.0)
+    key, _, _ = packet(table, expiry, CLIENT, SERVER, 0.0)
+    assert packet(table, expiry, SERVER, CLIENT, 0.1, flags=TCP_RST)[2]
+    table.release(key)
+
+    assert expiry.expired(100.0) == []
+
+
+def test_reopened_flow_is_not_expired_by_stale_entry():
+    """L'entrée du flow précédent (même clé) est ignorée grâce à start_time"""
+    table = FlowTable()
+    expiry = FlowExpiry(table, idle_timeout=1.0)
+    key, _, _ = packet(table, expiry, CLIENT, SERVER, 0.0)
+    table.release(key)
+    packet(table, expiry, CLIENT, SERVER, 0.9)
+
+    assert expiry.expired(1.5) == []
+    assert [k for k, _ in expiry.expired(1.9)] == [key]
+
+
+# ==================== Timeouts ====================
+def test_idle_timeout_follows_last_packet():
+    table = FlowTable()
+    expiry = FlowExpiry(table, idle_timeout=10.0, active_timeout=1000.0)
+    quiet, _, _ = packet(table, expiry, ('10.0.0.3', 1000), SERVER, 0.0)
+    busy, _, _ = packet(table, expiry, CLIENT, SERVER, 0.0)
+    packet(table, expiry, SERVER, CLIENT, 8.0)
+
+    # Le flow actif est replanifié, seul le flow silencieux expire
+    assert [k for k, _ in expiry.expired(10.0)] == [quiet]
+    assert expiry.expired(17.9) == []
+    assert [k for k, _ in expiry.expired(18.0)] == [busy]
+
+
+def test_active_timeout_bounds_long_flows():
+    table = FlowTable()
+    expiry = FlowExpiry(table, idle_timeout=10.0, active_timeout=30.0)
+    key, _, _ = packet(table, expiry, CLIENT, SERVER, 0.0)
+    for t in range(5, 30, 5):
+        packet(table, expiry, CLIENT, SERVER, float(t))
+
+    assert expiry.expired(29.9) == []
+    assert [k for k, _ in expiry.expired(30.0)] == [key]
+
+
+def test_expired_flows_come_out_in_deadline_order():
+    table = FlowTable()
+    expiry = FlowExpiry(table, idle_timeout=5.0, active_timeout=1000.0)
+    starts = {}
+    for i, start in enumerate((3.0, 1.0, 2.0)):
+        key, _, _ = packet(table, expiry, ('10.0.0.%d' % (10 + i), 1000), SERVER, start)
+        starts[key] = start
+
+    assert [k for k, _ in expiry.expired(100.0)] == sorted(starts, key=starts.get)
+
+
+def test_drain_returns_active_flows():
+    table = FlowTable()
+    expiry = FlowExpiry(table)
+    a, _, _ = packet(table, expiry, CLIENT, SERVER, 0.0)
+    b, _, _ = packet(table, expiry, ('10.0.0.3', 1000), SERVER, 0.0)
+
+    assert sorted(k for k, _ in expiry.drain()) == sorted([a, b])
+    assert len(expiry) == 0
+
+
+# ==================== Capture (app.py): une classification par flow ====================
+@pytest.fixture
+def capture(legacy_app, monkeypatch):
+    """Boucle de capture de app.py avec une table neuve; analyze_flow remplacé par un relevé"""
+    table = FlowTable(capacity=8)
+    classified = []
+
+    def analyze_flow(flow_key, slot):
+        classified.append((flow_key, float(table.start_time[slot]), int(table.packets[slot, 0])))
+
+    monkeypatch.setattr(legacy_app, 'flow_data', table)
+    monkeypatch.setattr(legacy_app, 'flow_expiry', FlowExpiry(table, idle_timeout=10.0, active_timeout=30.0))
+    monkeypatch.setattr(legacy_app, 'last_sweep_time', 0.0)
+    monkeypatch.setattr(legacy_app, 'analyze_flow', analyze_flow)
+    monkeypatch.setattr(legacy_app, 'publish_completed_flows', lambda: None)
+    return legacy_app, classified
+
+
+def send(app_module, now, src, dst, flags=0, size=60):
+    app_module.update_flow(now, src[0], dst[0], 6, src[1], dst[1], flags, size)
+
+
+def test_each_flow_is_classified_exactly_once(capture):
+    app_module, classified = capture
+    rst = (('10.0.0.3', 1000), SERVER)
+    fin = (('10.0.0.4', 1000), SERVER)
+    idle = (('10.0.0.5', 1000), SERVER)
+    long = (('10.0.0.6', 1000), SERVER)
+    clock = (('10.0.0.7', 1000), SERVER)
+
+    send(app_module, 0.0, *rst, TCP_SYN)
+    send(app_module, 0.5, rst[1], rst[0], TCP_RST)
+    # Paquet tardif après le RST: nouveau flow, classifié séparément
+    send(app_module, 0.6, *rst, TCP_ACK)
+
+    send(app_module, 0.0, *fin, TCP_SYN)
+    send(app_module, 1.0, *fin, TCP_FIN | TCP_ACK)
+    send(app_module, 1.1, fin[1], fin[0], TCP_FIN | TCP_ACK)
+
+    send(app_module, 0.0, *idle)
+
+    # Actif en continu: coupé par le timeout actif (30 s), puis rouvert
+    for t in range(0, 50, 2):
+        send(app_module, float(t), *long)
+        send(app_module, float(t) + 0.5, *clock)
+    swept = {flow_key for flow_key, _, _ in classified}
+    app_module.flush_flows()
+
+    def key(endpoints):
+        return bidirectional_key(endpoints[0][0], endpoints[0][1], endpoints[1][0], endpoints[1][1], 6)[0]
+
+    flows = {}
+    for flow_key, start, packets in classified:
+        flows.setdefault(flow_key, []).append((start, packets))
+
+    assert len(classified) == len(set((k, s) for k, s, _ in classified))
+    assert flows[key(rst)] == [(0.0, 2), (0.6, 1)]
+    assert flows[key(fin)] == [(0.0, 3)]
+    assert flows[key(idle)] == [(0.0, 1)]
+    # Le paquet de t=30 est compté avant le balayage qui clôt le flow: reprise à t=32
+    assert [start for start, _ in flows[key(long)]] == [0.0, 32.0]
+    assert sum(packets for _, packets in flows[key(long)]) == 25
+    assert sum(packets for _, packets in flows[key(clock)]) == 25
+    # Timeouts appliqués par les balayages en cours de capture, pas seulement à l'arrêt
+    assert {key(rst), key(fin), key(idle), key(long)} <= swept
+    assert len(app_module.flow_data) == 0
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+
+from app.capture.flow_table import FlowTable, bidirectional_key, FLOW, FWD, BWD, TCP_SYN
+
+CLIENT = ('10.0.0.2', 51000)
+SERVER = ('10.0.0.1', 443)
+
+
+def packet(table, src, dst, now, size, flags=0, protocol=6):
+    """Comptabilise un paquet comme la boucle de capture (ouvre le flow si besoin)"""
+    key, canonical = bidirectional_key(src[0], src[1], dst[0], dst[1], protocol)
+    slot = table.lookup(key)
+    if slot is None:
+        slot = table.open(key, now, canonical, (src[0], src[1], dst[0], dst[1], protocol))
+    return key, slot, table.update(slot, now, size, flags, canonical)
+
+
+def test_distinct_flows_never_share_a_key():
+    """La clé est le 5-tuple lui-même: pas de fusion par collision de hash"""
+    keys = {bidirectional_key('10.0.0.1', port, '10.0.0.2', 80, 6)[0] for port in range(1024, 9216)}
+    assert len(keys) == 8192
+
+    table = FlowTable(capacity=4)
+    slots = {table.open(key, 0.0, True, (*key,)) for key in keys}
+    assert len(slots) == len(table) == 8192
+
+
+def test_grow_keeps_existing_flows():
+    table = FlowTable(capacity=2)
+    flows = {}
+    for port in range(5):
+        key, slot, _ = packet(table, ('10.0.0.2', 40000 + port), SERVER, 1.0, 100 + port)
+        flows[key] = (slot, 100 + port)
+
+    assert table.capacity >= 5
+    for key, (slot, size) in flows.items():
+        assert table.lookup(key) == slot
+        assert table.bytes[slot, FLOW] == size
+
+
+def test_released_slot_is_reset_on_reuse():
+    table = FlowTable(capacity=1)
+    key, slot, _ = packet(table, CLIENT, SERVER, 0.0, 1000, TCP_SYN)
+    table.release(key)
+
+    assert key not in table
+    _, reused, _ = packet(table, ('10.0.0.3', 1234), SERVER, 1.0, 60)
+    assert reused == slot
+    assert table.packets[slot, FLOW] == 1
+    assert table.bytes[slot, FLOW] == 60
+    assert table.syn_count[slot] == 0
+
+
+def test_clear_frees_every_slot():
+    table = FlowTable(capacity=2)
+    for port in range(3):
+        packet(table, ('10.0.0.2', 40000 + port), SERVER, 1.0, 60)
+    table.clear()
+
+    assert len(table) == 0
+    assert len({table.open(('k', i), 0.0, True, ('a', 1, 'b', 2, 6)) for i in range(table.capacity)}) == table.capacity
+
+
+# ==================== Statistiques (Welford) ====================
+def test_flow_stats_match_numpy():
+    table = FlowTable()
+    times = np.array([0.0, 0.01, 0.05, 0.06, 0.20, 0.30, 1.75])
+    sizes = np.array([60, 1500, 40, 1200, 800, 52, 1500], dtype=float)
+    for now, size in zip(times, sizes):
+        _, slot, _ = packet(table, CLIENT, SERVER, float(now), int(size))
+
+    iats = np.diff(times)
+    assert table.packets[slot, FLOW] == len(sizes)
+    assert table.bytes[slot, FLOW] == sizes.sum()
+    # Écart-type population (np.std), comme les statistiques de CICFlowMeter
+    assert table.size_stats(slot) == pytest.approx((sizes.mean(), sizes.std(), sizes.min(), sizes.max()))
+    assert table.iat_stats(slot) == pytest.approx((iats.mean(), iats.std(), iats.min(), iats.max()))
+
+
+def test_stats_stay_accurate_on_long_flows():
+    """Welford: pas d'annulation catastrophique (somme des carrés) sur de grandes valeurs"""
+    rng = np.random.default_rng(0)
+    table = FlowTable()
+    times = 1.7e9 + np.cumsum(rng.exponential(0.01, 20000))
+    sizes = 1e6 + rng.integers(0, 3, 20000).astype(float)
+    for now, size in zip(times, sizes):
+        _, slot, _ = packet(table, CLIENT, SERVER, float(now), float(size))
+
+    assert table.size_stats(slot)[1] == pytest.approx(sizes.std(), rel=1e-6)
+    assert table.iat_stats(slot)[1] == pytest.approx(np.diff(times).std(), rel=1e-6)
+
+
+def test_single_packet_flow_has_no_iat():
+    table = FlowTable()
+    _, slot, _ = packet(table, CLIENT, SERVER, 5.0, 60)
+
+    assert table.size_stats(slot) == (60.0, 0.0, 60.0, 60.0)
+    assert table.iat_stats(slot) == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_reused_slot_restarts_statistics():
+    table = FlowTable(capacity=1)
+    key, slot, _ = packet(table, CLIENT, SERVER, 0.0, 1000)
+    packet(table, CLIENT, SERVER, 9.0, 10)
+    table.release(key)
+
+    _, reused, _ = packet(table, CLIENT, SERVER, 20.0, 60)
+    assert reused == slot
+    assert table.size_stats(slot) == (60.0, 0.0, 60.0, 60.0)
+    assert table.iat_stats(slot) == (0.0, 0.0, 0.0, 0.0)
+
+
+# ==================== Flows bidirectionnels ====================
+def test_bidirectional_key_is_shared_by_both_directions():
+    forward, canonical_fwd = bidirectional_key(*CLIENT, *SERVER, 6)
+    backward, canonical_bwd = bidirectional_key(*SERVER, *CLIENT, 6)
+
+    assert forward == backward
+    assert canonical_fwd != canonical_bwd
+    assert bidirectional_key(*CLIENT, *SERVER, 17)[0] != forward
+
+
+def test_forward_and_backward_stats_match_numpy():
+    table = FlowTable()
+    packets = [
+        (CLIENT, SERVER, 0.00, 60),
+        (SERVER, CLIENT, 0.01, 1500),
+        (CLIENT, SERVER, 0.05, 40),
+        (SERVER, CLIENT, 0.06, 1200),
+        (SERVER, CLIENT, 0.20, 800),
+        (CLIENT, SERVER, 0.30, 52),
+    ]
+    for src, dst, now, size in packets:
+        _, slot, _ = packet(table, src, dst, now, size)
+
+    directions = {
+        FLOW: packets,
+        FWD: [p for p in packets if p[0] == CLIENT],
+        BWD: [p for p in packets if p[0] == SERVER],
+    }
+    for d, expected in directions.items():
+        times = np.array([p[2] for p in expected])
+        sizes = np.array([p[3] for p in expected], dtype=float)
+        iats = np.diff(times)
+
+        assert table.packets[slot, d] == len(expected)
+        assert table.bytes[slot, d] == sizes.sum()
+        assert table.size_stats(slot, d) == pytest.approx((sizes.mean(), sizes.std(), sizes.min(), sizes.max()))
+        assert table.iat_stats(slot, d) == pytest.approx((iats.mean(), iats.std(), iats.min(), iats.max()))
+
+
+def test_initiator_defines_forward_direction():
+    """Le sens forward est celui du premier paquet, même s'il n'est pas dans l'ordre canonique"""
+    table = FlowTable()
+    _, slot, _ = packet(table, SERVER, CLIENT, 0.0, 100)
+    packet(table, CLIENT, SERVER, 0.1, 10)
+
+    assert table.endpoints[slot][:2] == SERVER
+    assert (table.packets[slot, FWD], table.bytes[slot, FWD]) == (1, 100)
+    assert (table.packets[slot, BWD], table.bytes[slot, BWD]) == (1, 10)
+
+
+def test_one_way_flow_has_empty_backward_stats():
+    table = FlowTable()
+    _, slot, _ = packet(table, CLIENT, SERVER, 0.0, 60)
+    packet(table, CLIENT, SERVER, 1.0, 60)
+
+    assert table.packets[slot, BWD] == 0
+    assert table.size_stats(slot, BWD) == (0.0, 0.0, 0.0, 0.0)
+    assert table.iat_stats(slot, BWD) == (0.0, 0.0, 0.0, 0.0)
@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+
+from app.services.history_store import HistoryStore, parse_cursor, parse_time
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(path=str(tmp_path / 'history.db'), batch_size=10 ** 6, flush_interval=60)
+
+
+def record(store, ts, flow_id, label='BENIGN', risk='Low', confidence=0.9):
+    with mock.patch('app.services.history_store.time.time', return_value=ts):
+        store.record({'flow_id': flow_id, 'prediction': label, 'confidence': confidence, 'risk': risk})
+
+
+def pages(store, limit, **filters):
+    cursor = None
+    while True:
+        page = store.query(limit=limit, cursor=cursor, **filters)
+        yield page['items']
+        if page['next_cursor'] is None:
+            return
+        cursor = parse_cursor(page['next_cursor'])
+
+
+def test_pagination_does_not_skip_rows_sharing_a_timestamp(store):
+    for i in range(25):
+        record(store, 1700000000.5, f'same-{i}')
+    for i in range(5):
+        record(store, 1700000001.0, f'later-{i}')
+    store.flush()
+
+    flow_ids = [item['flow_id'] for page in pages(store, 7) for item in page]
+
+    assert len(flow_ids) == len(set(flow_ids)) == 30
+    assert flow_ids[:5] == [f'later-{i}' for i in range(4, -1, -1)]
+
+
+def test_cursor_is_combined_with_filters(store):
+    for i in range(10):
+        record(store, 1700000000.0 + i // 3, i, label='DDoS' if i % 2 else 'BENIGN')
+    store.flush()
+
+    flow_ids = [item['flow_id'] for page in pages(store, 2, labels=['DDoS'], start=1700000001.0)
+                for item in page]
+    assert flow_ids == ['9', '7', '5', '3']
+
+
+def test_parse_helpers():
+    assert parse_cursor(None) is None
+    assert parse_cursor('1700000000.5:42') == (1700000000.5, 42)
+    assert parse_time('1700000000') == 1700000000.0
+    with pytest.raises(ValueError):
+        parse_cursor('demain')
+    with pytest.raises(ValueError):
+        parse_time('demain')
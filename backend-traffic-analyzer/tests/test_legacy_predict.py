@@ -0,0 +1,87 @@
+import io
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.engine import NumpyEngine
+from app.models.schema import FeatureSchema
+from app.services.prediction_cache import PredictionCache
+from benchmarks.synthetic import prepare_model_dir
+
+
+class NoQueue:
+    """File d'inférence interdite: le scoring de fichiers ne doit pas y passer"""
+
+    def submit(self, X):
+        raise AssertionError("ligne de fichier soumise à la file d'inférence temps réel")
+
+
+@pytest.fixture
+def scoring(legacy_app, tmp_path, monkeypatch):
+    """app.py avec un modèle NumPy synthétique, un cache temps réel et des chunks de 40 lignes"""
+    model_dir = prepare_model_dir(str(tmp_path))
+    engine = NumpyEngine(f'{model_dir}/traffic_classifier_weights.npz')
+    scaler = joblib.load(f'{model_dir}/scaler.pkl')
+    calls = []
+
+    def batch_predict(X):
+        calls.append(len(X))
+        return engine.predict(X)
+
+    cache = PredictionCache()
+    monkeypatch.setattr(legacy_app, 'scaler', scaler)
+    monkeypatch.setattr(legacy_app, 'feature_schema', FeatureSchema.from_scaler(scaler))
+    monkeypatch.setattr(legacy_app, 'label_encoder', joblib.load(f'{model_dir}/label_encoder.pkl'))
+    monkeypatch.setattr(legacy_app, 'batch_predict', batch_predict)
+    monkeypatch.setattr(legacy_app, 'model', engine)
+    monkeypatch.setattr(legacy_app, 'prediction_cache', cache)
+    monkeypatch.setattr(legacy_app, 'inference_queue', NoQueue())
+    monkeypatch.setattr(legacy_app, 'PREDICT_CHUNKSIZE', 40)
+    return legacy_app, engine, calls, cache
+
+
+def flows_csv(legacy_app, rows):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.lognormal(3, 2, (rows, len(legacy_app.EXPECTED_FEATURES))),
+                         columns=legacy_app.EXPECTED_FEATURES)
+    return frame, frame.to_csv(index=False).encode()
+
+
+def test_file_is_scored_once_per_chunk_without_cache(scoring):
+    legacy_app, engine, calls, cache = scoring
+    frame, content = flows_csv(legacy_app, 100)
+
+    response = legacy_app.app.test_client().post('/predict', data={'file': (io.BytesIO(content), 'flows.csv')})
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert calls == [40, 40, 20]
+    assert cache.get_stats()['hits'] + cache.get_stats()['misses'] == 0
+    assert body['stats']['total_samples'] == body['stats']['processed_samples'] == 100
+
+    # Mêmes résultats que la classification ligne par ligne d'un flow (build_model_input)
+    expected = [
+        legacy_app.decode_prediction(engine.predict(legacy_app.build_model_input(features))[0])
+        for features in frame.to_dict('records')
+    ]
+    assert [p['prediction'] for p in body['predictions']] == [str(e['prediction']) for e in expected]
+    assert [p['confidence'] for p in body['predictions']] == pytest.approx([e['confidence'] for e in expected])
+    assert [p['risk'] for p in body['predictions']] == [e['risk'] for e in expected]
+    assert sum(body['summary'].values()) == 100
+
+    page = legacy_app.app.test_client().get(f"/results/{body['result_id']}?offset=90&limit=20").get_json()
+    assert [item['flow_id'] for item in page['items']] == [f'flow_{i}' for i in range(91, 101)]
+
+
+def test_file_scoring_falls_back_to_rules_without_model(scoring, monkeypatch):
+    legacy_app, _, calls, _ = scoring
+    monkeypatch.setattr(legacy_app, 'model', None)
+    _, content = flows_csv(legacy_app, 10)
+
+    body = legacy_app.app.test_client().post(
+        '/predict', data={'file': (io.BytesIO(content), 'flows.csv')}).get_json()
+
+    assert calls == []
+    assert body['stats']['processed_samples'] == 10
@@ -0,0 +1,20 @@
+from app.models.schema import FeatureSchema
+
+
+def test_model_input_is_built_by_column_name(legacy_app, monkeypatch):
+    """Features du flow placées selon les colonnes du scaler, quel que soit leur ordre"""
+    columns = ['Total Bwd packets', 'Unknown Column', 'Flow Duration', 'Dst Port', 'Total Fwd Packet']
+    monkeypatch.setattr(legacy_app, 'feature_schema', FeatureSchema(columns, [1.0] * 5, [0.0] * 5))
+    features = {
+        'total_fwd_packets': 3,
+        'total_backward_packets': 2,
+        'flow_duration': 1.5,
+        'dst_port': 443,
+        'protocol_diversity': 1,  # pas de colonne correspondante
+    }
+
+    X = legacy_app.build_model_input(features)
+
+    assert X.shape == (1, 1, 5)
+    # Durées converties en microsecondes (unité de CICFlowMeter), colonne inconnue à 0
+    assert X[0, 0].tolist() == [2.0, 0.0, 1.5e6, 443.0, 3.0]
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from app.services.prediction_cache import PredictionCache
+
+
+class CountingModel:
+    """Prédicteur factice: (labels, confidences) et lignes réellement calculées"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, X):
+        self.rows += len(X)
+        total = X.sum(axis=tuple(range(1, X.ndim)))
+        return np.where(total > 1.0, 'DDoS', 'BENIGN'), total
+
+
+def test_quantized_keys_merge_near_identical_rows():
+    cache = PredictionCache(precision=1e-3)
+    X = np.array([[0.1000, 0.5], [0.1004, 0.5], [0.1006, 0.5]], dtype=np.float32)
+    keys = cache.keys(X)
+
+    assert keys[0] == keys[1]
+    assert keys[0] != keys[2]
+
+
+def test_keys_depend_on_every_feature():
+    """Pas de clé tronquée ou hachée: deux vecteurs différents ne se confondent pas"""
+    cache = PredictionCache(precision=1e-3)
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 1000, size=(5000, 8)).astype(np.float32) / 1000
+
+    unique_rows = len(np.unique(np.rint(X * 1000).astype(np.int64), axis=0))
+    assert len(set(cache.keys(X))) == unique_rows
+
+
+def test_keys_of_extreme_values_are_bounded():
+    cache = PredictionCache(precision=1e-6)
+    keys = cache.keys(np.array([[1e30, -1e30], [1e31, -1e31]]))
+    assert keys[0] == keys[1]
+
+
+def test_only_misses_reach_the_model():
+    model = CountingModel()
+    cache = PredictionCache(precision=1e-3)
+    predict = cache.wrap(model)
+    X = np.array([[0.1, 0.2], [0.9, 0.9], [0.1, 0.2]], dtype=np.float32)
+
+    labels, confidences = predict(X)
+    assert labels.tolist() == ['BENIGN', 'DDoS', 'BENIGN']
+    assert confidences == pytest.approx([0.3, 1.8, 0.3])
+    assert model.rows == 2  # doublon du lot servi par la même inférence
+
+    labels, _ = predict(X[::-1])
+    assert labels.tolist() == ['BENIGN', 'DDoS', 'BENIGN']
+    assert model.rows == 2
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (4, 2, 2)
+    assert stats['hit_ratio'] == pytest.approx(4 / 6, abs=1e-4)
+
+
+def test_array_output_and_lru_eviction():
+    calls = []
+
+    def predict_fn(X):
+        calls.append(len(X))
+        return X[:, 0] * 2
+
+    cache = PredictionCache(max_size=2)
+    for value in (1.0, 2.0, 3.0):
+        cache.predict(predict_fn, np.array([[value]]))
+
+    assert cache.predict(predict_fn, np.array([[3.0], [1.0]])).tolist() == [6.0, 2.0]
+    assert calls == [1, 1, 1, 1]  # 1.0 évincé, recalculé
+    assert cache.get_stats()['evictions'] == 2
+
+
+def test_expired_entries_are_recomputed(monkeypatch):
+    model = CountingModel()
+    cache = PredictionCache(ttl=10.0)
+    now = [100.0]
+    monkeypatch.setattr('app.services.prediction_cache.time.monotonic', lambda: now[0])
+    X = np.array([[0.5, 0.5]])
+
+    cache.predict(model, X)
+    now[0] = 109.0
+    cache.predict(model, X)
+    assert model.rows == 1
+
+    now[0] = 120.0
+    cache.predict(model, X)
+    assert model.rows == 2
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_empty_batch_is_passed_through():
+    model = CountingModel()
+    labels, _ = PredictionCache().predict(model, np.zeros((0, 3)))
+    assert len(labels) == 0
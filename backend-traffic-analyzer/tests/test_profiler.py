@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from app.services.profiler import SamplingProfiler
+
+
+@pytest.mark.parametrize('seconds, interval', [
+    (float('nan'), None),
+    (float('inf'), None),
+    (1.0, float('nan')),
+    (1.0, float('inf')),
+])
+def test_non_finite_arguments_are_rejected(seconds, interval):
+    """nan échappe à min/max: sans contrôle, le profilage ne se terminerait jamais"""
+    profiler = SamplingProfiler(max_seconds=1.0)
+
+    with pytest.raises(ValueError):
+        profiler.profile(seconds, interval)
+    assert not profiler.busy
+
+
+def test_profile_samples_other_threads():
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=spin, name='spinner')
+    worker.start()
+    try:
+        result = SamplingProfiler(max_seconds=0.2).profile(5, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result['duration_s'] <= 1.0
+    assert result['samples'] > 0
+    assert 'spinner' in result['threads']
+    assert any(line.startswith('spinner;') for line in result['collapsed'].splitlines())
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from app.models.schema import FeatureSchema
+
+COLUMNS = ['Flow Duration', 'Tot Fwd Pkts', 'Flow Byts/s', 'Protocol']
+
+
+@pytest.fixture
+def training():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Flow Duration': rng.uniform(0, 1e6, 50),
+        'Tot Fwd Pkts': rng.integers(1, 500, 50),
+        'Flow Byts/s': rng.uniform(0, 1e5, 50),
+        'Protocol': rng.choice([6, 17], 50),
+    })
+
+
+@pytest.fixture
+def scaler(training):
+    return MinMaxScaler().fit(training)
+
+
+def test_dataframe_matches_scaler(training, scaler):
+    schema = FeatureSchema.from_scaler(scaler)
+    X = schema.transform(training)
+
+    assert X.dtype == np.float32 and X.flags['C_CONTIGUOUS']
+    np.testing.assert_allclose(X, scaler.transform(training), rtol=1e-5, atol=1e-6)
+
+
+def test_dataframe_columns_are_mapped_by_name(training, scaler):
+    """Colonnes dans un autre ordre, colonnes supprimées et colonnes en trop"""
+    schema = FeatureSchema.from_scaler(scaler)
+    shuffled = training[COLUMNS[::-1]].assign(**{'Src IP': '10.0.0.1', 'Label': 'BENIGN', 'extra': 1.0})
+
+    np.testing.assert_allclose(schema.transform(shuffled), scaler.transform(training), rtol=1e-5, atol=1e-6)
+
+
+def test_records_are_mapped_by_name(training, scaler):
+    schema = FeatureSchema.from_scaler(scaler)
+    records = [dict(reversed(list(row.items()))) for row in training.to_dict('records')]
+
+    np.testing.assert_allclose(schema.transform(records), scaler.transform(training), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(schema.transform(records[0]), scaler.transform(training[:1]), rtol=1e-5, atol=1e-6)
+
+
+def test_array_width_is_checked(training, scaler):
+    schema = FeatureSchema.from_scaler(scaler)
+    np.testing.assert_allclose(schema.transform(training.to_numpy()), scaler.transform(training),
+                               rtol=1e-5, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        schema.transform(np.zeros((2, len(COLUMNS) + 1)))
+
+
+def test_missing_columns(training, scaler):
+    schema = FeatureSchema.from_scaler(scaler)
+    partial = {'Flow Duration': 10.0, 'Protocol': 6}
+
+    with pytest.raises(ValueError, match='2 colonnes manquantes'):
+        schema.transform(partial)
+
+    raw = schema.to_matrix(partial, strict=False)
+    assert raw.tolist() == [[10.0, 0.0, 0.0, 6.0]]
+
+
+def test_non_finite_values_become_zero(scaler):
+    schema = FeatureSchema.from_scaler(scaler)
+    record = {'Flow Duration': np.inf, 'Tot Fwd Pkts': np.nan, 'Flow Byts/s': -np.inf, 'Protocol': None}
+
+    assert schema.to_matrix(record).tolist() == [[0.0, 0.0, 0.0, 0.0]]
+
+
+def test_categorical_strings_become_sorted_codes():
+    schema = FeatureSchema(['proto', 'bytes'], scale=[1.0, 1.0], offset=[0.0, 0.0])
+    records = [{'proto': 'udp', 'bytes': 1}, {'proto': 'icmp', 'bytes': 2}, {'proto': 'tcp', 'bytes': 3}]
+    expected = pd.Series(['udp', 'icmp', 'tcp']).astype('category').cat.codes.tolist()
+
+    assert schema.transform(records)[:, 0].tolist() == expected
+    frame = pd.DataFrame(records)
+    assert schema.transform(frame)[:, 0].tolist() == expected
+
+
+def test_clip_range_is_applied(training):
+    scaler = MinMaxScaler(clip=True).fit(training)
+    schema = FeatureSchema.from_scaler(scaler)
+    outliers = training * 10
+
+    X = schema.transform(outliers)
+    assert X.min() >= 0.0 and X.max() <= 1.0
+    np.testing.assert_allclose(X, scaler.transform(outliers), rtol=1e-5, atol=1e-6)
+
+
+def test_positional_schema_rejects_records():
+    schema = FeatureSchema(None, scale=[2.0, 1.0], offset=[0.0, 1.0])
+
+    assert schema.transform([[1.0, 1.0]]).tolist() == [[2.0, 2.0]]
+    with pytest.raises(ValueError):
+        schema.transform({'a': 1.0})
+
+
+def test_unsupported_scaler():
+    with pytest.raises(TypeError):
+        FeatureSchema.from_scaler(object())
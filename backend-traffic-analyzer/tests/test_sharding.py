@@ -0,0 +1,24 @@
+import queue
+
+from app.capture.sharding import run_shard_worker
+
+
+def test_worker_passes_packet_time_to_on_idle():
+    """L'expiration d'un worker suit l'horloge des paquets (replay pcap), pas l'horloge murale"""
+    in_queue = queue.Queue()
+    records, idle, stopped = [], [], []
+
+    def on_idle(last_timestamp):
+        idle.append(last_timestamp)
+        if len(idle) == 1:
+            in_queue.put([(1700000000.0, 'a', 'b', 6, 1, 2, 0, 60), (1700000003.5, 'b', 'a', 6, 2, 1, 0, 60)])
+            in_queue.put([])
+        else:
+            in_queue.put(None)
+
+    run_shard_worker(in_queue, lambda *record: records.append(record), on_idle=on_idle,
+                     on_stop=lambda: stopped.append(True), idle_timeout=0.01)
+
+    assert idle == [None, 1700000003.5]
+    assert [record[0] for record in records] == [1700000000.0, 1700000003.5]
+    assert stopped == [True]
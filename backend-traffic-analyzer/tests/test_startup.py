@@ -0,0 +1,30 @@
+import pytest
+
+from app.services import prediction_service
+
+
+@pytest.fixture
+def missing_models_app(tmp_path, monkeypatch):
+    """create_app() avec un répertoire de modèles vide"""
+    for name, value in {'MODEL_DIR': str(tmp_path), 'HISTORY_ENABLED': '0', 'LOG_ASYNC': '0',
+                        'LAZY_MODEL_LOAD': '1'}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(prediction_service, '_load_state',
+                        {'status': 'pending', 'error': None, 'duration_ms': None})
+    monkeypatch.setattr(prediction_service, '_predictor', None)
+
+    from app import create_app
+    return create_app()
+
+
+def test_missing_models_are_reported_as_failed(missing_models_app):
+    """Sans modèles, /health signale l'échec au lieu de rester en chargement"""
+    client = missing_models_app.test_client()
+
+    health = client.get('/health').get_json()
+    assert health['status'] == 'ERROR'
+    assert health['model_loaded'] is False
+    assert health['model_status']['status'] == 'failed'
+    assert 'Modèles introuvables' in health['model_status']['error']
+
+    assert client.get('/ping').status_code == 200
@@ -0,0 +1,8 @@
+"""
+Point d'entrée WSGI (gunicorn)
+
+    gunicorn -c gunicorn.conf.py
+"""
+from app import create_app, socketio  # noqa: F401
+
+app = create_app()
@@ -102,6 +102,27 @@ export function createSocket(preferredUrl = null, opts = {}) {
   socket.on('real_time_prediction', (data) => {
     console.log('📊 Prédiction temps réel reçue:', data);
   });
+
+  // Trames groupées (backend avec SOCKET_EMIT_INTERVAL > 0): chaque prédiction est
+  // redistribuée aux écouteurs de 'real_time_prediction' avec les statistiques cumulées
+  // (une trame ne contient que les champs modifiés depuis la précédente)
+  let realTimeStats = {};
+  socket.on('real_time_batch', (frame, ack) => {
+    realTimeStats = { ...realTimeStats, ...(frame.stats || {}) };
+
+    const listeners = socket.listeners('real_time_prediction');
+    for (const prediction of frame.predictions || []) {
+      const data = { prediction, stats: realTimeStats };
+      listeners.forEach((listener) => listener(data));
+    }
+
+    if (frame.dropped || Object.keys(frame.summarized || {}).length) {
+      console.log('📊 Trame résumée:', { summarized: frame.summarized, dropped: frame.dropped });
+    }
+
+    // Acquittement: le serveur limite les trames en vol par client
+    if (typeof ack === 'function') ack();
+  });
   
   socket.on('network_packet', (data) => {
     console.log('📦 Paquet réseau reçu:', data);